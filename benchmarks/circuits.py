@@ -0,0 +1,180 @@
+"""
+Registry of the example circuits timed by the benchmark suite.
+
+Each entry names the example module and class, how to construct it at a given
+sample rate and which parameter setters to exercise. Setters are called with an
+increasing counter so that every call actually changes the parameter.
+
+Optional keys:
+    sample_rates: sample rates the circuit is stable at, overriding the suite's
+    process: name of the signal processing method, defaults to process_signal
+    skip: benchmarks that the circuit does not support
+"""
+import importlib
+
+
+def _cycle(values):
+    return lambda i: values[i % len(values)]
+
+
+CIRCUITS = [
+    {
+        "module": "bassmantonestack",
+        "class": "BassmanToneStack",
+        "kwargs": lambda fs: dict(fs=fs, bass=0.5, mid=0.5, treble=0.5),
+        "setters": {
+            "set_bass": _cycle([0.1, 0.5, 0.9]),
+            "set_mid": _cycle([0.1, 0.5, 0.9]),
+            "set_treble": _cycle([0.1, 0.5, 0.9]),
+        },
+    },
+    {
+        "module": "baxandalleq",
+        "class": "BaxandallEQ",
+        "kwargs": lambda fs: dict(fs=fs, bass=0.5, treble=0.5),
+        "setters": {
+            "set_bass": _cycle([0.1, 0.5, 0.9]),
+            "set_treble": _cycle([0.1, 0.5, 0.9]),
+        },
+    },
+    {
+        "module": "baxandalleq",
+        "class": "UnadaptedBaxandallEQ",
+        "kwargs": lambda fs: dict(fs=fs, bass=0.5, treble=0.5),
+        "setters": {"set_bass": _cycle([0.1, 0.5, 0.9])},
+    },
+    {
+        "module": "capacitor",
+        "class": "_Capacitor",
+        "kwargs": lambda fs: dict(sample_rate=fs, tolerance=0.0, alpha=1.0),
+        "setters": {},
+    },
+    {
+        "module": "chua",
+        "class": "Chua",
+        "kwargs": lambda fs: dict(sample_rate=fs),
+        "setters": {"set_params": lambda i: (442 + i % 3, -18 + i % 3)},
+        "sample_rates": [100000],
+    },
+    {
+        "module": "chua_minimal",
+        "class": "Chua",
+        "kwargs": lambda fs: dict(sample_rate=fs),
+        "setters": {},
+        "sample_rates": [100000],
+    },
+    {
+        "module": "diodeclipper",
+        "class": "DiodeClipper",
+        "kwargs": lambda fs: dict(sample_rate=fs, cutoff=1000, input_gain_db=5),
+        "setters": {
+            "set_cutoff": _cycle([500.0, 1000.0, 2000.0]),
+            "set_num_diodes": _cycle([1, 2, 3]),
+        },
+    },
+    {
+        "module": "inductor",
+        "class": "_Inductor",
+        "kwargs": lambda fs: dict(sample_rate=fs, alpha=1.0),
+        "setters": {},
+        # current driven, only implements the I-V processing path
+        "process": "process_i_v_signals",
+        "skip": ["get_impulse_response", "compute_spectrum"],
+    },
+    {
+        "module": "lc_oscillator",
+        "class": "LCOscillator",
+        "kwargs": lambda fs: dict(sample_rate=fs),
+        "setters": {"set_params": lambda i: (100 + i % 3, True, 0)},
+    },
+    {
+        "module": "passive_apf",
+        "class": "PassiveAPF",
+        "kwargs": lambda fs: dict(sample_rate=fs, cutoff=1000),
+        "setters": {"set_cutoff": _cycle([500.0, 1000.0, 2000.0])},
+    },
+    {
+        "module": "passive_lpf",
+        "class": "PassiveLPF",
+        "kwargs": lambda fs: dict(sample_rate=fs, cutoff=1000),
+        "setters": {"set_cutoff": _cycle([500.0, 1000.0, 2000.0])},
+    },
+    {
+        "module": "rc_highpass",
+        "class": "RCHighPass",
+        "kwargs": lambda fs: dict(sample_rate=fs, cutoff=1000),
+        "setters": {"set_cutoff": _cycle([500.0, 1000.0, 2000.0])},
+    },
+    {
+        "module": "rc_lowpass",
+        "class": "RCLowPass",
+        "kwargs": lambda fs: dict(sample_rate=fs, cutoff=1000),
+        "setters": {"set_cutoff": _cycle([500.0, 1000.0, 2000.0])},
+    },
+    {
+        "module": "rca_mk2_sef",
+        "class": "RCA_MK2_SEF",
+        "kwargs": lambda fs: dict(sample_rate=fs, highpass_cutoff=20, lowpass_cutoff=3000),
+        "setters": {
+            "set_lowpass_knob_position": _cycle(list(range(11))),
+            "set_highpass_knob_position": _cycle(list(range(11))),
+            "set_lowpass_cutoff": _cycle([1000.0, 3000.0, 8000.0]),
+        },
+    },
+    {
+        "module": "resistor",
+        "class": "_Resistor",
+        "kwargs": lambda fs: dict(fs=fs, R1_val=1e3),
+        "setters": {"set_R1": _cycle([1e3, 2e3, 3e3])},
+    },
+    {
+        "module": "resistor_parallel",
+        "class": "ResistorParallel",
+        "kwargs": lambda fs: dict(fs=fs, R1_val=1e3, R2_val=1e3),
+        "setters": {"set_R1": _cycle([1e3, 2e3, 3e3])},
+    },
+    {
+        "module": "resistor_series",
+        "class": "ResistorSeries",
+        "kwargs": lambda fs: dict(fs=fs, R1_val=1e3, R2_val=1e3),
+        "setters": {"set_R1": _cycle([1e3, 2e3, 3e3])},
+    },
+    {
+        "module": "sallenkeyfilter",
+        "class": "SallenKeyFilter",
+        "kwargs": lambda fs: dict(sample_rate=fs, cutoff=1000, q_val=0.7),
+        "setters": {"set_params": lambda i: (1000.0 + 100 * (i % 3), 0.7)},
+    },
+    {
+        "module": "tr_808_hatresonator",
+        "class": "TR_808_HatResonator",
+        "kwargs": lambda fs: dict(fs=fs, cutoff=1000, resonance=0.5),
+        "setters": {
+            "set_cutoff": _cycle([500.0, 1000.0, 2000.0]),
+            "set_resonance": _cycle([0.1, 0.5, 0.9]),
+        },
+    },
+    {
+        "module": "voltage_divider",
+        "class": "VoltageDivider",
+        "kwargs": lambda fs: dict(fs=fs, R1_val=1e4, R2_val=1e4),
+        "setters": {"set_R1": _cycle([1e3, 2e3, 3e3])},
+    },
+]
+
+
+def case_name(case: dict) -> str:
+    return f"{case['module']}.{case['class']}"
+
+
+def make_circuit(case: dict, fs: int):
+    module = importlib.import_module(f"pywdf.examples.{case['module']}")
+    return getattr(module, case["class"])(**case["kwargs"](fs))
+
+
+def call_setter(circuit, name: str, value) -> None:
+    setter = getattr(circuit, name)
+    if isinstance(value, tuple):
+        setter(*value)
+    else:
+        setter(value)
@@ -0,0 +1,192 @@
+"""
+Throughput benchmarks for the example circuits.
+
+Times process_signal, get_impulse_response, the parameter setters and
+compute_spectrum of every circuit in benchmarks/circuits.py at several sample
+rates and signal lengths, and reports samples per second and the real-time
+factor (seconds of audio processed per second of wall time). Responses are
+simulated every time; the *_cached rows time response cache hits.
+
+    python benchmarks/run.py                          # full run, print table
+    python benchmarks/run.py --quick                  # one sample rate, short signals
+    python benchmarks/run.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run.py --compare benchmarks/baseline.json --threshold 0.25
+
+With --compare the script exits with status 1 if any benchmark got slower than
+the baseline by more than the threshold, so it can gate changes to wdf.py,
+rtype.py and circuit.py.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from circuits import CIRCUITS, case_name, make_circuit, call_setter
+
+
+def best_time(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def result(circuit: str, benchmark: str, fs: int, n: int, seconds: float, audio_samples: int = None) -> dict:
+    entry = {
+        "circuit": circuit,
+        "benchmark": benchmark,
+        "fs": fs,
+        "n": n,
+        "seconds": seconds,
+        "per_second": n / seconds,
+    }
+    if audio_samples is not None:
+        entry["realtime_factor"] = (audio_samples / fs) / seconds
+    return entry
+
+
+def run_case(case: dict, sample_rates: list, lengths: list, fft_size: int, n_setter_calls: int, repeat: int) -> list:
+    name = case_name(case)
+    skip = case.get("skip", [])
+    results = []
+    rng = np.random.default_rng(0)
+
+    for fs in case.get("sample_rates", sample_rates):
+        circuit = make_circuit(case, fs)
+        # every repeat after the first would be a response cache hit: time the simulation,
+        # and the hits separately on a circuit that keeps the cache
+        circuit.response_cache = None
+        cached = make_circuit(case, fs)
+        process = getattr(circuit, case.get("process", "process_signal"))
+
+        for n in lengths:
+            x = 0.5 * rng.standard_normal(n)
+            seconds = best_time(lambda: process(x), repeat)
+            results.append(result(name, "process_signal", fs, n, seconds, n))
+
+            if "get_impulse_response" not in skip:
+                seconds = best_time(lambda: circuit.get_impulse_response(delta_dur=n / fs), repeat)
+                results.append(result(name, "get_impulse_response", fs, n, seconds, n))
+                cached.get_impulse_response(delta_dur=n / fs)
+                seconds = best_time(lambda: cached.get_impulse_response(delta_dur=n / fs), repeat)
+                results.append(result(name, "get_impulse_response_cached", fs, n, seconds, n))
+
+        if "compute_spectrum" not in skip:
+            # compute_spectrum renders a one second impulse response
+            seconds = best_time(lambda: circuit.compute_spectrum(fft_size), repeat)
+            results.append(result(name, "compute_spectrum", fs, int(fs), seconds, int(fs)))
+            cached.compute_spectrum(fft_size)
+            seconds = best_time(lambda: cached.compute_spectrum(fft_size), repeat)
+            results.append(result(name, "compute_spectrum_cached", fs, int(fs), seconds, int(fs)))
+
+        for setter, values in case["setters"].items():
+            def call_setters():
+                for i in range(n_setter_calls):
+                    call_setter(circuit, setter, values(i))
+            seconds = best_time(call_setters, repeat)
+            results.append(result(name, setter, fs, n_setter_calls, seconds))
+
+    return results
+
+
+def result_key(entry: dict) -> tuple:
+    return (entry["circuit"], entry["benchmark"], entry["fs"], entry["n"])
+
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    """Return the results that are slower than the baseline by more than threshold."""
+    reference = {result_key(entry): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        base = reference.get(result_key(entry))
+        if base is None:
+            continue
+        slowdown = entry["seconds"] / base["seconds"] - 1.0
+        entry["change"] = slowdown
+        if slowdown > threshold:
+            regressions.append(entry)
+    return regressions
+
+
+def print_table(results: list) -> None:
+    header = f"{'circuit':<42}{'benchmark':<28}{'fs':>8}{'n':>8}{'per second':>14}{'RTF':>10}{'change':>9}"
+    print(header)
+    print("-" * len(header))
+    for entry in results:
+        rtf = f"{entry['realtime_factor']:.2f}" if "realtime_factor" in entry else ""
+        change = f"{100 * entry['change']:+.0f}%" if "change" in entry else ""
+        print(
+            f"{entry['circuit']:<42}{entry['benchmark']:<28}{entry['fs']:>8}{entry['n']:>8}"
+            f"{entry['per_second']:>14.0f}{rtf:>10}{change:>9}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=[44100, 96000])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[4096, 32768])
+    parser.add_argument("--fft-size", type=int, default=2**15)
+    parser.add_argument("--setter-calls", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="single sample rate, short signals, no repeats")
+    parser.add_argument("--filter", default=None, help="only run circuits whose name contains this string")
+    parser.add_argument("--save-baseline", default=None, help="write results to this JSON file")
+    parser.add_argument("--compare", default=None, help="compare against this baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.sample_rates, args.lengths, args.repeat, args.setter_calls = [44100], [2048], 1, 5
+
+    results = []
+    for case in CIRCUITS:
+        if args.filter and args.filter not in case_name(case):
+            continue
+        results.extend(
+            run_case(case, args.sample_rates, args.lengths, args.fft_size, args.setter_calls, args.repeat)
+        )
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        print_table(results)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {100 * args.threshold:.0f}%:")
+            for entry in regressions:
+                print(f"  {entry['circuit']} {entry['benchmark']} fs={entry['fs']} n={entry['n']}")
+            status = 1
+    else:
+        print_table(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(
+                {
+                    "machine": {
+                        "python": platform.python_version(),
+                        "numpy": np.__version__,
+                        "platform": platform.platform(),
+                        "processor": platform.processor(),
+                    },
+                    "results": results,
+                },
+                f,
+                indent=1,
+            )
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Recursive vs flat evaluation of deep connection trees.
+
+Builds RC ladders of increasing length (a series resistor and a shunt capacitor
+per section, four elements each) and times process_signal with the recursive
+wave methods and with Circuit.enable_flat_traversal. Reports nanoseconds per
+element per sample: constant for the flat traversal, while the recursive
+methods pay for every level of nesting and fail once the tree is deeper than
+Python's recursion limit.
+
+    python benchmarks/traversal.py
+    python benchmarks/traversal.py --sections 10 100 1000 5000 --samples 200
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf.core.circuit import Circuit
+from pywdf.core.wdf import Capacitor, IdealVoltageSource, ParallelAdaptor, Resistor, SeriesAdaptor
+
+
+def rc_ladder(n_sections: int, fs: int = 44100) -> Circuit:
+    node = Resistor(1e3)
+    for _ in range(n_sections):
+        node = SeriesAdaptor(Resistor(10.0), ParallelAdaptor(Capacitor(1e-8, fs), node))
+    source = IdealVoltageSource(node)
+    return Circuit(source, source, node)
+
+
+def best_time(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, nargs="+", default=[10, 100, 300, 1000, 2500])
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    x = np.random.default_rng(0).standard_normal(args.samples)
+    header = f"{'sections':>9}{'elements':>10}{'recursive ns':>14}{'flat ns':>10}{'speedup':>9}{'compile s':>11}"
+    print(header)
+    print("-" * len(header))
+    for n in args.sections:
+        circuit = rc_ladder(n)
+        n_elements = len(circuit.get_elements()) - 1
+        try:
+            recursive = best_time(lambda: circuit.process_signal(x), args.repeat)
+        except RecursionError:
+            recursive = None
+
+        start = time.perf_counter()
+        circuit.enable_flat_traversal()
+        compile_time = time.perf_counter() - start
+        flat = best_time(lambda: circuit.process_signal(x), args.repeat)
+
+        per_element = 1e9 / (args.samples * n_elements)
+        rec = f"{recursive * per_element:.0f}" if recursive is not None else "recursion"
+        speedup = f"{recursive / flat:.2f}x" if recursive is not None else ""
+        print(f"{n:>9}{n_elements:>10}{rec:>14}{flat * per_element:>10.0f}{speedup:>9}{compile_time:>11.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
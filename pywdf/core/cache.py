@@ -0,0 +1,164 @@
+import os
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable
+
+import numpy as np
+
+
+class LRUCache:
+    '''
+    Small in-memory cache with least-recently-used eviction.
+    Used to share precomputed data (lookup tables, responses, ...) between
+    elements and circuits with identical parameters.
+    '''
+    def __init__(self, maxsize: int = 128) -> None:
+        if maxsize < 1:
+            raise ValueError("LRUCache maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+        self.misses += 1
+        return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for key, building and storing it with factory() on a miss."""
+        if key in self._data:
+            return self.get(key)
+        self.misses += 1
+        value = factory()
+        self.put(key, value)
+        return value
+
+    def set_maxsize(self, maxsize: int) -> None:
+        if maxsize < 1:
+            raise ValueError("LRUCache maxsize must be at least 1")
+        self.maxsize = maxsize
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class DiskCache(LRUCache):
+    '''
+    LRU cache keyed by content hashes whose values, if cache_dir is given, are also saved
+    as {key}{suffix} files so they survive the process and are shared between processes.
+
+    Values are pickled; subclasses change the format with suffix, _load and _save. Only
+    use a cache_dir you trust, unpickling a file can run arbitrary code.
+    '''
+    suffix = ".pkl"
+
+    def __init__(self, maxsize: int = 64, cache_dir: str = None) -> None:
+        super().__init__(maxsize)
+        self.disk_hits = 0
+        self.set_cache_dir(cache_dir)
+
+    def set_cache_dir(self, cache_dir: str = None) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def _load(self, path: Path) -> Any:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def _save(self, path: Path, value: Any) -> None:
+        # written aside and renamed, so concurrent readers never see a partial file
+        partial = path.with_name(f"{path.name}.{os.getpid()}.partial")
+        with open(partial, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(partial, path)
+
+    def _copy(self, value: Any) -> Any:
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._data:
+            return self._copy(super().get(key))
+        if self.cache_dir is not None and self._path(key).exists():
+            value = self._load(self._path(key))
+            super().put(key, value)
+            self.hits += 1
+            self.disk_hits += 1
+            return self._copy(value)
+        self.misses += 1
+        return default
+
+    def put(self, key: str, value: Any) -> None:
+        super().put(key, value)
+        if self.cache_dir is not None:
+            self._save(self._path(key), value)
+
+    def get_or_create(self, key: str, factory: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self, disk: bool = False) -> None:
+        """Empty the memory cache, and also delete the files in cache_dir if disk is True."""
+        super().clear()
+        self.disk_hits = 0
+        if disk and self.cache_dir is not None:
+            for path in self.cache_dir.glob(f"*{self.suffix}"):
+                path.unlink()
+
+
+class ResponseCache(DiskCache):
+    '''
+    Content-addressed store of analysis results (impulse responses, spectra) keyed by
+    a hash of the circuit parameters, see state.parameter_key.
+
+    Arrays are kept in memory with LRU eviction and, if cache_dir is given, also saved
+    as {key}.npy files so they survive the process. Lookups return copies, so callers
+    may modify the arrays they get.
+    '''
+    suffix = ".npy"
+
+    def _load(self, path: Path) -> np.ndarray:
+        return np.load(path)
+
+    def _save(self, path: Path, value: np.ndarray) -> None:
+        np.save(path, value)
+
+    def _copy(self, value: np.ndarray) -> np.ndarray:
+        return value.copy()
+
+    def put(self, key: str, value: np.ndarray) -> None:
+        super().put(key, np.array(value))
+
+    def get_or_create(self, key: str, factory: Callable[[], np.ndarray]) -> np.ndarray:
+        return super().get_or_create(key, lambda: np.array(factory()))
+
+
+# impulse responses and spectra shared by all circuits, see Circuit.response_cache
+response_cache = ResponseCache()
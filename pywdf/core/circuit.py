@@ -2,6 +2,16 @@ import numpy as np
 from typing import Callable
 from .wdf import baseWDF, rootWDF
 from .rtype import RTypeAdaptor
+from .profiler import CircuitProfiler
+from . import state
+from .cache import response_cache
+from .linear import render_linear
+from .montecarlo import MonteCarlo
+from .transient import TransientResult, transient_analysis
+from .distortion import DistortionResult, distortion_analysis
+from .sweep import SweepResult, sweep_analysis
+from .traversal import FlatTraversal
+from .simplify import fold_memoryless
 from scipy.io import wavfile
 import scipy.signal
 import matplotlib.pyplot as plt
@@ -10,6 +20,13 @@ from abc import abstractmethod
 
 
 class Circuit:
+    # cache of impulse responses and spectra, set to None (on the class or an instance) to disable
+    response_cache = response_cache
+    # non recursive evaluation of the connection tree, see enable_flat_traversal
+    traversal = None
+    # memoryless subtrees replaced by equivalent resistors, see simplify
+    folds = ()
+
     def __init__(self, source: baseWDF, root: rootWDF, output: baseWDF) -> None:
         """Initialize Circuit class functionality.
 
@@ -22,6 +39,14 @@ class Circuit:
         self.root = root
         self.output = output
 
+    def set_input(self, sample: float) -> None:
+        """Drive the circuit's input with sample, the voltage of its source by default.
+
+        Args:
+            sample (float): incoming sample
+        """
+        self.source.set_voltage(sample)
+
 
     def process_sample(self, sample: float) -> tuple[float, float, float]:
         """Process an individual sample with this circuit.
@@ -34,7 +59,10 @@ class Circuit:
         Returns:
             float: processed sample
         """
-        self.source.set_voltage(sample)
+        self.set_input(sample)
+        if self.traversal is not None:
+            self.traversal.process()
+            return self.output.wave_to_voltage()
         self.root.accept_incident_wave(self.root.next.propagate_reflected_wave())
         self.root.next.accept_incident_wave(self.root.propagate_reflected_wave())
         return self.output.wave_to_voltage()
@@ -52,7 +80,7 @@ class Circuit:
         Returns:
             (v, vs_i, i) I-V tupple: processed sample
         """
-        self.source.set_voltage(sample)
+        self.set_input(sample)
         self.root.accept_incident_wave(self.root.next.propagate_reflected_wave())
         self.root.next.accept_incident_wave(self.root.propagate_reflected_wave())
 
@@ -73,21 +101,49 @@ class Circuit:
         return l
 
 
-    def process_signal(self, signal: np.array) -> np.array:
+    def process_signal(self, signal: np.array, reset: bool = True) -> np.array:
         """Process an entire signal with this circuit.
 
         Args:
             signal (np.array): incoming signal to process
+            reset (bool, optional): start from a reset circuit. Use False to continue
+                from the current state (e.g. one restored with set_state). Defaults to True.
 
         Returns:
             np.array: processed signal
         """
-        self.reset()
+        if reset:
+            self.reset()
 
         return np.array([ self.process_sample(sample) for sample in signal ])
 
 
 
+    def process_signal_linear(
+        self,
+        signal: np.array,
+        n_workers: int = None,
+        max_ir_duration: float = 1.0,
+        energy: float = 1 - 1e-10,
+    ) -> np.array:
+        """Process an entire signal by FFT convolution with the circuit's impulse response.
+
+        Only valid for circuits made of linear elements. The impulse response is simulated
+        once per parameter set, truncated to the given energy fraction, and long signals are
+        split into time segments convolved in parallel by n_workers processes.
+
+        Args:
+            signal (np.array): incoming signal to process
+            n_workers (int, optional): worker processes, 1 to stay in-process. Defaults to one per core
+                for signals of linear.PARALLEL_MIN_SAMPLES samples or more, else 1.
+            max_ir_duration (float, optional): impulse response length in seconds before truncation. Defaults to 1.
+            energy (float, optional): energy fraction of the impulse response to keep. Defaults to 1 - 1e-10.
+
+        Returns:
+            np.array: processed signal
+        """
+        return render_linear(self, signal, max_ir_duration, energy, n_workers)
+
     def process_wav(self, filepath: str, output_filepath: str = None) -> np.array:
         fs, x = wavfile.read(filepath)
         if fs != self.fs:
@@ -114,6 +170,9 @@ class Circuit:
         """
         Get circuit's impulse response
 
+        Results are stored in self.response_cache under a hash of the circuit's parameters,
+        so asking again for a parameter set that was already simulated does not run the circuit.
+
         Args:
             delta_dur (float, optional): duration of Dirac delta function in seconds. Defaults to 1.
             amp (float, optional): amplitude of delta signal's first sample. Defaults to 1.
@@ -121,9 +180,15 @@ class Circuit:
         Returns:
             np.array: impulse response of the system
         """
-        d = np.zeros(int(delta_dur * self.fs))
-        d[0] = amp
-        return self.process_signal(d)
+        def simulate():
+            d = np.zeros(int(delta_dur * self.fs))
+            d[0] = amp
+            return self.process_signal(d)
+
+        if self.response_cache is None:
+            return simulate()
+        key = state.parameter_key(self, "impulse_response", delta_dur, amp)
+        return self.response_cache.get_or_create(key, simulate)
 
 
 
@@ -188,19 +253,34 @@ class Circuit:
 
     def reset(self) -> None:
         """Return values of each circuit element's incident & reflected waves to 0"""
-        for key in self.__dict__:
-            if isinstance(self.__dict__[key], baseWDF):
-                self.__dict__[key].reset()
+        for element in self.get_elements():
+            element.reset()
 
 
 
 
 
     def compute_spectrum(self, fft_size: int = None) -> np.ndarray:
-        x = self.get_impulse_response()
-        N2 = int(fft_size / 2 - 1)
-        H = fft(x, fft_size)[:N2]
-        return H
+        """Complex frequency response, from the FFT of the impulse response.
+
+        Args:
+            fft_size (int, optional): FFT size. Defaults to 2**15.
+
+        Returns:
+            np.ndarray: the first fft_size / 2 - 1 bins of the spectrum
+        """
+        if fft_size is None:
+            fft_size = int(2**15)
+
+        def spectrum():
+            x = self.get_impulse_response()
+            N2 = int(fft_size / 2 - 1)
+            return fft(x, fft_size)[:N2]
+
+        if self.response_cache is None:
+            return spectrum()
+        key = state.parameter_key(self, "spectrum", fft_size)
+        return self.response_cache.get_or_create(key, spectrum)
 
 
 
@@ -329,6 +409,86 @@ class Circuit:
 
 
 
+    def transient_analysis(
+        self,
+        freqs=1000.0,
+        amplitudes=1.0,
+        t_ms: float = 5,
+        settle_ms: float = 0,
+        currents: bool = False,
+        batch: bool = True,
+    ) -> TransientResult:
+        """Responses to sines of every frequency and amplitude given, rendering only
+        settle_ms + t_ms of signal and the whole grid in one batched pass.
+        See transient.transient_analysis.
+
+        Args:
+            freqs (float or array, optional): frequencies of the sines in Hz. Defaults to 1000.
+            amplitudes (float or array, optional): amplitudes of the sines. Defaults to 1.
+            t_ms (float, optional): returned duration in ms. Defaults to 5.
+            settle_ms (float, optional): duration rendered before it, in ms. Defaults to 0.
+            currents (bool, optional): also record the source and output currents. Defaults to False.
+            batch (bool, optional): render every sine at once. Defaults to True.
+
+        Returns:
+            TransientResult: signals indexed [sample, frequency, amplitude], and their spectra
+        """
+        return transient_analysis(self, freqs, amplitudes, t_ms, settle_ms, currents, batch)
+
+    def distortion_analysis(
+        self,
+        freqs=1000.0,
+        levels=1.0,
+        n_samples: int = 4096,
+        settle_ms: float = 10,
+        imd_freqs: tuple = None,
+        batch: bool = True,
+        n_workers: int = 1,
+    ) -> DistortionResult:
+        """THD, THD+N and, with imd_freqs, two-tone IMD for every input frequency and level,
+        from one short coherently sampled rendering of the whole grid.
+        See distortion.distortion_analysis for the other settings.
+
+        Args:
+            freqs (float or array, optional): sine frequencies in Hz. Defaults to 1000.
+            levels (float or array, optional): peak input levels. Defaults to 1.
+            n_samples (int, optional): measured length, a power of two. Defaults to 4096.
+            settle_ms (float, optional): duration rendered and discarded first, in ms. Defaults to 10.
+            imd_freqs (tuple, optional): the two IMD tones in Hz. Defaults to None, no IMD.
+            batch (bool, optional): render the whole grid as lanes of one pass. Defaults to True.
+            n_workers (int, optional): worker processes without batch, None for one per core.
+                Defaults to 1.
+
+        Returns:
+            DistortionResult: THD, THD+N and IMD per grid point
+        """
+        return distortion_analysis(
+            self, freqs, levels, n_samples, settle_ms, imd_freqs=imd_freqs, batch=batch, n_workers=n_workers
+        )
+
+    def sweep_analysis(
+        self,
+        duration: float = 1.0,
+        f1: float = 20.0,
+        f2: float = None,
+        amplitude: float = 1.0,
+        n_harmonics: int = 5,
+    ) -> SweepResult:
+        """Linear and harmonic impulse responses from one exponential sine sweep rendering.
+        See sweep.sweep_analysis.
+
+        Args:
+            duration (float, optional): sweep duration in seconds. Defaults to 1.
+            f1 (float, optional): start frequency in Hz. Defaults to 20.
+            f2 (float, optional): end frequency in Hz. Defaults to 20 kHz, at most 0.45 fs.
+            amplitude (float, optional): sweep amplitude. Defaults to 1.
+            n_harmonics (int, optional): number of responses, the linear one included. Defaults to 5.
+
+        Returns:
+            SweepResult: the impulse responses and their frequency responses
+        """
+        return sweep_analysis(self, duration, f1, f2, amplitude, n_harmonics)
+
     def i_v_analysis(
         self,
         freq: float = 1000,
@@ -345,20 +505,14 @@ class Circuit:
         """
         _, ax = plt.subplots(nrows=1, ncols=1, figsize=(10, 6.5))
 
-        n_samples = int(t_ms * self.fs / 1000)
-        n = np.arange(0, 2, 1 / self.fs)
-        x = np.sin(2 * np.pi * freq * n) * amplitude
-        
-        y = self.process_i_v_signals(x)
+        result = self.transient_analysis(freq, amplitude, t_ms, currents=True, batch=False)
+        x, v = result.x[:, 0, 0], result.y[:, 0, 0]
+        ii, io = result.i_source[:, 0, 0] * 100, result.i_output[:, 0, 0] * 0.01
 
-        v, ii, io = zip(*y)
-  
-        v, ii, io = np.array(v), np.array(ii) * 100, np.array(io) * 0.01 
-
-        ax.plot(x[:n_samples], label="input signal")
-        ax.plot(v[:n_samples], label="voltage out", alpha=0.75)
-        ax.plot(ii[:n_samples], label="current source through", alpha=0.75)
-        ax.plot(io[:n_samples], label="current output through", alpha=0.75)
+        ax.plot(x, label="input signal")
+        ax.plot(v, label="voltage out", alpha=0.75)
+        ax.plot(ii, label="current source through", alpha=0.75)
+        ax.plot(io, label="current output through", alpha=0.75)
         ax.set_xlabel("sample")
         ax.set_ylabel("amplitude")
         ax.set_yscale('log')
@@ -373,47 +527,41 @@ class Circuit:
 
         plt.show()
 
-
-
-
-
-
     def AC_transient_analysis(
         self,
         freq: float = 1000,
         amplitude: float = 1,
         t_ms: float = 5,
         outpath: str = None,
+        spectrum_ms: float = 2000,
     ):
         """Plot transient analysis of Circuit's response to sine wave
 
+        The waveforms show the first t_ms of the rendering and the spectrum is taken over all
+        of it, max(t_ms, spectrum_ms), for a resolution of 1000 / spectrum_ms Hz.
+
         Args:
             freq (float, optional): frequency of sine wave. Defaults to 1000.
             amplitude (float, optional): amplitude of sine wave. Defaults to 1.
             t_ms (float, optional): time in ms of sine wave. Defaults to 5.
+            spectrum_ms (float, optional): time in ms the spectrum is taken over. Defaults to 2000.
         """
         _, ax = plt.subplots(nrows=2, ncols=1, figsize=(10, 6.5))
 
-        n_samples = int(t_ms * self.fs / 1000)
+        result = self.transient_analysis(freq, amplitude, max(t_ms, spectrum_ms), batch=False)
+        n_samples = int(round(t_ms * self.fs / 1000))
+        x, y = result.x[:n_samples, 0, 0], result.y[:n_samples, 0, 0]
 
-        n = np.arange(0, 2, 1 / self.fs)
-        x = np.sin(2 * np.pi * freq * n) * amplitude
-        y = self.process_signal(x)
-
-        ax[0].plot(x[:n_samples], label="input signal")
-        ax[0].plot(y[:n_samples], label="output signal", alpha=0.75)
+        ax[0].plot(x, label="input signal")
+        ax[0].plot(y, label="output signal", alpha=0.75)
         ax[0].set_xlabel("sample")
         ax[0].set_ylabel("amplitude")
         ax[0].set_title(loc="left", label="output signal vs input signal waveforms")
         ax[0].grid(True)
         ax[0].legend()
 
-        N = len(n)
-        w = scipy.signal.windows.hann((len(n)))
-        y_fft = scipy.fft.fft(w * y)
-        yf = scipy.fft.fftfreq(N, 1 / self.fs)[20 : N // 2]
-
-        ax[1].plot(yf, 2.0 / N * np.abs(y_fft[20 : N // 2]))
+        yf, y_fft = result.spectrum()
+        ax[1].plot(yf[1:], y_fft[1:, 0, 0])
         ax[1].set_xlabel("frequency [Hz]")
         ax[1].set_ylabel("magnitude")
         ax[1].set_title(loc="left", label="output signal spectrum")
@@ -424,6 +572,163 @@ class Circuit:
 
         plt.show()
 
+    def get_element_names(self) -> dict:
+        """Name every element of the circuit.
+
+        Elements stored as circuit attributes are named after the attribute, elements held by
+        lists or helper objects (e.g. filter stages) get a dotted / indexed path, and any other
+        element of the connection tree is named after its parent and class.
+
+        Returns:
+            dict: {element: name}, in connection tree pre-order
+        """
+        named = {}
+
+        def add(obj, name):
+            if _is_element(obj) and obj not in named:
+                named[obj] = name
+
+        tree_keys = ("source", "root", "output")
+        keys = [k for k in self.__dict__ if k not in tree_keys] + list(tree_keys)
+        for key in keys:
+            value = self.__dict__.get(key)
+            if isinstance(value, (list, tuple)):
+                for i, item in enumerate(value):
+                    add(item, f"{key}[{i}]")
+                    if not _is_element(item) and hasattr(item, "__dict__"):
+                        for attr, sub in vars(item).items():
+                            add(sub, f"{key}[{i}].{attr}")
+            elif _is_element(value):
+                add(value, key)
+            elif hasattr(value, "__dict__") and not callable(value):
+                for attr, sub in vars(value).items():
+                    add(sub, f"{key}.{attr}")
+
+        names = {}
+        stack = [(e, n) for e, n in reversed(list(named.items()))] + [(self.root, "root")]
+        while stack:
+            element, fallback = stack.pop()
+            if element in names:
+                continue
+            names[element] = named.get(element, fallback)
+            children = element.get_children()
+            for i, child in reversed(list(enumerate(children))):
+                stack.append((child, f"{names[element]}/{type(child).__name__}{i}"))
+        return names
+
+    def get_elements(self) -> list:
+        """All elements of the circuit, in connection tree pre-order."""
+        return list(self.get_element_names())
+
+    def get_state_schema(self) -> list:
+        """Layout of the vector returned by get_state.
+
+        Returns:
+            list: one [element name, attribute, shape] entry per packed value
+        """
+        return state.state_schema(self)
+
+    def get_state(self) -> np.ndarray:
+        """Snapshot of the full simulation state: the waves of every element (a, b, z,
+        adaptor and R-type internal waves), all numeric element parameters and the
+        circuit's own numeric parameters, packed into one flat array.
+
+        Returns:
+            np.ndarray: the state, laid out as described by get_state_schema
+        """
+        return state.get_state(self)
+
+    def set_state(self, new_state: np.ndarray) -> None:
+        """Restore a snapshot taken with get_state on a circuit of the same structure.
+
+        Args:
+            new_state (np.ndarray): flat state array
+        """
+        state.set_state(self, new_state)
+
+    def save_state(self, path: str) -> None:
+        """Save get_state() and its schema to a .npz file."""
+        state.save_state(self, path)
+
+    def load_state(self, path: str) -> None:
+        """Restore a state saved with save_state, raising ValueError if the schemas differ."""
+        state.load_state(self, path)
+
+    def enable_profiling(self) -> CircuitProfiler:
+        """Instrument every element with call counters and timers.
+
+        Profiling is opt-in: until this is called no element carries any instrumentation.
+        Call it after the circuit is built (and again after rebuilding it).
+
+        Returns:
+            CircuitProfiler: the profiler collecting the statistics, also stored as self.profiler
+        """
+        profiler = self.__dict__.get("profiler")
+        if profiler is None:
+            profiler = self.profiler = CircuitProfiler(self)
+        profiler.enable()
+        return profiler
+
+    def disable_profiling(self) -> None:
+        """Remove the instrumentation; the collected statistics are kept in self.profiler."""
+        profiler = self.__dict__.get("profiler")
+        if profiler is not None:
+            profiler.disable()
+
+    def enable_flat_traversal(self) -> FlatTraversal:
+        """Evaluate the connection tree with flat, non recursive passes in process_sample.
+
+        Needed for very deep trees (long ladders), which exceed Python's recursion limit,
+        and faster for any tree. Only affects circuits using the default process_sample.
+
+        Returns:
+            FlatTraversal: the traversal, also stored as self.traversal
+        """
+        self.traversal = FlatTraversal(self.root)
+        return self.traversal
+
+    def disable_flat_traversal(self) -> None:
+        """Go back to the recursive wave methods."""
+        self.__dict__.pop("traversal", None)
+
+    def simplify(self) -> list:
+        """Replace memoryless subtrees of the connection tree by equivalent resistors.
+
+        Subtrees made only of resistors, two port and N-port series / parallel adaptors and
+        polarity inverters reflect no wave, so each is folded into one FoldedResistor and
+        per sample work is left to the reactive and nonlinear elements. The output is unchanged.
+        The output element is never folded. Parameter changes inside a folded subtree still go
+        through its setters; reading the voltage or current of one of its elements (e.g. in
+        process_sample) or connecting a reactive or nonlinear element below it expands the fold.
+
+        Returns:
+            list: the FoldedResistors added, also stored as self.folds
+        """
+        self.expand()
+        self.folds = fold_memoryless(self.root, [self.output])
+        return self.folds
+
+    def expand(self) -> None:
+        """Undo simplify, putting the folded subtrees back into the connection tree."""
+        for fold in self.folds:
+            fold.expand()
+        self.__dict__.pop("folds", None)
+
+    def monte_carlo(self, n_instances: int = 100, tolerances: dict = None, seed: int = None) -> MonteCarlo:
+        """Component tolerance analysis over n_instances randomly perturbed copies of the circuit.
+
+        See MonteCarlo for how the tolerances are chosen and which components vary.
+
+        Args:
+            n_instances (int, optional): number of variants, simulated together. Defaults to 100.
+            tolerances (dict, optional): {element name or class name: tolerance}. Defaults to None.
+            seed (int, optional): seed of the random draws. Defaults to None.
+
+        Returns:
+            MonteCarlo: the analysis, with frequency_response(), magnitude_percentiles() and thd()
+        """
+        return MonteCarlo(self, n_instances, tolerances, seed)
+
     @abstractmethod
     def _impedance_calc(self, R: RTypeAdaptor):
         """Placeholder function used to calculate impedance of Rtype adaptor
@@ -432,3 +737,8 @@ class Circuit:
             R (RTypeAdaptor): Rtype of which to calculate impedance
         """
         pass
+
+
+def _is_element(obj) -> bool:
+    # duck typed: example circuits import the element classes under a different module name
+    return hasattr(obj, "propagate_reflected_wave") and hasattr(obj, "get_children")
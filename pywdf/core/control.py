@@ -0,0 +1,181 @@
+import copy
+import functools
+import queue
+import threading
+import types
+
+import numpy as np
+
+
+# per-sample signal and wave state, never part of a coefficient snapshot
+STATE_ATTRIBUTES = frozenset(("a", "b", "z", "b_temp", "b_diff", "b_diffs", "a_vals", "b_vals", "Vs"))
+
+# circuit level attributes that are never copied between circuits
+CIRCUIT_EXCLUDED = frozenset(("fs", "profiler"))
+
+
+class CoefficientSet:
+    '''
+    Snapshot of the coefficients of a circuit: port resistances, reflection coefficients,
+    S-matrices, nonlinearity parameters and the circuit's own scalar parameters
+    (gains, knob positions, ...). Wave state is not included, so applying a snapshot
+    changes the circuit's parameters without resetting or disturbing the signal in it.
+    '''
+    def __init__(self, circuit, elements: list = None, version: int = 0) -> None:
+        if elements is None:
+            elements = circuit.get_elements()
+        self.version = version
+        self.circuit_values = {
+            k: _copy_value(v) for k, v in circuit.__dict__.items() if _is_circuit_parameter(k, v)
+        }
+        self.element_values = [
+            {k: _copy_value(v) for k, v in e.__dict__.items() if _is_coefficient(k, v)}
+            for e in elements
+        ]
+
+    def apply(self, circuit, elements: list) -> None:
+        """Write the snapshot into circuit, whose elements (in get_elements() order) are given."""
+        circuit.__dict__.update(self.circuit_values)
+        for element, values in zip(elements, self.element_values):
+            element.__dict__.update(values)
+
+
+class ParameterController:
+    '''
+    Double-buffered parameter updates for a circuit processed on another thread.
+
+    Setters are never called on the processed ("live") circuit. They run on a private copy
+    (the shadow circuit) on the control thread, where the impedance changes and S-matrix
+    recomputations happen; the resulting coefficients are then published as a CoefficientSet.
+    The audio thread calls swap() between blocks, which picks up the latest published set
+    with a single reference read and writes it into the live circuit.
+
+    While a controller is attached, parameters of the live circuit must only be changed
+    through it, and the structure of the circuit must not change.
+    '''
+    def __init__(self, circuit) -> None:
+        self.circuit = circuit
+        self.elements = circuit.get_elements()
+        self.shadow = _copy_circuit(circuit)
+        self.shadow_elements = self.shadow.get_elements()
+        if [type(e) for e in self.elements] != [type(e) for e in self.shadow_elements]:
+            raise ValueError("Could not mirror the circuit's connection tree")
+
+        self.version = 0
+        self.applied_version = 0
+        self._published = None
+        self._lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._worker = None
+
+    def update(self, setter, *args) -> CoefficientSet:
+        """Run a setter on the shadow circuit and publish the new coefficients.
+
+        Args:
+            setter: name of a method of the circuit (e.g. 'set_bass'), or a callable
+                taking the circuit as first argument
+            *args: arguments of the setter
+
+        Returns:
+            CoefficientSet: the published coefficients
+        """
+        return self.update_many([(setter, args)])
+
+    def update_many(self, changes: list) -> CoefficientSet:
+        """Apply several (setter, args) changes and publish them as one snapshot."""
+        with self._lock:
+            for setter, args in changes:
+                if isinstance(setter, str):
+                    getattr(self.shadow, setter)(*args)
+                else:
+                    setter(self.shadow, *args)
+            self.version += 1
+            coefficients = CoefficientSet(self.shadow, self.shadow_elements, self.version)
+            self._published = coefficients
+        return coefficients
+
+    def swap(self) -> bool:
+        """Install the latest published coefficients in the live circuit (audio thread).
+
+        Returns:
+            bool: True if new coefficients were installed
+        """
+        coefficients = self._published
+        if coefficients is None or coefficients.version == self.applied_version:
+            return False
+        coefficients.apply(self.circuit, self.elements)
+        self.applied_version = coefficients.version
+        return True
+
+    def submit(self, setter, *args) -> None:
+        """Queue a change for the background control thread (see start)."""
+        self._requests.put((setter, args))
+
+    def start(self) -> None:
+        """Start a control thread computing the submitted changes, coalescing bursts into one update."""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, daemon=True)
+            self._worker.start()
+
+    def stop(self) -> None:
+        """Finish the submitted changes and stop the control thread."""
+        if self._worker is not None:
+            self._requests.put(None)
+            self._worker.join()
+            self._worker = None
+
+    def _run(self) -> None:
+        while True:
+            changes = [self._requests.get()]
+            while not self._requests.empty():
+                changes.append(self._requests.get())
+            stop = None in changes
+            changes = [c for c in changes if c is not None]
+            if changes:
+                self.update_many(changes)
+            if stop:
+                return
+
+
+def _copy_circuit(circuit):
+    profiler = circuit.__dict__.get("profiler")
+    profiling = profiler is not None and profiler.enabled
+    if profiling:
+        profiler.disable()
+    try:
+        shadow = copy.deepcopy(circuit)
+    finally:
+        if profiling:
+            profiler.enable()
+    shadow.__dict__.pop("profiler", None)
+    return shadow
+
+
+def _is_element(value) -> bool:
+    return hasattr(value, "propagate_reflected_wave") and hasattr(value, "get_children")
+
+
+def _is_coefficient(name: str, value) -> bool:
+    if name in STATE_ATTRIBUTES or _is_element(value):
+        return False
+    if isinstance(value, (types.FunctionType, types.MethodType, functools.partial)):
+        return False
+    if isinstance(value, (list, tuple)) and any(_is_element(v) for v in value):
+        return False
+    return True
+
+
+def _is_circuit_parameter(name: str, value) -> bool:
+    if name in CIRCUIT_EXCLUDED:
+        return False
+    if isinstance(value, (bool, int, float, complex, str, np.number, np.ndarray)):
+        return True
+    return isinstance(value, dict)
+
+
+def _copy_value(value):
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, (list, dict)):
+        return copy.deepcopy(value)
+    return value
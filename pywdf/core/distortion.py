@@ -0,0 +1,182 @@
+import numpy as np
+
+from .transient import render_lanes
+
+
+def coherent_frequency(f: float, fs: float, n_samples: int) -> float:
+    """Frequency nearest to f with an odd whole number of periods in n_samples.
+
+    A sine of that frequency falls on a single FFT bin of an n_samples long signal, and so
+    do its harmonics: no window is needed and one short rendering gives exact bin powers.
+    With n_samples a power of two, the odd number of periods is coprime with it, so
+    harmonics aliased above Nyquist never fold back onto the fundamental.
+    """
+    periods = max(int(round(f * n_samples / fs)), 1)
+    if periods % 2 == 0:
+        periods += 1 if f * n_samples / fs >= periods else -1
+    return periods * fs / n_samples
+
+
+def _bin(k: int, n_samples: int) -> int:
+    # bin of the rfft where a component of k periods lands, aliases folded
+    k %= n_samples
+    return min(k, n_samples - k)
+
+
+def _power(y: np.ndarray) -> np.ndarray:
+    return np.abs(np.fft.rfft(y, axis=0)) ** 2
+
+
+def coherent_thd(y: np.ndarray, fs: float, f0: float, n_harmonics: int = 10) -> tuple:
+    """THD and THD+N of a coherently sampled sine response, along the first axis.
+
+    Exact bin powers of an unwindowed spectrum, unlike montecarlo.thd, which measures any
+    sine response through Hann windowed bands.
+
+    Args:
+        y (np.ndarray): steady state response, f0 a coherent_frequency of its length
+        fs (float): sample rate
+        f0 (float): fundamental frequency
+        n_harmonics (int, optional): highest harmonic taken into account. Defaults to 10.
+
+    Returns:
+        tuple: (THD, THD+N) ratios: rms of harmonics 2..n_harmonics (aliases included, where
+            the simulation puts them), resp. of everything but DC and the fundamental, over
+            the rms of the fundamental; one value per column of y
+    """
+    n = len(y)
+    power = _power(y)
+    k = int(round(f0 * n / fs))
+    harmonics = {_bin(m * k, n) for m in range(2, n_harmonics + 1)} - {0, k}
+    fundamental = power[k]
+    distortion = power[sorted(harmonics)].sum(axis=0)
+    noise = np.delete(power, [0, k], axis=0).sum(axis=0)
+    return np.sqrt(distortion / fundamental), np.sqrt(noise / fundamental)
+
+
+def imd(y: np.ndarray, fs: float, f1: float, f2: float, order: int = 3) -> np.ndarray:
+    """Intermodulation distortion of a coherently sampled two-tone response, along the first axis.
+
+    Args:
+        y (np.ndarray): steady state response, f1 and f2 coherent_frequency values of its length
+        fs (float): sample rate
+        f1 (float): first tone
+        f2 (float): second tone
+        order (int, optional): highest order |p| + |q| of the products p f1 + q f2. Defaults to 3.
+
+    Returns:
+        np.ndarray: rms of the products with p and q non zero (aliases included) over the rms
+            of the two tones, one value per column of y
+    """
+    n = len(y)
+    power = _power(y)
+    k1, k2 = int(round(f1 * n / fs)), int(round(f2 * n / fs))
+    products = {
+        _bin(p * k1 + q * k2, n)
+        for p in range(-order, order + 1)
+        for q in range(-order, order + 1)
+        if p and q and abs(p) + abs(q) <= order
+    } - {0, k1, k2}
+    return np.sqrt(power[sorted(products)].sum(axis=0) / (power[k1] + power[k2]))
+
+
+class DistortionResult:
+    '''
+    Distortion of a circuit over a grid of input levels and frequencies, see distortion_analysis.
+
+    Attributes:
+        freqs (np.ndarray): measured frequencies, the coherent ones nearest to those asked for
+        levels (np.ndarray): peak input levels
+        thd (np.ndarray): THD per [frequency, level]
+        thd_n (np.ndarray): THD+N per [frequency, level]
+        imd_freqs (tuple): the two coherent tones of the IMD measurement, or None
+        imd (np.ndarray): IMD per level, or None
+    '''
+    def __init__(self, freqs, levels, thd, thd_n, imd_freqs=None, imd=None) -> None:
+        self.freqs = freqs
+        self.levels = levels
+        self.thd = thd
+        self.thd_n = thd_n
+        self.imd_freqs = imd_freqs
+        self.imd = imd
+
+    def rows(self) -> list:
+        """One dict per grid point: frequency, level, thd, thd_n and, if measured, imd."""
+        rows = []
+        for i, f in enumerate(self.freqs):
+            for j, level in enumerate(self.levels):
+                row = {"frequency": f, "level": level, "thd": self.thd[i, j], "thd_n": self.thd_n[i, j]}
+                if self.imd is not None:
+                    row["imd"] = self.imd[j]
+                rows.append(row)
+        return rows
+
+    def table(self) -> str:
+        """Format the grid as a text table, ratios in percent."""
+        columns = ["frequency", "level", "thd", "thd_n"] + (["imd"] if self.imd is not None else [])
+        lines = ["".join(f"{c:>12}" for c in columns)]
+        for row in self.rows():
+            values = [f"{row['frequency']:12.2f}", f"{row['level']:12.4g}"]
+            values += [f"{100 * row[c]:11.5f}%" for c in columns[2:]]
+            lines.append("".join(values))
+        return "\n".join(lines)
+
+
+def distortion_analysis(
+    circuit,
+    freqs=1000.0,
+    levels=1.0,
+    n_samples: int = 4096,
+    settle_ms: float = 10.0,
+    n_harmonics: int = 10,
+    imd_freqs: tuple = None,
+    imd_ratio: float = 4.0,
+    imd_order: int = 3,
+    batch: bool = True,
+    n_workers: int = 1,
+) -> DistortionResult:
+    """THD, THD+N and (with imd_freqs) IMD of a circuit for every input frequency and level.
+
+    Every grid point is a sine of a coherent_frequency, so settle_ms plus n_samples of
+    signal suffice and no window smears the harmonics. The two-tone IMD stimulus (one per
+    level, its tones in the amplitude ratio imd_ratio: 4 for SMPTE style 60 Hz + 7 kHz)
+    peaks at the level. All stimuli are rendered together by render_lanes: as lanes of
+    one batched pass or, with batch=False, one after the other or over n_workers processes.
+
+    Args:
+        circuit (Circuit): circuit to measure, left unchanged
+        freqs (float or array, optional): sine frequencies in Hz. Defaults to 1000.
+        levels (float or array, optional): peak input levels. Defaults to 1.
+        n_samples (int, optional): measured length, a power of two. Defaults to 4096.
+        settle_ms (float, optional): duration rendered and discarded first, in ms. Defaults to 10.
+        n_harmonics (int, optional): highest harmonic of the THD. Defaults to 10.
+        imd_freqs (tuple, optional): the two tones (f1, f2) in Hz. Defaults to None, no IMD.
+        imd_ratio (float, optional): amplitude of f1 over that of f2. Defaults to 4.
+        imd_order (int, optional): highest order of the intermodulation products. Defaults to 3.
+        batch (bool, optional): render the whole grid as lanes of one pass. Defaults to True.
+        n_workers (int, optional): worker processes without batch, see render_lanes. Defaults to 1.
+
+    Returns:
+        DistortionResult: the results, per grid point
+    """
+    fs = circuit.fs
+    freqs = np.array([coherent_frequency(f, fs, n_samples) for f in np.atleast_1d(freqs)])
+    levels = np.atleast_1d(np.asarray(levels, dtype=float))
+    n_settle = int(round(settle_ms * fs / 1000))
+    t = np.arange(n_settle + n_samples) / fs
+
+    # lanes: the sines, frequencies first, then the two-tone stimuli
+    lanes = [level * np.sin(2 * np.pi * f * t) for f in freqs for level in levels]
+    if imd_freqs is not None:
+        imd_freqs = tuple(coherent_frequency(f, fs, n_samples) for f in imd_freqs)
+        two_tone = imd_ratio * np.sin(2 * np.pi * imd_freqs[0] * t) + np.sin(2 * np.pi * imd_freqs[1] * t)
+        lanes += [level / (1.0 + imd_ratio) * two_tone for level in levels]
+    y = render_lanes(circuit, np.stack(lanes, -1), batch=batch, n_workers=n_workers)[n_settle:]
+
+    n_levels = len(levels)
+    ratios = [coherent_thd(y[:, i * n_levels : (i + 1) * n_levels], fs, f, n_harmonics) for i, f in enumerate(freqs)]
+    result = DistortionResult(freqs, levels, np.array([r[0] for r in ratios]), np.array([r[1] for r in ratios]))
+    if imd_freqs is not None:
+        result.imd_freqs = imd_freqs
+        result.imd = imd(y[:, len(freqs) * n_levels :], fs, *imd_freqs, imd_order)
+    return result
@@ -0,0 +1,135 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.signal
+
+from .state import parameter_key
+
+
+def is_linear(circuit) -> bool:
+    """True if every element of the circuit's connection tree is linear."""
+    return all(getattr(e, "is_linear", True) for e in circuit.get_elements())
+
+
+def truncate_impulse_response(h: np.ndarray, energy: float = 1 - 1e-10, min_length: int = 1) -> np.ndarray:
+    """Shortest prefix of h holding at least the given fraction of its energy.
+
+    Args:
+        h (np.ndarray): impulse response
+        energy (float, optional): fraction of the total energy to keep. Defaults to 1 - 1e-10 (-100 dB).
+        min_length (int, optional): never truncate below this length. Defaults to 1.
+
+    Returns:
+        np.ndarray: truncated impulse response
+    """
+    h = np.asarray(h, dtype=float)
+    cumulative = np.cumsum(h**2)
+    total = cumulative[-1] if len(cumulative) else 0.0
+    if total == 0.0:
+        return h[:min_length]
+    n = int(np.searchsorted(cumulative, energy * total)) + 1
+    return h[: min(len(h), max(n, min_length))]
+
+
+# impulse response of the worker processes, set once per worker by the pool initializer
+_worker_ir = None
+
+# shorter inputs are convolved in-process by default: starting a pool takes longer (~100 ms)
+# than convolving a few million samples
+PARALLEL_MIN_SAMPLES = 1 << 22
+
+
+def _init_worker(h: np.ndarray) -> None:
+    global _worker_ir
+    _worker_ir = h
+
+
+def _convolve_segment(segment: np.ndarray) -> np.ndarray:
+    return scipy.signal.oaconvolve(segment, _worker_ir)
+
+
+def convolve_parallel(
+    x: np.ndarray,
+    h: np.ndarray,
+    n_workers: int = None,
+    segment_length: int = None,
+) -> np.ndarray:
+    """Linear convolution y = (x * h)[:len(x)], split over a process pool by time segment.
+
+    Each worker convolves one segment of x with h (FFT overlap-add); the tails of the
+    segments are added to the start of the next ones. By default, inputs shorter than
+    PARALLEL_MIN_SAMPLES are convolved in-process, which is faster than starting a pool.
+
+    Args:
+        x (np.ndarray): input signal
+        h (np.ndarray): impulse response
+        n_workers (int, optional): worker processes; 1 runs in-process. Defaults to one per core
+            for inputs of PARALLEL_MIN_SAMPLES or more, else 1.
+        segment_length (int, optional): samples per segment. Defaults to splitting x evenly over the workers.
+
+    Returns:
+        np.ndarray: output signal, same length as x
+    """
+    x = np.asarray(x, dtype=float)
+    h = np.asarray(h, dtype=float)
+    if n_workers is None:
+        n_workers = os.cpu_count() if len(x) >= PARALLEL_MIN_SAMPLES else 1
+    if segment_length is None:
+        segment_length = max(len(h), -(-len(x) // n_workers))
+    starts = range(0, len(x), segment_length)
+    segments = [x[s : s + segment_length] for s in starts]
+
+    if n_workers == 1 or len(segments) == 1:
+        return scipy.signal.oaconvolve(x, h)[: len(x)]
+
+    y = np.zeros(len(x) + len(h) - 1)
+    with ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(h,)) as pool:
+        for start, part in zip(starts, pool.map(_convolve_segment, segments)):
+            y[start : start + len(part)] += part
+    return y[: len(x)]
+
+
+def render_linear(
+    circuit,
+    x: np.ndarray,
+    max_ir_duration: float = 1.0,
+    energy: float = 1 - 1e-10,
+    n_workers: int = None,
+    segment_length: int = None,
+    force: bool = False,
+) -> np.ndarray:
+    """Render x through a linear circuit by convolution with its impulse response.
+
+    The impulse response is simulated once per parameter set (at most max_ir_duration seconds),
+    truncated with truncate_impulse_response, and kept on the circuit for the next renders.
+    The result equals circuit.process_signal(x) up to the truncation error.
+
+    Args:
+        circuit (Circuit): a circuit whose connection tree holds only linear elements
+        x (np.ndarray): input signal
+        max_ir_duration (float, optional): length of the simulated impulse response in seconds. Defaults to 1.
+        energy (float, optional): energy fraction kept when truncating. Defaults to 1 - 1e-10.
+        n_workers (int, optional): worker processes, see convolve_parallel. Defaults to one per
+            core for long inputs.
+        segment_length (int, optional): samples per segment, see convolve_parallel.
+        force (bool, optional): skip the linearity check. Defaults to False.
+
+    Returns:
+        np.ndarray: output signal
+    """
+    if not force and not is_linear(circuit):
+        raise ValueError(f"{circuit.__class__.__name__} contains nonlinear elements, use process_signal")
+    h = linear_impulse_response(circuit, max_ir_duration, energy)
+    return convolve_parallel(x, h, n_workers, segment_length)
+
+
+def linear_impulse_response(circuit, max_ir_duration: float = 1.0, energy: float = 1 - 1e-10) -> np.ndarray:
+    """Truncated impulse response of a circuit, reused while its parameters do not change."""
+    key = (parameter_key(circuit), max_ir_duration, energy)
+    cached = circuit.__dict__.get("_linear_ir")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    h = truncate_impulse_response(circuit.get_impulse_response(max_ir_duration), energy)
+    circuit.__dict__["_linear_ir"] = (key, h)
+    return h
@@ -0,0 +1,177 @@
+import numpy as np
+
+from .control import _copy_circuit
+
+
+# component value perturbed for each element class (matched on the class and its bases)
+COMPONENT_VALUES = {
+    "Resistor": "Rp",
+    "Capacitor": "C",
+    "Inductor": "L",
+    "Diode": "Is",
+}
+
+# tolerance per element class, as for Capacitor: the value spans +-tolerance at 2 sigma
+DEFAULT_TOLERANCES = {
+    "Resistor": 0.01,
+    "Capacitor": 0.05,
+    "Inductor": 0.05,
+    "Diode": 0.2,
+}
+
+
+def component_kind(element) -> str:
+    """Key of COMPONENT_VALUES matching the element's class or one of its bases, or None."""
+    for cls in type(element).__mro__:
+        if cls.__name__ in COMPONENT_VALUES:
+            return cls.__name__
+    return None
+
+
+def thd(y: np.ndarray, fs: float, f0: float, n_harmonics: int = 10, bandwidth: int = 3) -> np.ndarray:
+    """Total harmonic distortion of a steady state sine response, along the first axis.
+
+    The power of the fundamental and of each harmonic below Nyquist is summed over
+    +-bandwidth bins of a Hann windowed spectrum.
+
+    Args:
+        y (np.ndarray): signal, shape (n_samples,) or (n_samples, n_instances)
+        fs (float): sample rate
+        f0 (float): fundamental frequency
+        n_harmonics (int, optional): highest harmonic taken into account. Defaults to 10.
+        bandwidth (int, optional): half width of the bands in bins. Defaults to 3.
+
+    Returns:
+        np.ndarray: sqrt(sum of harmonic powers / fundamental power), one value per column
+    """
+    y = np.asarray(y, dtype=float)
+    window = np.hanning(len(y)).reshape((-1,) + (1,) * (y.ndim - 1))
+    power = np.abs(np.fft.rfft(y * window, axis=0)) ** 2
+    bin_hz = fs / len(y)
+
+    def band(f):
+        k = int(round(f / bin_hz))
+        return power[max(k - bandwidth, 0) : k + bandwidth + 1].sum(axis=0)
+
+    harmonics = [band(k * f0) for k in range(2, n_harmonics + 1) if k * f0 < fs / 2 - bandwidth * bin_hz]
+    return np.sqrt(np.sum(harmonics, axis=0) / band(f0))
+
+
+class MonteCarlo:
+    '''
+    Component tolerance analysis of a circuit.
+
+    n_instances variants of the circuit are simulated at once: every resistor, capacitor,
+    inductor and diode (saturation current Is) of a copy of the circuit holds an array
+    with one normally distributed value per instance, and the waves computed through the
+    connection tree are arrays too. One pass over a signal therefore yields the response
+    of every instance.
+
+    Tolerances are looked up by element name (see Circuit.get_element_names), then the
+    element's own tolerance attribute (Capacitor) when it is non zero, then by class in
+    DEFAULT_TOLERANCES. A tolerance t draws values with standard deviation t / 2 relative
+    to the nominal value, like Capacitor does.
+
+    Set the circuit's parameters before the analysis: the ensemble is a copy, and the
+    circuit's setters cannot be used on it. Diodes of the ensemble run without lookup tables.
+
+    Args:
+        circuit (Circuit): nominal circuit, left unchanged
+        n_instances (int, optional): number of variants. Defaults to 100.
+        tolerances (dict, optional): {element name or class: tolerance}, overriding the defaults
+        seed (int, optional): seed of the random draws. Defaults to None.
+    '''
+    def __init__(self, circuit, n_instances: int = 100, tolerances: dict = None, seed: int = None) -> None:
+        self.circuit = circuit
+        self.n_instances = n_instances
+        self.tolerances = dict(DEFAULT_TOLERANCES, **(tolerances or {}))
+        self.seed = seed
+        self.ensemble = _copy_circuit(circuit)
+        # {element name: (attribute, drawn values)}
+        self.values = {}
+        self._perturb()
+
+    def tolerance(self, element, name: str, kind: str) -> float:
+        if name in self.tolerances:
+            return self.tolerances[name]
+        if getattr(element, "tolerance", 0):
+            return element.tolerance
+        return self.tolerances.get(kind, 0.0)
+
+    def _perturb(self) -> None:
+        rng = np.random.default_rng(self.seed)
+        for element, name in self.ensemble.get_element_names().items():
+            kind = component_kind(element)
+            if kind is None:
+                continue
+            if getattr(element, "table_mode", False):
+                element.set_table_mode(False)
+            attr = COMPONENT_VALUES[kind]
+            nominal = element.__dict__[attr]
+            scale = abs(nominal) * self.tolerance(element, name, kind) / 2
+            values = nominal + rng.normal(0.0, scale, self.n_instances)
+            self.values[name] = (attr, values)
+            element.__dict__[attr] = values
+            element.impedance_change()
+        self.ensemble.reset()
+
+    def instance(self, k: int):
+        """Scalar copy of the circuit with the component values of instance k."""
+        circuit = _copy_circuit(self.circuit)
+        for element, name in circuit.get_element_names().items():
+            if name in self.values:
+                attr, values = self.values[name]
+                if getattr(element, "table_mode", False):
+                    element.set_table_mode(False)
+                element.__dict__[attr] = float(values[k])
+                element.impedance_change()
+        circuit.reset()
+        return circuit
+
+    def process_signal(self, signal: np.ndarray) -> np.ndarray:
+        """Run a signal through every instance.
+
+        Returns:
+            np.ndarray: output, shape (len(signal), n_instances)
+        """
+        y = self.ensemble.process_signal(signal)
+        return np.broadcast_to(y.reshape(len(signal), -1), (len(signal), self.n_instances))
+
+    def frequency_response(self, fft_size: int = 2**13) -> tuple:
+        """Frequency responses from the first fft_size samples of the impulse responses.
+
+        Returns:
+            tuple: (frequencies in Hz, complex responses of shape (fft_size // 2 + 1, n_instances))
+        """
+        delta = np.zeros(fft_size)
+        delta[0] = 1.0
+        h = self.process_signal(delta)
+        return np.fft.rfftfreq(fft_size, 1.0 / self.ensemble.fs), np.fft.rfft(h, axis=0)
+
+    def magnitude_percentiles(self, percentiles: tuple = (5, 50, 95), fft_size: int = 2**13) -> tuple:
+        """Percentiles of the magnitude responses over the instances, in dB.
+
+        Returns:
+            tuple: (frequencies in Hz, array of shape (len(percentiles), fft_size // 2 + 1))
+        """
+        freqs, H = self.frequency_response(fft_size)
+        magnitude_db = 20 * np.log10(np.maximum(np.abs(H), 1e-12))
+        return freqs, np.percentile(magnitude_db, percentiles, axis=1)
+
+    def thd(
+        self,
+        f0: float = 1000.0,
+        amplitude: float = 1.0,
+        duration: float = 0.5,
+        settle: float = 0.1,
+        n_harmonics: int = 10,
+    ) -> np.ndarray:
+        """THD of every instance for a sine input (see thd), measured after the settling time.
+
+        Returns:
+            np.ndarray: THD ratio per instance
+        """
+        fs = self.ensemble.fs
+        t = np.arange(int((settle + duration) * fs)) / fs
+        y = self.process_signal(amplitude * np.sin(2 * np.pi * f0 * t))
+        return thd(y[int(settle * fs) :], fs, f0, n_harmonics)
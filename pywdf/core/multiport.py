@@ -0,0 +1,355 @@
+import numpy as np
+
+from .lookup import get_lookup_table_nd
+from .rtype import RTypeAdaptor
+from .solver.newton_raphson import NewtonSolver
+from .wdf import rootWDF
+
+
+# exponentials are continued linearly above this exponent, so Newton iterates far off the solution stay finite
+MAX_EXPONENT = 100.0
+
+
+def _exp(v: np.ndarray, Vt: float) -> tuple:
+    """exp(v / Vt) and its derivative in v."""
+    x = v / Vt
+    e = np.exp(np.minimum(x, MAX_EXPONENT))
+    return np.where(x > MAX_EXPONENT, e * (1.0 + x - MAX_EXPONENT), e), e / Vt
+
+
+def _limit_junction(v_old: float, v_new: float, Is: float, Vt: float) -> float:
+    """New junction voltage of a Newton iteration, kept from rising more than logarithmically (SPICE's pnjlim)."""
+    v_crit = Vt * np.log(Vt / (np.sqrt(2.0) * Is))
+    if v_new <= v_crit or abs(v_new - v_old) <= 2.0 * Vt:
+        return v_new
+    if v_old > 0:
+        arg = 1.0 + (v_new - v_old) / Vt
+        return v_old + Vt * np.log(arg) if arg > 0 else v_crit
+    return Vt * np.log(v_new / Vt)
+
+
+class DiodePort:
+    '''
+    Shockley diode i = Is * (exp(v / (n_diodes * Vt)) - 1) on one port of a MultiPortRoot,
+    v from anode to cathode.
+    '''
+    n_ports = 1
+
+    def __init__(self, Is: float = 2.52e-9, Vt: float = 25.85e-3, n_diodes: float = 1) -> None:
+        self.Is = Is
+        self.Vt = Vt * n_diodes
+
+    def current(self, v: np.ndarray) -> np.ndarray:
+        return self.Is * (_exp(v, self.Vt)[0] - 1.0)
+
+    def conductance(self, v: np.ndarray) -> np.ndarray:
+        return (self.Is * _exp(v, self.Vt)[1]).reshape(1, 1)
+
+    def limit(self, v_old: np.ndarray, v_new: np.ndarray) -> np.ndarray:
+        return np.array([_limit_junction(v_old[0], v_new[0], self.Is, self.Vt)])
+
+
+class DiodePairPort(DiodePort):
+    '''
+    Two identical antiparallel diodes on one port of a MultiPortRoot.
+    '''
+    def current(self, v: np.ndarray) -> np.ndarray:
+        return self.Is * (_exp(v, self.Vt)[0] - _exp(-v, self.Vt)[0])
+
+    def conductance(self, v: np.ndarray) -> np.ndarray:
+        return (self.Is * (_exp(v, self.Vt)[1] + _exp(-v, self.Vt)[1])).reshape(1, 1)
+
+    def limit(self, v_old: np.ndarray, v_new: np.ndarray) -> np.ndarray:
+        # the diode conducting in the direction of the new voltage
+        sign = 1.0 if v_new[0] >= 0 else -1.0
+        return np.array([sign * _limit_junction(sign * v_old[0], sign * v_new[0], self.Is, self.Vt)])
+
+
+class BJTPort:
+    '''
+    NPN bipolar transistor (Ebers-Moll transport model) on two ports of a MultiPortRoot:
+    the base-emitter port, v = Vbe, and the base-collector port, v = Vbc. Their currents
+    enter at the base and leave at the emitter and the collector.
+
+    Args:
+        Is (float): saturation current
+        Vt (float): thermal voltage
+        beta_f (float): forward current gain
+        beta_r (float): reverse current gain
+    '''
+    n_ports = 2
+
+    def __init__(self, Is: float = 1e-14, Vt: float = 25.85e-3, beta_f: float = 200.0, beta_r: float = 2.0) -> None:
+        self.Is = Is
+        self.Vt = Vt
+        self.beta_f = beta_f
+        self.beta_r = beta_r
+
+    def current(self, v: np.ndarray) -> np.ndarray:
+        e_be, e_bc = self.Is * (_exp(v, self.Vt)[0] - 1.0)
+        i_c = e_be - e_bc - e_bc / self.beta_r
+        i_b = e_be / self.beta_f + e_bc / self.beta_r
+        return np.array([i_b + i_c, -i_c])
+
+    def conductance(self, v: np.ndarray) -> np.ndarray:
+        g_be, g_bc = self.Is * _exp(v, self.Vt)[1]
+        return np.array([
+            [g_be * (1.0 + 1.0 / self.beta_f), -g_bc],
+            [-g_be, g_bc * (1.0 + 1.0 / self.beta_r)],
+        ])
+
+    def limit(self, v_old: np.ndarray, v_new: np.ndarray) -> np.ndarray:
+        return np.array([_limit_junction(old, new, self.Is, self.Vt) for old, new in zip(v_old, v_new)])
+
+
+####################################################################################
+
+
+class NonlinearRTypeAdaptor(RTypeAdaptor):
+    '''
+    R-type adaptor below a MultiPortRoot.
+
+    Its first n_up ports face the nonlinearities of the root and are not adapted (the
+    root solves the delay free loop through them), the others connect the down ports.
+    impedance_calc sets the scattering matrix and returns the resistances of the n_up
+    ports; the waves to and from the root are arrays of n_up values.
+
+    Args:
+        down_ports (list): subtrees connected below the adaptor
+        impedance_calc (Callable): impedance_calc(adaptor) -> array of the n_up port resistances
+        n_up (int): number of ports facing the root
+    '''
+    def __init__(self, down_ports: list, impedance_calc, n_up: int) -> None:
+        self.n_up = n_up
+        RTypeAdaptor.__init__(self, down_ports, impedance_calc, None)
+
+    def calc_impedance(self) -> None:
+        # n_ports and the arrays are set up here: RTypeAdaptor.__init__ only counts the down ports
+        if self.n_ports != self.n_up + len(self.down_ports):
+            self.n_ports = self.n_up + len(self.down_ports)
+            self.S_matrix = np.zeros((self.n_ports, self.n_ports))
+            self.reset()
+        self.Rp = np.asarray(self.impedance_calc(self), dtype=float)
+        self.G = 1.0 / self.Rp
+
+    def get_port_idx(self, x: int) -> int:
+        return x + self.n_up
+
+    def accept_incident_wave(self, a: np.ndarray) -> None:
+        self.a = a
+        self.a_vals[:self.n_up] = a
+        self.r_type_scatter()
+        for i in range(len(self.down_ports)):
+            self.down_ports[i].accept_incident_wave(self.b_vals[i + self.n_up])
+
+    def propagate_reflected_wave(self) -> np.ndarray:
+        for i in range(len(self.down_ports)):
+            self.a_vals[i + self.n_up] = self.down_ports[i].propagate_reflected_wave()
+        self.b = self.up_wave()
+        return self.b
+
+    def up_wave(self) -> np.ndarray:
+        # the part of the waves towards the root due to the down ports; the root adds S_uu @ a
+        return self.S_matrix[:self.n_up, self.n_up:] @ self.a_vals[self.n_up:]
+
+
+class MultiPortRoot(rootWDF):
+    '''
+    Several nonlinear elements at the root of a connection tree, on the ports of a
+    NonlinearRTypeAdaptor.
+
+    The waves b reflected by the nonlinearities and the waves a = S_uu @ b + c incident on
+    them (c from the adaptor's down ports, S_uu the block of its scattering matrix between
+    the root ports) are coupled through the adaptor, so each sample the port equations
+    i = f(v), with v = (a + b) / 2 and i = (a - b) / (2 R), are solved together for b by a
+    NewtonSolver, warm started from the previous sample. solver.iterations,
+    solver.jacobian_updates and (with record_iterations) solver.iteration_counts report its
+    work. a and b are arrays, in the order of the nonlinearities' ports. For fixed
+    parameters b only depends on c: set_table_mode replaces the solves by interpolation
+    in a precomputed table.
+
+    Args:
+        next (NonlinearRTypeAdaptor): adaptor below the root
+        nonlinearities (list): DiodePort, DiodePairPort, BJTPort, ... each on the next n_ports root ports
+        tolerance (float, optional): convergence criterion of the solver, on the waves. Defaults to 1e-9.
+        max_iterations (int, optional): iteration limit per sample. Defaults to 50.
+        reuse_jacobian (bool, optional): keep the Jacobian across iterations and samples while
+            the solver converges fast. Defaults to True.
+        record_iterations (bool, optional): keep the iteration count of every sample. Defaults to False.
+    '''
+    def __init__(
+        self,
+        next: NonlinearRTypeAdaptor,
+        nonlinearities: list,
+        tolerance: float = 1e-9,
+        max_iterations: int = 50,
+        reuse_jacobian: bool = True,
+        record_iterations: bool = False,
+    ) -> None:
+        rootWDF.__init__(self, next)
+        self.nonlinearities = nonlinearities
+        self.slices = []
+        start = 0
+        for nonlinearity in nonlinearities:
+            self.slices.append(slice(start, start + nonlinearity.n_ports))
+            start += nonlinearity.n_ports
+        if start != next.n_up:
+            raise ValueError(f"The nonlinearities have {start} ports, the adaptor {next.n_up} towards the root")
+        self.solver = NewtonSolver(tolerance, max_iterations, reuse_jacobian, record=record_iterations)
+        self.a = np.zeros(start)
+        self.b = np.zeros(start)
+        self.c = np.zeros(start)
+        self.table = None
+        self.table_mode = False
+        self.calc_impedance()
+
+    def calc_impedance(self) -> None:
+        # the port equations in b: i(b) - f(v(b)) = 0, with v and i affine in b
+        S = self.next.S_matrix[:self.next.n_up, :self.next.n_up]
+        self.Rp, self.G = self.next.Rp, self.next.G
+        identity = np.eye(len(S))
+        self.dv_db = 0.5 * (S + identity)
+        self.di_db = 0.5 * self.G[:, None] * (S - identity)
+        # b for zero port voltages, the cold start; a least squares solution, as the ports
+        # of e.g. two antiparallel diodes are not independent
+        self.b_zero = -0.5 * np.linalg.pinv(self.dv_db)
+        # orthonormal basis of the waves c the down ports can produce, the table coordinates
+        U, singular, _ = np.linalg.svd(self.next.S_matrix[:self.next.n_up, self.next.n_up:])
+        self.basis = U[:, :np.sum(singular > 1e-9 * max(singular.max(initial=0.0), 1.0))]
+        self.solver.invalidate()
+        self._update_table()
+
+    def set_table_mode(
+        self,
+        enabled: bool = True,
+        c_range: tuple = (-10.0, 10.0),
+        n_points: int = 129,
+        axes: list = None,
+    ) -> None:
+        """
+        Evaluate the reflected waves from a precomputed table of b(c) instead of a Newton
+        solve per sample, c being the incident waves due to the adaptor's down ports.
+
+        The table is indexed by the coordinates of c in self.basis, an orthonormal basis of
+        the waves the down ports can produce, which may have fewer dimensions than there
+        are ports: two diodes across the same pair of nodes need a 1-D table. Tables are
+        rebuilt (or fetched from lookup.table_nd_cache) whenever the nonlinearities or the
+        adaptor change. A table costs one solve per grid point, n_points ** dimensions of
+        them: set a cache directory with lookup.table_nd_cache.set_cache_dir to build it once.
+        See LookupTableND for accuracy figures.
+
+        Args:
+            enabled (bool, optional): use the table when True, the solver when False. Defaults to True.
+            c_range (tuple, optional): range covered along every dimension. Defaults to (-10, 10).
+            n_points (int, optional): number of table points per dimension. Defaults to 129.
+            axes (list, optional): one increasing array of points per dimension, for nonuniform
+                grids; replaces c_range and n_points. Defaults to None.
+        """
+        self.table_mode = enabled
+        self.table_range = c_range
+        self.table_points = n_points
+        self.table_axes = axes
+        self._update_table()
+
+    def _update_table(self) -> None:
+        if not self.table_mode:
+            self.table = None
+            return
+        dimensions = self.basis.shape[1]
+        axes = self.table_axes
+        if axes is None:
+            axes = [np.linspace(self.table_range[0], self.table_range[1], self.table_points)] * dimensions
+        if len(axes) != dimensions:
+            raise ValueError(f"The table has {dimensions} dimensions, got {len(axes)} axes")
+        key = (
+            self.__class__.__name__,
+            [(type(n).__name__, sorted(vars(n).items())) for n in self.nonlinearities],
+            self.next.S_matrix[:self.next.n_up, :self.next.n_up].tolist(),
+            self.Rp.tolist(),
+            self.basis.tolist(),
+        )
+        self.table = get_lookup_table_nd(key, self._solve_coordinates, axes)
+
+    def _solve_coordinates(self, u: np.ndarray) -> np.ndarray:
+        return self._solve_block(np.asarray(u, dtype=float) @ self.basis.T)
+
+    def _solve_block(self, c: np.ndarray) -> np.ndarray:
+        # one solve per row of c, each warm started from the previous one, with a solver
+        # of its own so the state of the root is left as it was
+        solver = NewtonSolver(self.solver.tolerance, self.solver.max_iterations, self.solver.reuse_jacobian)
+        saved = self.c
+        b = np.zeros(len(self.b))
+        out = np.empty((len(c), len(b)))
+        try:
+            for k, self.c in enumerate(c):
+                if not b.any():
+                    b = self.b_zero @ self.c
+                b = out[k] = solver.solve(self.residual, self.jacobian, b, self.limit)
+        finally:
+            self.c = saved
+        return out
+
+    def reflect_block(self, c: np.ndarray) -> np.ndarray:
+        """
+        Reflected waves for a block of incident waves, without touching the element state.
+
+        Args:
+            c (np.ndarray): incident waves due to the down ports, one row of n_ports values per sample
+
+        Returns:
+            np.ndarray: reflected waves, one row per sample
+        """
+        c = np.asarray(c, dtype=float).reshape(-1, len(self.b))
+        if self.table is not None:
+            return self.table.evaluate(c @ self.basis)
+        return self._solve_block(c)
+
+    def reset(self) -> None:
+        self.a = np.zeros_like(self.a)
+        self.b = np.zeros_like(self.b)
+        self.c = np.zeros_like(self.c)
+        self.solver.invalidate()
+
+    def _voltages(self, b: np.ndarray) -> np.ndarray:
+        return self.dv_db @ b + 0.5 * self.c
+
+    def residual(self, b: np.ndarray) -> np.ndarray:
+        v = self._voltages(b)
+        i = self.di_db @ b + 0.5 * self.G * self.c
+        for nonlinearity, ports in zip(self.nonlinearities, self.slices):
+            i[ports] -= nonlinearity.current(v[ports])
+        return i
+
+    def jacobian(self, b: np.ndarray) -> np.ndarray:
+        v = self._voltages(b)
+        g = np.zeros((len(v), len(v)))
+        for nonlinearity, ports in zip(self.nonlinearities, self.slices):
+            g[ports, ports] = nonlinearity.conductance(v[ports])
+        return self.di_db - g @ self.dv_db
+
+    def limit(self, b: np.ndarray, step: np.ndarray) -> np.ndarray:
+        """Newton step shortened so that no junction voltage rises too far at once."""
+        v_old = self._voltages(b)
+        v_new = v_old - self.dv_db @ step
+        scale = 1.0
+        for nonlinearity, ports in zip(self.nonlinearities, self.slices):
+            limited = nonlinearity.limit(v_old[ports], v_new[ports])
+            for old, new, kept in zip(v_old[ports], v_new[ports], limited):
+                if kept != new:
+                    scale = min(scale, (kept - old) / (new - old))
+        return step * max(scale, 1e-6) if scale < 1.0 else step
+
+    def accept_incident_wave(self, a: np.ndarray) -> None:
+        # the down ports' part of the incident waves, see NonlinearRTypeAdaptor.up_wave
+        self.c = a
+
+    def propagate_reflected_wave(self) -> np.ndarray:
+        if self.table is not None:
+            self.b = self.table(self.c @ self.basis)
+        else:
+            if not self.b.any():
+                # cold start, e.g. after reset: from zero port voltages rather than matched ports
+                self.b = self.b_zero @ self.c
+            self.b = self.solver.solve(self.residual, self.jacobian, self.b, self.limit)
+        self.a = self.next.S_matrix[:self.next.n_up, :self.next.n_up] @ self.b + self.c
+        return self.b
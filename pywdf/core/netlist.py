@@ -0,0 +1,562 @@
+import hashlib
+import itertools
+
+import numpy as np
+
+from .circuit import Circuit
+from .multiport import DiodePairPort, DiodePort, MultiPortRoot, NonlinearRTypeAdaptor
+from .rtype import RTypeAdaptor
+from .wdf import (
+    Capacitor,
+    Diode,
+    DiodePair,
+    IdealCurrentSource,
+    IdealVoltageSource,
+    Inductor,
+    ParallelAdaptor,
+    ParallelAdaptorN,
+    PolarityInverter,
+    Resistor,
+    ResistiveCurrentSource,
+    ResistiveVoltageSource,
+    SeriesAdaptor,
+    SeriesAdaptorN,
+)
+
+
+# component kinds, from the first letter of their (SPICE style) name
+KINDS = ("R", "C", "L", "V", "I", "D")
+
+# kinds of the input source
+INPUTS = ("V", "I")
+
+# kinds whose voltage changes sign when the terminals are swapped
+POLAR = ("V", "I", "D")
+
+DIODE_IS = 2.52e-9
+DIODE_VT = 25.85e-3
+
+
+class Component:
+    '''
+    A two terminal component of a Netlist.
+
+    Args:
+        name (str): name, starting with the letter of its kind (R, C, L, V, I or D)
+        n_plus (str): positive node (anode of a diode); a current source drives its
+            current from n_plus through itself to n_minus, as in SPICE
+        n_minus (str): negative node
+        value (float): resistance, capacitance, inductance or saturation current of a diode;
+            unused for the input source
+        params (dict): further parameters, e.g. Vt and n_diodes of a diode
+    '''
+    def __init__(self, name: str, n_plus: str, n_minus: str, value: float = None, **params) -> None:
+        self.name = name
+        self.kind = name[0].upper()
+        if self.kind not in KINDS:
+            raise ValueError(f"Unsupported component {name}, kinds are {', '.join(KINDS)}")
+        self.nodes = (str(n_plus), str(n_minus))
+        self.value = value
+        self.params = params
+
+    def __repr__(self) -> str:
+        return f"Component({self.name!r}, {self.nodes[0]!r}, {self.nodes[1]!r}, {self.value!r})"
+
+
+class Netlist:
+    '''
+    Components connected between named nodes.
+
+    A netlist describes the circuit, NetlistCircuit chooses the connection tree:
+    its one nonlinearity (a diode, or two antiparallel diodes) or else its input
+    source as the root, and series, parallel and R-type adaptors below it.
+    '''
+    def __init__(self, components: list = None) -> None:
+        self.components = list(components or [])
+
+    def add(self, name: str, n_plus: str, n_minus: str, value: float = None, **params) -> Component:
+        """Add a component (see Component) and return it."""
+        if any(c.name == name for c in self.components):
+            raise ValueError(f"Duplicate component name {name}")
+        component = Component(name, n_plus, n_minus, value, **params)
+        self.components.append(component)
+        return component
+
+    def __getitem__(self, name: str) -> Component:
+        for component in self.components:
+            if component.name == name:
+                return component
+        raise KeyError(name)
+
+
+####################################################################################
+
+
+# Decomposition of the circuit graph. An edge is a list [u, v, item], where item is a
+# Component or one of the nodes below, spanning the nodes u and v.
+
+
+class _Series:
+    # items connected in a chain through nodes[0], nodes[1], ..., nodes[-1]
+    def __init__(self, nodes: list, items: list) -> None:
+        self.nodes = nodes
+        self.items = items
+
+
+class _Parallel:
+    def __init__(self, items: list) -> None:
+        self.items = items
+
+
+class _RType:
+    # edges that reduce neither to series nor parallel connections, between the port nodes ends
+    def __init__(self, edges: list, ends: tuple) -> None:
+        self.edges = edges
+        self.ends = ends
+
+
+def _chain(edge, start):
+    """Nodes and items of an edge as a chain beginning at node start."""
+    u, v, item = edge
+    if isinstance(item, _Series):
+        nodes, items = item.nodes, item.items
+    else:
+        nodes, items = [u, v], [item]
+    if nodes[0] != start:
+        nodes, items = nodes[::-1], items[::-1]
+    return nodes, items
+
+
+def _merge_parallel(edges: list) -> bool:
+    pairs = {}
+    for edge in edges:
+        pairs.setdefault(frozenset(edge[:2]), []).append(edge)
+    for group in pairs.values():
+        if len(group) > 1:
+            items = []
+            for _, _, item in group:
+                items += item.items if isinstance(item, _Parallel) else [item]
+            for edge in group[1:]:
+                edges.remove(edge)
+            group[0][2] = _Parallel(items)
+            return True
+    return False
+
+
+def _merge_series(edges: list, ends: tuple) -> bool:
+    incident = {}
+    for edge in edges:
+        for node in edge[:2]:
+            incident.setdefault(node, []).append(edge)
+    for node, group in incident.items():
+        if node in ends:
+            continue
+        if len(group) == 1:
+            raise ValueError(f"{_names(group[0][2])} is not part of a closed loop")
+        if len(group) == 2 and group[0] is not group[1]:
+            first, second = group
+            x = first[0] if first[1] == node else first[1]
+            nodes1, items1 = _chain(first, x)
+            nodes2, items2 = _chain(second, node)
+            edges.remove(second)
+            first[:] = [x, nodes2[-1], _Series(nodes1 + nodes2[1:], items1 + items2)]
+            return True
+    return False
+
+
+def _split(edges: list, ends: tuple) -> bool:
+    """Cut off a part of the graph attached at two nodes only, as one edge between them."""
+    nodes = sorted({node for edge in edges for node in edge[:2]})
+    for a, b in itertools.combinations(nodes, 2):
+        # classes of edges connected through nodes other than a and b; -1 is the port above
+        group = {i: i for i in range(-1, len(edges))}
+
+        def find(i):
+            while group[i] != i:
+                i = group[i]
+            return i
+
+        def union(i, j):
+            group[find(i)] = find(j)
+
+        incident = {}
+        for i, edge in enumerate(edges):
+            for node in edge[:2]:
+                incident.setdefault(node, []).append(i)
+        for node in ends:
+            incident.setdefault(node, []).append(-1)
+        for node, members in incident.items():
+            if node not in (a, b):
+                for i in members[1:]:
+                    union(members[0], i)
+        classes = {}
+        for i in range(len(edges)):
+            classes.setdefault(find(i), []).append(i)
+        for root, members in classes.items():
+            if root == find(-1) or len(members) < 2 or len(members) == len(edges):
+                continue
+            part = [edges[i] for i in members]
+            touched = {node for edge in part for node in edge[:2]}
+            if not {a, b} <= touched:
+                raise ValueError(f"{_names(part)} are attached to the rest of the circuit at a single node")
+            for edge in part:
+                edges.remove(edge)
+            edges.append([a, b, _decompose(part, (a, b))])
+            return True
+    return False
+
+
+def _decompose(edges: list, ends: tuple):
+    """Item made of the edges, seen from a port between the nodes ends."""
+    edges = [list(edge) for edge in edges]
+    while True:
+        if _merge_parallel(edges) or _merge_series(edges, ends):
+            continue
+        if len(edges) == 1 and set(edges[0][:2]) == set(ends):
+            return edges[0][2]
+        if not set(ends) <= {node for edge in edges for node in edge[:2]}:
+            raise ValueError(f"Nodes {ends[0]} and {ends[1]} are not connected")
+        if not _split(edges, ends):
+            return _RType(edges, ends)
+
+
+def _reduce(edges: list, ends: tuple) -> list:
+    """Edges left once series, parallel and separation pair reductions are done, seen from the nodes ends."""
+    edges = [list(edge) for edge in edges]
+    while _merge_parallel(edges) or _merge_series(edges, ends) or _split(edges, ends):
+        pass
+    return edges
+
+
+def _names(item) -> str:
+    if isinstance(item, list):
+        return ", ".join(_names(edge[2]) for edge in item)
+    if isinstance(item, Component):
+        return item.name
+    if isinstance(item, _RType):
+        return _names(item.edges)
+    return ", ".join(_names(i) for i in item.items)
+
+
+def topology_key(netlist: Netlist, output: str) -> str:
+    """Content hash of the structure of a netlist: names, kinds and nodes of its components
+    and the diode parameters, which decide how diodes pair; not the other values."""
+    h = hashlib.sha1(f"output={output}".encode())
+    for component in netlist.components:
+        h.update(f";{component.name} {component.nodes[0]} {component.nodes[1]}".encode())
+        if component.kind == "D":
+            h.update(repr(_diode_model(component)).encode())
+    return h.hexdigest()
+
+
+def _diode_model(diode: Component) -> tuple:
+    return diode.value, sorted(diode.params.items())
+
+
+class Decomposition:
+    '''
+    Structure of the connection tree of a netlist, without component values.
+
+    The root is the netlist's nonlinearity or else its input source, and the rest of the
+    circuit graph, seen from the root's terminals, is reduced into series, parallel and
+    R-type connections. With several nonlinearities (diodes, identical antiparallel
+    diodes counting as one) the root is a MultiPortRoot: the graph is reduced as seen
+    from all their terminals, and what is left are the ports of its NonlinearRTypeAdaptor.
+    Only names and nodes are kept, so a decomposition can be pickled and reused by every
+    netlist with the same topology_key (see spice.decomposition_cache).
+
+    Args:
+        netlist (Netlist): the circuit, with exactly one voltage or current source (the input)
+        output (str): name of the output component, which is never merged into the source
+    '''
+    def __init__(self, netlist: Netlist, output: str) -> None:
+        self.key = topology_key(netlist, output)
+        components = [Component(c.name, *c.nodes) for c in netlist.components]
+        sources = [c for c in components if c.kind in INPUTS]
+        if len(sources) != 1:
+            raise ValueError("The netlist needs exactly one voltage or current source, the input")
+        source = sources[0]
+        self.source = source.name
+        # resistor merged into the source, when the input is below the root
+        self.source_resistor = None
+        models = {c.name: _diode_model(c) for c in netlist.components if c.kind == "D"}
+        edges, nonlinearities = self._circuit_graph(components, models)
+        # (diode, second diode of a pair or None) of each nonlinearity
+        self.nonlinearities = [(diode.name, pair and pair.name) for diode, pair in nonlinearities]
+        if not nonlinearities:
+            edges = [edge for edge in edges if edge[2] is not source]
+            self.ends = source.nodes
+            self.tree = _decompose(edges, self.ends)
+            return
+        diodes = [diode for diode, _ in nonlinearities]
+        if len(diodes) == 1:
+            self.ends = diodes[0].nodes
+        else:
+            self.ends = tuple(sorted({node for diode in diodes for node in diode.nodes}))
+        self._merge_source_resistor(edges, source, self.ends, output)
+        edges = [edge for edge in edges if edge[2] not in diodes]
+        if len(diodes) == 1:
+            self.tree = _decompose(edges, self.ends)
+        else:
+            # the down ports of the root's R-type adaptor
+            self.tree = _reduce(edges, self.ends)
+
+    @staticmethod
+    def _circuit_graph(components: list, models: dict) -> tuple:
+        """Edges of the components and the nonlinearities: (diode, second diode of a pair or None)."""
+        others, diodes = [], []
+        for component in components:
+            if component.nodes[0] == component.nodes[1]:
+                raise ValueError(f"Both terminals of {component.name} are connected to node {component.nodes[0]}")
+            (diodes if component.kind == "D" else others).append(component)
+
+        nonlinearities = []
+        while diodes:
+            diode = diodes.pop(0)
+            # identical antiparallel diodes: one DiodePair
+            pairs = [d for d in diodes if d.nodes == diode.nodes[::-1] and models[d.name] == models[diode.name]]
+            if pairs:
+                diodes.remove(pairs[0])
+            nonlinearities.append((diode, pairs[0] if pairs else None))
+        edges = [[*c.nodes, c] for c in others]
+        edges += [[*diode.nodes, diode] for diode, _ in nonlinearities]
+        return edges, nonlinearities
+
+    def _merge_source_resistor(self, edges: list, source: Component, ends: tuple, output: str) -> None:
+        # a source below the root must be adapted: a voltage source by a resistor in
+        # series with it, a current source by a resistor in parallel
+        if source.kind == "I":
+            for edge in edges:
+                resistor = edge[2]
+                if resistor.kind == "R" and resistor.name != output and set(resistor.nodes) == set(source.nodes):
+                    edges.remove(edge)
+                    self.source_resistor = resistor.name
+                    return
+            raise ValueError(f"Current source {source.name} needs a resistor in parallel to be adapted")
+
+        incident = {}
+        for edge in edges:
+            for node in edge[:2]:
+                incident.setdefault(node, []).append(edge)
+        for node in source.nodes:
+            if node in ends or len(incident[node]) != 2:
+                continue
+            other = [e for e in incident[node] if e[2] is not source][0]
+            resistor = other[2]
+            if resistor.kind != "R" or resistor.name == output:
+                continue
+            far = other[0] if other[1] == node else other[1]
+            if node == source.nodes[1]:
+                nodes = (source.nodes[0], far)
+            else:
+                nodes = (far, source.nodes[1])
+            edges.remove(other)
+            edges[[e[2] is source for e in edges].index(True)] = [*nodes, Component(source.name, *nodes)]
+            self.source_resistor = resistor.name
+            return
+        raise ValueError(f"Voltage source {source.name} needs a resistor in series to be adapted")
+
+
+####################################################################################
+
+
+class RTypeImpedance:
+    '''
+    Scattering matrix of an R-type adaptor from the graph of its ports.
+
+    S = 2 A^T (A G A^T)^-1 A G - I, with A the reduced incidence matrix of the ports
+    (oriented as they are connected, up ports first) and G their port conductances.
+    A single up port is adapted to the resistance seen between its nodes. The several up
+    ports of a NonlinearRTypeAdaptor cannot all be adapted: each gets the resistance it
+    sees with the other up ports at the mean down port conductance. Port impedances may
+    be arrays, one value per Monte Carlo instance (single up port only).
+
+    Args:
+        up_ports (list): (positive, negative) nodes of each up port
+        ports (list): (positive, negative) nodes of each down port
+    '''
+    def __init__(self, up_ports: list, ports: list) -> None:
+        ground = up_ports[0][1]
+        nodes = sorted({node for port in list(up_ports) + list(ports) for node in port} - {ground})
+        index = {node: i for i, node in enumerate(nodes)}
+        self.n_up = len(up_ports)
+        self.A = np.zeros((len(nodes), self.n_up + len(ports)))
+        for j, (u, v) in enumerate(list(up_ports) + list(ports)):
+            if u in index:
+                self.A[index[u], j] += 1.0
+            if v in index:
+                self.A[index[v], j] -= 1.0
+
+    def _resistance_seen(self, k: int, G: np.ndarray) -> np.ndarray:
+        """Resistance between the nodes of port k through the other ports, of conductances G (ports last)."""
+        others = np.arange(self.A.shape[1]) != k
+        L = np.einsum("ie,...e,je->...ij", self.A[:, others], G[..., others], self.A[:, others])
+        port = np.broadcast_to(self.A[:, k, None], L.shape[:-1] + (1,))
+        try:
+            return (port * np.linalg.solve(L, port)).sum(axis=(-2, -1))
+        except np.linalg.LinAlgError:
+            raise ValueError(f"Port {k} of the R-type adaptor is not part of a closed loop") from None
+
+    def __call__(self, R: RTypeAdaptor):
+        # lanes (Monte Carlo instances) first, ports last
+        G_down = np.stack(np.broadcast_arrays(*(1.0 / np.asarray(Rp, dtype=float) for Rp in R.get_port_impedances())), -1)
+        G = np.concatenate([np.broadcast_to(np.mean(G_down, axis=-1, keepdims=True), G_down.shape[:-1] + (self.n_up,)), G_down], -1)
+        R_up = np.stack([self._resistance_seen(k, G) for k in range(self.n_up)], -1)
+        G[..., :self.n_up] = 1.0 / R_up
+
+        L = np.einsum("ie,...e,je->...ij", self.A, G, self.A)
+        AG = self.A * G[..., None, :]
+        S = 2 * np.swapaxes(self.A, -1, -2) @ np.linalg.solve(L, AG) - np.eye(self.A.shape[1])
+        R.set_S_matrix(np.moveaxis(S, (-2, -1), (0, 1)))
+        if self.n_up > 1:
+            return R_up
+        return float(R_up[..., 0]) if R_up.ndim == 1 else R_up[..., 0]
+
+
+class NetlistCircuit(Circuit):
+    '''
+    Circuit built from a Netlist.
+
+    The connection tree is derived from the circuit graph (see Decomposition): series and
+    parallel connections are reduced into (N-port) series and parallel adaptors, the parts
+    left are split at pairs of nodes into the smallest possible R-type adaptors, whose
+    scattering matrices are computed numerically (see RTypeImpedance). The root is the
+    circuit's nonlinearity, a diode or two antiparallel diodes, if it has one; its input
+    source must then be adapted, a voltage source by a resistor in series with it
+    (ResistiveVoltageSource) and a current source by one in parallel (ResistiveCurrentSource).
+    Without nonlinearity the input source is the root.
+
+    Each component is an attribute of the circuit, named as in the netlist (a resistor
+    merged into the input source is part of that source). Elements connected with the
+    opposite polarity are read with the sign in self.polarities, so the output is the
+    voltage across the output component from its positive to its negative node.
+
+    Args:
+        netlist (Netlist): the circuit, with exactly one voltage or current source (the input)
+        fs (int): sample rate
+        output (str): name of the component whose voltage is the output
+        decomposition (Decomposition, optional): structure of the netlist, e.g. from a cache.
+            Defaults to None, decomposing the netlist.
+    '''
+    def __init__(self, netlist: Netlist, fs: int, output: str, decomposition: "Decomposition" = None) -> None:
+        if decomposition is None:
+            decomposition = Decomposition(netlist, output)
+        elif decomposition.key != topology_key(netlist, output):
+            raise ValueError("The decomposition belongs to a netlist of another topology")
+        self.fs = fs
+        self.netlist = netlist
+        self.decomposition = decomposition
+        # netlist voltage of each element = polarity * its wave_to_voltage()
+        self.polarities = {}
+        self._elements = {}
+        self._components = {c.name: c for c in netlist.components}
+
+        source = self._components[decomposition.source]
+        self.current_input = source.kind == "I"
+        # resistance of the adapted input source, when it is below the root
+        self._source_resistance = None
+        if decomposition.source_resistor is not None:
+            self._source_resistance = self._components[decomposition.source_resistor].value
+        nonlinearities = decomposition.nonlinearities
+        if len(nonlinearities) > 1:
+            root = self._multi_port_root(nonlinearities, decomposition.tree)
+        else:
+            tree = self._build(decomposition.tree, decomposition.ends)
+            if nonlinearities:
+                root = self._nonlinearity(*nonlinearities[0], tree)
+            else:
+                root = IdealCurrentSource(tree) if self.current_input else IdealVoltageSource(tree)
+                self._add(source, root, 1)
+        for name, element in self._elements.items():
+            setattr(self, name, element)
+        if output not in self._elements:
+            raise ValueError(f"Unknown output component {output}")
+        if self.polarities[output] is None:
+            raise ValueError(f"{output} is one of the ports of the MultiPortRoot, read its voltage from root.a and root.b")
+        self.output_polarity = self.polarities[output]
+        super().__init__(self._elements[source.name], root, self._elements[output])
+
+    def _add(self, component: Component, element, polarity: int) -> None:
+        self._elements[component.name] = element
+        self.polarities[component.name] = polarity
+
+    def _leaf(self, component: Component, orientation: tuple):
+        # the structure holds the nodes, the netlist the values
+        kind, value = component.kind, self._components[component.name].value
+        polarity = 1 if orientation == component.nodes else -1
+        if kind == "R":
+            element = Resistor(value)
+        elif kind == "C":
+            element = Capacitor(value, self.fs)
+        elif kind == "L":
+            element = Inductor(value, self.fs)
+        elif kind == "I":
+            element = ResistiveCurrentSource(Rval=self._source_resistance)
+        else:
+            element = ResistiveVoltageSource(Rval=self._source_resistance)
+        self._add(component, element, polarity)
+        if kind in POLAR and polarity < 0:
+            self.polarities[component.name] = 1
+            return PolarityInverter(element)
+        return element
+
+    def _build(self, item, orientation: tuple):
+        """Connection tree of an item, with port voltage V(orientation[0]) - V(orientation[1])."""
+        if isinstance(item, Component):
+            return self._leaf(item, orientation)
+        if isinstance(item, _Parallel):
+            children = [self._build(child, orientation) for child in item.items]
+            return ParallelAdaptor(*children) if len(children) == 2 else ParallelAdaptorN(children)
+        if isinstance(item, _Series):
+            # the port voltage of a series adaptor is minus the sum along the chain
+            nodes, items = item.nodes, item.items
+            if orientation != (nodes[-1], nodes[0]):
+                nodes, items = nodes[::-1], items[::-1]
+            children = [self._build(child, (nodes[i], nodes[i + 1])) for i, child in enumerate(items)]
+            return SeriesAdaptor(*children) if len(children) == 2 else SeriesAdaptorN(children)
+        ports = [tuple(edge[:2]) for edge in item.edges]
+        children = [self._build(edge[2], port) for edge, port in zip(item.edges, ports)]
+        return RTypeAdaptor(children, RTypeImpedance([orientation], ports), 0)
+
+    def _diode_params(self, name: str) -> tuple:
+        diode = self._components[name]
+        Is = diode.value if diode.value is not None else DIODE_IS
+        return Is, diode.params.get("Vt", DIODE_VT), diode.params.get("n_diodes", 1)
+
+    def _nonlinearity(self, name: str, pair: str, tree):
+        diode = self._components[name]
+        Is, Vt, n_diodes = self._diode_params(name)
+        if pair is not None:
+            root = DiodePair(tree, Is, Vt, n_diodes=n_diodes)
+            self._add(self._components[pair], root, -1)
+        else:
+            root = Diode(tree, Is, Vt, n_diodes=n_diodes)
+        self._add(diode, root, 1)
+        return root
+
+    def _multi_port_root(self, nonlinearities: list, edges: list):
+        ports = [tuple(edge[:2]) for edge in edges]
+        children = [self._build(edge[2], port) for edge, port in zip(edges, ports)]
+        up_ports, models = [], []
+        for name, pair in nonlinearities:
+            up_ports.append(self._components[name].nodes)
+            models.append((DiodePort if pair is None else DiodePairPort)(*self._diode_params(name)))
+        adaptor = NonlinearRTypeAdaptor(children, RTypeImpedance(up_ports, ports), len(up_ports))
+        root = MultiPortRoot(adaptor, models)
+        # the diodes are ports of the root, which has no single voltage
+        for name, pair in nonlinearities:
+            for diode in (name, pair):
+                if diode is not None:
+                    self._add(self._components[diode], root, None)
+        return root
+
+    def set_input(self, sample: float) -> None:
+        if self.current_input:
+            # the netlist current flows through the source from n_plus to n_minus,
+            # the element drives its current out of its positive terminal
+            self.source.set_current(-sample)
+        else:
+            self.source.set_voltage(sample)
+
+    def process_sample(self, sample: float) -> float:
+        return self.output_polarity * super().process_sample(sample)
@@ -0,0 +1,189 @@
+import time
+from collections import defaultdict
+
+
+# element methods instrumented by the profiler, when the element defines them
+PROFILED_METHODS = (
+    "propagate_reflected_wave",
+    "accept_incident_wave",
+    "impedance_change",
+    "calc_impedance",
+    "set_S_matrix",
+    "r_type_scatter",
+    "compute",
+)
+
+
+class MethodStats:
+    '''
+    Call count and timings of one method of one element.
+    total_time includes the time spent in the elements called from it, self_time does not.
+    '''
+    __slots__ = ("calls", "total_time", "self_time")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_time = 0.0
+        self.self_time = 0.0
+
+
+class CircuitProfiler:
+    '''
+    Opt-in instrumentation of a circuit's connection tree.
+
+    While enabled, the methods listed in PROFILED_METHODS are shadowed on every element
+    instance by timing wrappers. Disabling the profiler deletes the wrappers again, so the
+    elements fall back to their class methods and a circuit that is not being profiled
+    runs exactly the same code as before.
+    '''
+    def __init__(self, circuit) -> None:
+        self.circuit = circuit
+        self.enabled = False
+        self.names = {}
+        self.stats = defaultdict(MethodStats)
+        self.folded = defaultdict(float)
+        self._stack = []
+        self._wrapped = []
+
+    def enable(self) -> None:
+        """Instrument every element currently in the circuit's connection tree."""
+        if self.enabled:
+            return
+        self.names = self.circuit.get_element_names()
+        for element, name in self.names.items():
+            for method in PROFILED_METHODS:
+                fn = getattr(element, method, None)
+                if fn is None or method in element.__dict__:
+                    continue
+                setattr(element, method, self._wrap(fn, name, type(element).__name__, method))
+                self._wrapped.append((element, method))
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Remove all wrappers, restoring the uninstrumented methods."""
+        for element, method in self._wrapped:
+            element.__dict__.pop(method, None)
+        self._wrapped = []
+        self._stack = []
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Clear the collected statistics."""
+        self.stats.clear()
+        self.folded.clear()
+
+    def _wrap(self, fn, name: str, class_name: str, method: str):
+        key = (name, class_name, method)
+        stats = self.stats
+        folded = self.folded
+        stack = self._stack
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            # each frame holds [frame label, time spent in callees]
+            frame = [f"{name}.{method}", 0.0]
+            stack.append(frame)
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                stack.pop()
+                own = elapsed - frame[1]
+                if stack:
+                    stack[-1][1] += elapsed
+                s = stats[key]
+                s.calls += 1
+                s.total_time += elapsed
+                s.self_time += own
+                folded[";".join([f[0] for f in stack] + [frame[0]])] += own
+
+        return wrapper
+
+    def by_element(self) -> list:
+        """Statistics aggregated per element (summed over all of its methods).
+
+        Returns:
+            list: dicts with name, class, calls per method, total and self time, sorted by self time
+        """
+        rows = {}
+        for (name, class_name, method), s in self.stats.items():
+            row = rows.setdefault(
+                name, {"name": name, "class": class_name, "calls": {}, "self_time": 0.0}
+            )
+            row["calls"][method] = s.calls
+            row["self_time"] += s.self_time
+        return sorted(rows.values(), key=lambda r: r["self_time"], reverse=True)
+
+    def by_class(self) -> list:
+        """Statistics aggregated per element class.
+
+        Returns:
+            list: dicts with class, number of elements, calls per method and self time, sorted by self time
+        """
+        rows = {}
+        for row in self.by_element():
+            agg = rows.setdefault(
+                row["class"], {"class": row["class"], "elements": 0, "calls": {}, "self_time": 0.0}
+            )
+            agg["elements"] += 1
+            agg["self_time"] += row["self_time"]
+            for method, calls in row["calls"].items():
+                agg["calls"][method] = agg["calls"].get(method, 0) + calls
+        return sorted(rows.values(), key=lambda r: r["self_time"], reverse=True)
+
+    def count(self, method: str, name: str = None) -> int:
+        """Number of calls to method, for one element or summed over all elements."""
+        return sum(
+            s.calls
+            for (n, _, m), s in self.stats.items()
+            if m == method and (name is None or n == name)
+        )
+
+    def report(self, group: str = "element") -> str:
+        """Format the statistics as a text table.
+
+        Args:
+            group (str, optional): 'element' or 'class'. Defaults to 'element'.
+
+        Returns:
+            str: table with one line per element (or class)
+        """
+        if group not in ("element", "class"):
+            raise ValueError(f"Unknown group '{group}', use 'element' or 'class'")
+        rows = self.by_element() if group == "element" else self.by_class()
+        total = sum(r["self_time"] for r in rows) or 1.0
+        header = (
+            f"{'name' if group == 'element' else 'class':<24}"
+            f"{'class' if group == 'element' else 'elements':>22}"
+            f"{'propagate':>11}{'accept':>10}{'Z change':>10}{'S matrix':>10}"
+            f"{'self [ms]':>12}{'%':>7}"
+        )
+        lines = [header, "-" * len(header)]
+        for r in rows:
+            calls = r["calls"]
+            lines.append(
+                f"{r['name'] if group == 'element' else r['class']:<24}"
+                f"{r['class'] if group == 'element' else r['elements']:>22}"
+                f"{calls.get('propagate_reflected_wave', 0):>11}"
+                f"{calls.get('accept_incident_wave', 0):>10}"
+                f"{calls.get('impedance_change', 0):>10}"
+                f"{calls.get('set_S_matrix', 0):>10}"
+                f"{r['self_time'] * 1e3:>12.3f}"
+                f"{100 * r['self_time'] / total:>7.1f}"
+            )
+        return "\n".join(lines)
+
+    def folded_stacks(self) -> str:
+        """Self time per call stack in the 'folded' format read by flamegraph.pl and speedscope.
+
+        Returns:
+            str: one 'frame;frame;frame <microseconds>' line per distinct call stack
+        """
+        return "\n".join(
+            f"{stack} {int(round(t * 1e6))}" for stack, t in sorted(self.folded.items())
+        )
+
+    def save_folded_stacks(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self.folded_stacks() + "\n")
@@ -0,0 +1,295 @@
+import time
+from collections import deque
+from typing import Callable
+
+import numpy as np
+from scipy.io import wavfile
+
+
+class RingBuffer:
+    '''
+    Single-producer / single-consumer ring buffer of samples backed by a preallocated array.
+
+    The producer only advances the write position and the consumer only advances the read
+    position, so one thread may write while another reads without locking.
+    Neither read_into nor write allocate memory.
+    '''
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("RingBuffer capacity must be at least 1")
+        self.capacity = capacity
+        self.data = np.zeros(capacity)
+        self.write_pos = 0
+        self.read_pos = 0
+
+    def available_read(self) -> int:
+        return self.write_pos - self.read_pos
+
+    def available_write(self) -> int:
+        return self.capacity - (self.write_pos - self.read_pos)
+
+    def write(self, samples: np.ndarray) -> int:
+        """Append samples, dropping those that do not fit.
+
+        Returns:
+            int: number of samples written
+        """
+        n = min(len(samples), self.available_write())
+        start = self.write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[start : start + first] = samples[:first]
+        self.data[: n - first] = samples[first:n]
+        self.write_pos += n
+        return n
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Fill out with the oldest samples, zero filling whatever is not available.
+
+        Returns:
+            int: number of samples read
+        """
+        n = min(len(out), self.available_read())
+        start = self.read_pos % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self.data[start : start + first]
+        out[first:n] = self.data[: n - first]
+        out[n:] = 0.0
+        self.read_pos += n
+        return n
+
+    def clear(self) -> None:
+        self.read_pos = self.write_pos
+
+
+class ParameterQueue:
+    '''
+    Queue of pending parameter changes, filled by control threads and drained by the audio thread.
+    deque.append and deque.popleft are atomic, so no lock is taken on either side.
+    '''
+    def __init__(self) -> None:
+        self._queue = deque()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def push(self, setter: Callable, *args) -> None:
+        self._queue.append((setter, args))
+
+    def apply_pending(self) -> int:
+        """Call every queued setter in order.
+
+        Returns:
+            int: number of changes applied
+        """
+        n = 0
+        while self._queue:
+            setter, args = self._queue.popleft()
+            setter(*args)
+            n += 1
+        return n
+
+
+class CallbackStats:
+    '''
+    Durations of the most recent audio callbacks, measured against the callback deadline.
+    '''
+    def __init__(self, history: int = 4096) -> None:
+        self.durations = np.zeros(history)
+        self.reset()
+
+    def reset(self) -> None:
+        self.durations[:] = 0.0
+        self.callbacks = 0
+        self.xruns = 0
+        self.underruns = 0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+
+    def record(self, duration: float, deadline: float) -> None:
+        self.durations[self.callbacks % len(self.durations)] = duration
+        self.callbacks += 1
+        self.total_duration += duration
+        if duration > self.max_duration:
+            self.max_duration = duration
+        if duration > deadline:
+            self.xruns += 1
+
+    def summary(self, deadline: float) -> dict:
+        """Callback statistics, durations in milliseconds.
+
+        Returns:
+            dict: callbacks, xruns, underruns, mean / p99 / max duration, deadline and mean load
+        """
+        recent = self.durations[: min(self.callbacks, len(self.durations))]
+        mean = self.total_duration / self.callbacks if self.callbacks else 0.0
+        return {
+            "callbacks": self.callbacks,
+            "xruns": self.xruns,
+            "underruns": self.underruns,
+            "mean_ms": mean * 1e3,
+            "p99_ms": float(np.percentile(recent, 99)) * 1e3 if len(recent) else 0.0,
+            "max_ms": self.max_duration * 1e3,
+            "deadline_ms": deadline * 1e3,
+            "load": mean / deadline if deadline > 0 else 0.0,
+        }
+
+
+class RealtimeEngine:
+    '''
+    Drives a circuit from an audio callback.
+
+    The host delivers buffers of any size to process(); they are queued in an input ring buffer
+    and the circuit renders fixed-size blocks of block_size samples into an output ring buffer,
+    which starts with block_size samples of silence. This gives a constant latency of block_size
+    samples regardless of the host buffer size. Parameter changes submitted with set_parameter()
+    from any thread are applied between blocks, never in the middle of one. With a
+    ParameterController (see control.py) the setters run on the control thread instead
+    and only the resulting coefficients are swapped in between blocks.
+    A callback that takes longer than the duration of the buffer it processes counts as an xrun.
+    '''
+    def __init__(
+        self,
+        circuit,
+        block_size: int = 64,
+        max_buffer_size: int = 4096,
+        history: int = 4096,
+        controller=None,
+    ) -> None:
+        self.circuit = circuit
+        self.controller = controller
+        self.fs = circuit.fs
+        self.block_size = block_size
+        capacity = max_buffer_size + 2 * block_size
+        self.input_ring = RingBuffer(capacity)
+        self.output_ring = RingBuffer(capacity)
+        self.parameters = ParameterQueue()
+        self.stats = CallbackStats(history)
+        self._in_block = np.zeros(block_size)
+        self._out_block = np.zeros(block_size)
+        self.reset()
+
+    @property
+    def latency(self) -> float:
+        """Latency added by the engine, in seconds."""
+        return self.block_size / self.fs
+
+    def reset(self) -> None:
+        """Reset the circuit, the buffers and the statistics."""
+        self.circuit.reset()
+        self.input_ring.clear()
+        self.output_ring.clear()
+        self._out_block[:] = 0.0
+        self.output_ring.write(self._out_block)
+        self.stats.reset()
+
+    def set_parameter(self, setter, *args) -> None:
+        """Schedule a parameter change for the next block boundary (thread safe).
+
+        Args:
+            setter: a callable, or the name of a method of the circuit (e.g. 'set_cutoff')
+            *args: arguments of the setter
+        """
+        if isinstance(setter, str):
+            setter = getattr(self.circuit, setter)
+        self.parameters.push(setter, *args)
+
+    def process(self, in_buffer: np.ndarray, out_buffer: np.ndarray) -> None:
+        """Audio callback: consume len(in_buffer) input samples and fill out_buffer."""
+        start = time.perf_counter()
+        self.input_ring.write(in_buffer)
+        process_sample = self.circuit.process_sample
+        in_block, out_block = self._in_block, self._out_block
+        while self.input_ring.available_read() >= self.block_size:
+            self.parameters.apply_pending()
+            if self.controller is not None:
+                self.controller.swap()
+            self.input_ring.read_into(in_block)
+            for i in range(self.block_size):
+                out_block[i] = process_sample(in_block[i])
+            self.output_ring.write(out_block)
+        if self.output_ring.read_into(out_buffer) < len(out_buffer):
+            self.stats.underruns += 1
+        self.stats.record(time.perf_counter() - start, len(out_buffer) / self.fs)
+
+    def sounddevice_callback(self, indata, outdata, frames, time_info, status) -> None:
+        """Callback with the signature of sounddevice.Stream, using the first input channel."""
+        self.process(indata[:, 0], outdata[:, 0])
+        outdata[:, 1:] = outdata[:, :1]
+
+    def run(self, device) -> np.ndarray:
+        """Run the engine on an audio device until the device stops."""
+        return device.run(self.process)
+
+    def report(self) -> dict:
+        return self.stats.summary(self.block_size / self.fs)
+
+
+class NullAudioDevice:
+    '''
+    Audio device without hardware: feeds a signal (or silence) to a callback in buffers of
+    frames_per_buffer samples and collects the output. With realtime=True the buffers are
+    paced at the sample rate, as a sound card would do.
+    '''
+    def __init__(
+        self,
+        fs: int,
+        frames_per_buffer: int = 256,
+        signal: np.ndarray = None,
+        n_buffers: int = None,
+        realtime: bool = False,
+    ) -> None:
+        self.fs = fs
+        self.frames_per_buffer = frames_per_buffer
+        if signal is None:
+            signal = np.zeros(frames_per_buffer * (n_buffers or 1))
+        self.signal = np.asarray(signal, dtype=float)
+        self.realtime = realtime
+
+    def run(self, callback: Callable) -> np.ndarray:
+        """Call callback(in_buffer, out_buffer) for every buffer of the signal.
+
+        Returns:
+            np.ndarray: the output, one sample per input sample (delayed by the engine's latency)
+        """
+        n = self.frames_per_buffer
+        n_buffers = -(-len(self.signal) // n)
+        padded = np.zeros(n_buffers * n)
+        padded[: len(self.signal)] = self.signal
+        output = np.zeros_like(padded)
+        period = n / self.fs
+        next_time = time.perf_counter()
+        for k in range(n_buffers):
+            callback(padded[k * n : (k + 1) * n], output[k * n : (k + 1) * n])
+            if self.realtime:
+                next_time += period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        return output[: len(self.signal)]
+
+
+class FileAudioDevice(NullAudioDevice):
+    '''
+    Audio device reading its input from a wav file and writing the output to another.
+    Integer PCM input is scaled to [-1, 1], the output file is 32 bit float.
+    '''
+    def __init__(
+        self,
+        input_path: str,
+        output_path: str = None,
+        frames_per_buffer: int = 256,
+        realtime: bool = False,
+    ) -> None:
+        fs, x = wavfile.read(input_path)
+        if x.ndim > 1:
+            x = x[:, 0]
+        if np.issubdtype(x.dtype, np.integer):
+            x = x / float(np.iinfo(x.dtype).max)
+        super().__init__(fs, frames_per_buffer, x, realtime=realtime)
+        self.output_path = output_path
+
+    def run(self, callback: Callable) -> np.ndarray:
+        y = super().run(callback)
+        if self.output_path is not None:
+            wavfile.write(self.output_path, self.fs, y.astype(np.float32))
+        return y
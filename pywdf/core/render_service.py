@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator, Callable, Iterable
+
+import numpy as np
+from scipy.io import wavfile
+
+
+class RenderJob:
+    '''
+    One offline render: run input_path through a circuit and write the result to output_path.
+
+    Args:
+        circuit: circuit class, or its name ('DiodeClipper') or import path
+            ('pywdf.examples.diodeclipper:DiodeClipper')
+        kwargs (dict): constructor keyword arguments of the circuit
+        input_path (str): wav file to process
+        output_path (str): wav file to write (32 bit float)
+        automation (list, optional): parameter changes [time_s, setter, *args], applied
+            before the sample at time_s. Defaults to None.
+        job_id (str, optional): identifier reported in the progress events. Defaults to output_path.
+    '''
+    def __init__(
+        self,
+        circuit,
+        kwargs: dict,
+        input_path: str,
+        output_path: str,
+        automation: list = None,
+        job_id: str = None,
+    ) -> None:
+        self.circuit = circuit
+        self.kwargs = dict(kwargs)
+        self.input_path = str(input_path)
+        self.output_path = str(output_path)
+        self.automation = [list(event) for event in automation or []]
+        self.job_id = job_id if job_id is not None else self.output_path
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "RenderJob":
+        return cls(
+            d["circuit"],
+            d.get("kwargs", {}),
+            d["input_path"],
+            d["output_path"],
+            d.get("automation"),
+            d.get("job_id"),
+        )
+
+
+def resolve_circuit_class(circuit):
+    """Circuit class from a class, an exported name or a 'module:Class' path."""
+    if not isinstance(circuit, str):
+        return circuit
+    if ":" in circuit:
+        module, name = circuit.split(":", 1)
+        return getattr(importlib.import_module(module), name)
+    return getattr(importlib.import_module("pywdf"), circuit)
+
+
+def read_wav(path: str) -> tuple:
+    """Read a wav file as (fs, float signal), scaling integer PCM to [-1, 1] and keeping the first channel."""
+    fs, x = wavfile.read(path)
+    if x.ndim > 1:
+        x = x[:, 0]
+    if np.issubdtype(x.dtype, np.integer):
+        x = x / float(np.iinfo(x.dtype).max)
+    return fs, np.asarray(x, dtype=float)
+
+
+def render(circuit, x: np.ndarray, automation: list = None) -> np.ndarray:
+    """Process x with circuit, applying automation events at their sample positions.
+
+    Args:
+        circuit (Circuit): circuit to run
+        x (np.ndarray): input signal
+        automation (list, optional): events [time_s, setter, *args]. Defaults to None.
+
+    Returns:
+        np.ndarray: output signal
+    """
+    circuit.reset()
+    y = np.zeros(len(x))
+    events = sorted(automation or [], key=lambda e: e[0])
+    process_sample = circuit.process_sample
+    start = 0
+    for k in range(len(events) + 1):
+        if k < len(events):
+            stop = min(len(x), max(start, int(round(events[k][0] * circuit.fs))))
+        else:
+            stop = len(x)
+        for n in range(start, stop):
+            y[n] = process_sample(x[n])
+        start = stop
+        if k < len(events):
+            _, setter, *args = events[k]
+            getattr(circuit, setter)(*args)
+    return y
+
+
+def render_job(job: RenderJob) -> tuple:
+    """Build the job's circuit and render its input; runs in the worker processes.
+
+    Returns:
+        tuple: (sample rate, output signal)
+    """
+    fs, x = read_wav(job.input_path)
+    circuit = resolve_circuit_class(job.circuit)(**job.kwargs)
+    if circuit.fs != fs:
+        raise Exception(f"File sample rate {fs} differs from the {circuit.__class__.__name__}'s ({circuit.fs})")
+    return fs, render(circuit, x, job.automation)
+
+
+def write_wav(path: str, fs: int, y: np.ndarray) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    wavfile.write(path, fs, y.astype(np.float32))
+
+
+class RenderService:
+    '''
+    Renders batches of RenderJobs concurrently.
+
+    Rendering runs in a process pool (one worker per core by default); writing the results
+    runs in threads, with at most max_io files written at a time. Progress is reported as
+    events {'job_id', 'status', 'done', 'total', ...} with status 'started', 'rendered',
+    'written' or 'failed'; a failed job does not stop the others.
+    '''
+    def __init__(self, max_workers: int = None, max_io: int = 4, executor: Executor = None) -> None:
+        self.max_workers = max_workers or os.cpu_count()
+        self.max_io = max_io
+        self.executor = executor
+
+    async def stream(self, jobs: Iterable) -> AsyncIterator[dict]:
+        """Run jobs, yielding progress events as they happen."""
+        jobs = [j if isinstance(j, RenderJob) else RenderJob.from_dict(j) for j in jobs]
+        events = asyncio.Queue()
+        io_slots = asyncio.Semaphore(self.max_io)
+        loop = asyncio.get_running_loop()
+        executor = self.executor or ProcessPoolExecutor(self.max_workers)
+        done = 0
+
+        async def run(job: RenderJob) -> None:
+            nonlocal done
+            try:
+                await events.put({"job_id": job.job_id, "status": "started"})
+                fs, y = await loop.run_in_executor(executor, render_job, job)
+                await events.put({"job_id": job.job_id, "status": "rendered", "n_samples": len(y)})
+                async with io_slots:
+                    await loop.run_in_executor(None, write_wav, job.output_path, fs, y)
+                done += 1
+                await events.put({"job_id": job.job_id, "status": "written", "output_path": job.output_path})
+            except Exception as e:
+                done += 1
+                await events.put({"job_id": job.job_id, "status": "failed", "error": repr(e)})
+
+        async def supervise() -> None:
+            await asyncio.gather(*[run(job) for job in jobs])
+            await events.put(None)
+
+        supervisor = asyncio.create_task(supervise())
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                event.update(done=done, total=len(jobs))
+                yield event
+        finally:
+            await supervisor
+            if self.executor is None:
+                executor.shutdown()
+
+    async def run(self, jobs: Iterable, on_progress: Callable = None) -> list:
+        """Run jobs to completion.
+
+        Returns:
+            list: the final ('written' or 'failed') event of each job
+        """
+        results = {}
+        async for event in self.stream(jobs):
+            if on_progress is not None:
+                on_progress(event)
+            if event["status"] in ("written", "failed"):
+                results[event["job_id"]] = event
+        return list(results.values())
+
+
+def jobs_from_lines(lines: Iterable) -> list:
+    """Parse one JSON job per line (see RenderJob.from_dict), skipping blank lines."""
+    return [RenderJob.from_dict(json.loads(line)) for line in lines if line.strip()]
+
+
+def main(argv: list = None) -> int:
+    """Command line front end: JSON jobs from a file or stdin, JSON progress events on stdout."""
+    parser = argparse.ArgumentParser(description="Render wav files through pywdf circuits")
+    parser.add_argument("jobs", nargs="?", help="JSON lines job file (default: stdin)")
+    parser.add_argument("--workers", type=int, default=None, help="render processes (default: one per core)")
+    parser.add_argument("--max-io", type=int, default=4, help="files written concurrently")
+    args = parser.parse_args(argv)
+
+    if args.jobs is None:
+        jobs = jobs_from_lines(sys.stdin)
+    else:
+        with open(args.jobs) as f:
+            jobs = jobs_from_lines(f)
+
+    def report(event):
+        print(json.dumps(event), flush=True)
+
+    results = asyncio.run(RenderService(args.workers, args.max_io).run(jobs, report))
+    return int(any(r["status"] == "failed" for r in results))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -28,9 +28,10 @@ class RTypeAdaptor(baseWDF):
         self.calc_impedance()
 
     def reset(self) -> None:
-        self.a_vals = np.zeros(self.n_ports)
-        self.b_vals = np.zeros(self.n_ports)
+        self.a_vals = np.zeros((self.n_ports,) + self.S_matrix.shape[2:])
+        self.b_vals = np.zeros((self.n_ports,) + self.S_matrix.shape[2:])
 
+    # generated inline by traversal.FlatTraversal._down_lines: keep both in sync
     def accept_incident_wave(self, a: float) -> None:
         self.a = a
         self.a_vals[self.up_port_idx] = self.a
@@ -39,21 +40,31 @@ class RTypeAdaptor(baseWDF):
             idx = self.get_port_idx(i)
             self.down_ports[i].accept_incident_wave(self.b_vals[idx])
 
+    # generated inline by traversal.FlatTraversal._up_lines: keep both in sync
     def propagate_reflected_wave(self) -> float:
         for i in range(len(self.down_ports)):
             idx = self.get_port_idx(i)
             self.a_vals[idx] = self.down_ports[i].propagate_reflected_wave()
-        self.b = self.b_vals[self.up_port_idx]
+        self.b = self.up_wave()
         return self.b
 
+    def up_wave(self) -> float:
+        # the up port is adapted, so its reflected wave only depends on the waves from below;
+        # b_vals still holds the previous sample's scattering until the incident wave arrives
+        S_up = self.S_matrix[self.up_port_idx]
+        if S_up.ndim == 1:
+            return S_up @ self.a_vals
+        return np.einsum("j...,j...->...", S_up, self.a_vals)
+
     def get_port_idx(self, x: int) -> int:
         return x if x < self.up_port_idx else x + 1
 
     def r_type_scatter(self) -> None:
-        for i in range(self.n_ports):
-            self.b_vals[i] = 0
-            for j in range(self.n_ports):
-                self.b_vals[i] += self.S_matrix[i][j] * self.a_vals[j]
+        # b_vals is rebound, not written in place: the children keep the previous waves
+        if self.S_matrix.ndim == 2:
+            self.b_vals = self.S_matrix @ self.a_vals
+        else:
+            self.b_vals = np.einsum("ij...,j...->i...", self.S_matrix, self.a_vals)
 
     def calc_impedance(self) -> None:
         self.Rp = self.impedance_calc(self)
@@ -62,7 +73,15 @@ class RTypeAdaptor(baseWDF):
     def get_port_impedances(self) -> list:
         return [port.Rp for port in self.down_ports]
 
+    def get_children(self) -> list:
+        return list(self.down_ports)
+
     def set_S_matrix(self, matrix: np.array) -> None:
+        # entries may be arrays when the port impedances are (one value per Monte Carlo instance)
+        lanes = np.broadcast_shapes(*[np.shape(m) for row in matrix for m in row])
+        if self.S_matrix.shape[2:] != lanes:
+            self.S_matrix = np.zeros((self.n_ports, self.n_ports) + lanes)
+            self.reset()
         for i in range(self.n_ports):
             for j in range(self.n_ports):
                 self.S_matrix[i][j] = matrix[i][j]
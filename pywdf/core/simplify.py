@@ -0,0 +1,146 @@
+from .traversal import _kind
+from .wdf import baseWDF
+
+
+# elements without state or sources, by exact class name: a tree of them reflects no wave
+MEMORYLESS = (
+    "Resistor",
+    "SeriesAdaptor",
+    "ParallelAdaptor",
+    "SeriesAdaptorN",
+    "ParallelAdaptorN",
+    "PolarityInverter",
+)
+
+# wave readings of the elements of a folded subtree, which expand the fold
+PROBES = ("wave_to_voltage", "wave_to_current")
+
+
+def _subtree(element) -> list:
+    """element and everything below it, in pre-order."""
+    elements, stack = [], [element]
+    while stack:
+        element = stack.pop()
+        elements.append(element)
+        stack.extend(reversed(element.get_children()))
+    return elements
+
+
+def _memoryless(elements: list) -> set:
+    """The elements (given in pre-order) whose whole subtree is MEMORYLESS and not instrumented."""
+    memoryless = set()
+    for element in reversed(elements):
+        if _kind(element) in MEMORYLESS and all(c in memoryless for c in element.get_children()):
+            memoryless.add(element)
+    return memoryless
+
+
+def is_memoryless(element) -> bool:
+    return element in _memoryless(_subtree(element))
+
+
+class _Probe:
+    # reads an element of a folded subtree, expanding the fold: it is read every sample
+    def __init__(self, fold, element, method: str) -> None:
+        self.fold = fold
+        self.element = element
+        self.method = getattr(type(element), method)
+
+    def __call__(self) -> float:
+        self.fold.expand()
+        return self.method(self.element)
+
+
+class FoldedResistor(baseWDF):
+    '''
+    Equivalent resistor of a memoryless subtree (see Circuit.simplify).
+
+    A subtree of resistors, adaptors and polarity inverters reflects no wave and
+    presents a resistance at its top port, so it is connected in its parent as
+    this single resistor and not evaluated per sample.
+
+    The subtree stays connected below the fold, which is the parent of its top
+    element: a parameter change inside it (e.g. set_resistance on one of its
+    resistors) updates the equivalent resistance on its way up the tree.
+    The fold expands itself back into the tree, with the waves of the subtree
+    in place, when the voltage or current of one of its elements is read (a
+    probed element is evaluated every sample anyway) and when a reactive or
+    nonlinear element is connected below it.
+
+    Args:
+        subtree (baseWDF): top element of the memoryless subtree
+    '''
+    def __init__(self, subtree: baseWDF) -> None:
+        baseWDF.__init__(self)
+        self.subtree = subtree
+        self.calc_impedance()
+
+    def fold(self) -> None:
+        """Take the place of the subtree in its parent."""
+        parent = self.subtree.parent
+        parent.replace_child(self.subtree, self, update=False)
+        self.subtree.connect_to_parent(self)
+        # zero reflected and adaptor internal waves, which expand relies on
+        self.subtree.propagate_reflected_wave()
+        for element in _subtree(self.subtree):
+            for method in PROBES:
+                setattr(element, method, _Probe(self, element, method))
+        self.version = self.subtree.topology_version
+
+    def expand(self) -> None:
+        """Put the subtree back in the place of the fold."""
+        if self.subtree.parent is not self:
+            return
+        self.subtree.accept_incident_wave(self.a)
+        for element in _subtree(self.subtree):
+            for method in PROBES:
+                # not through element.__dict__, which would slow down its attribute access
+                if isinstance(getattr(element, method), _Probe):
+                    delattr(element, method)
+        self.parent.replace_child(self, self.subtree, update=False)
+
+    def calc_impedance(self) -> None:
+        if self.parent is not None and self.version != self.subtree.topology_version:
+            # the tree changed: a new element below may have memory
+            self.version = self.subtree.topology_version
+            if not is_memoryless(self.subtree):
+                self.expand()
+        self.Rp = self.subtree.Rp
+        self.G = 1.0 / self.Rp
+
+    # copied into traversal.ACCEPT: keep both in sync
+    def accept_incident_wave(self, a: float) -> None:
+        self.a = a
+
+    # copied into traversal.UP: keep both in sync
+    def propagate_reflected_wave(self) -> float:
+        self.b = 0
+        return self.b
+
+
+def fold_memoryless(root, keep: list = ()) -> list:
+    """Replace every memoryless subtree of more than one element below root by a FoldedResistor.
+
+    Args:
+        root (rootWDF): root of the connection tree
+        keep (list, optional): elements left unfolded, e.g. the circuit's output. Defaults to ().
+
+    Returns:
+        list: the folds, in connection tree pre-order
+    """
+    memoryless = _memoryless(_subtree(root))
+    for element in keep:
+        while element is not None:
+            memoryless.discard(element)
+            element = element.parent
+    folds, stack = [], list(reversed(root.get_children()))
+    while stack:
+        element = stack.pop()
+        children = element.get_children()
+        if children and element in memoryless:
+            folds.append(FoldedResistor(element))
+        else:
+            stack.extend(reversed(children))
+    for fold in folds:
+        fold.fold()
+    return folds
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 def newton_raphson(f, df, x0, tolerance=1e-10, max_iterations=100):
     """
@@ -36,3 +37,205 @@ def newton_raphson(f, df, x0, tolerance=1e-10, max_iterations=100):
     
     raise ValueError(f"Failed to converge after {max_iterations} iterations")
 
+
+def newton_raphson_batch(
+    f,
+    df,
+    x0,
+    tolerance=1e-10,
+    max_iterations=100,
+    damping=1.0,
+    line_search=False,
+    max_backtracks=8,
+):
+    """
+    Find the roots of many independent scalar equations at once using a
+    vectorized Newton-Raphson method.
+
+    Every lane of `x0` is iterated simultaneously with NumPy. Lanes that have
+    converged are masked out of further updates, and lanes that fail to
+    converge (or hit a vanishing derivative) are reported through the returned
+    iteration counts instead of raising, so a single bad lane does not abort
+    the whole batch.
+
+    Parameters:
+    f: vectorized function, f(x) -> array with the same shape as x
+    df: vectorized derivative of f, df(x) -> array with the same shape as x
+    x0: array of initial guesses, one per lane
+    tolerance: convergence criterion on the step size (default: 1e-10)
+    max_iterations: maximum number of iterations (default: 100)
+    damping: step scaling factor in (0, 1], 1.0 gives the plain Newton step (default: 1.0)
+    line_search: halve the step of lanes whose |f| does not decrease (default: False)
+    max_backtracks: maximum number of step halvings per iteration (default: 8)
+
+    Returns:
+    roots: array of approximate roots, one per lane
+    iterations: per-lane number of iterations performed
+    converged: per-lane boolean mask, False where the lane did not converge
+    """
+    x = np.array(x0, dtype=float)
+    shape = x.shape
+    x = x.reshape(-1)
+    n = x.size
+
+    # buffers reused across iterations
+    step = np.zeros(n)
+    abs_step = np.zeros(n)
+    x_trial = np.empty(n)
+    iterations = np.zeros(n, dtype=int)
+    active = np.ones(n, dtype=bool)
+    converged = np.zeros(n, dtype=bool)
+    stalled = np.empty(n, dtype=bool)
+
+    for _ in range(max_iterations):
+        if not active.any():
+            break
+
+        fx = np.asarray(f(x), dtype=float).reshape(-1)
+        dfx = np.asarray(df(x), dtype=float).reshape(-1)
+
+        # lanes whose derivative vanishes are stopped, not raised on
+        np.less(np.abs(dfx), 1e-15, out=stalled)
+        stalled |= ~np.isfinite(fx)
+        active &= ~stalled
+
+        step.fill(0.0)
+        np.divide(fx, dfx, out=step, where=active)
+        step *= damping
+
+        if line_search:
+            np.subtract(x, step, out=x_trial)
+            f_abs = np.abs(fx)
+            for _ in range(max_backtracks):
+                f_trial = np.abs(np.asarray(f(x_trial), dtype=float).reshape(-1))
+                worse = active & ~(f_trial <= f_abs)
+                if not worse.any():
+                    break
+                step[worse] *= 0.5
+                np.subtract(x, step, out=x_trial)
+
+        np.subtract(x, step, out=x, where=active)
+        iterations[active] += 1
+
+        np.abs(step, out=abs_step)
+        done = active & (abs_step < tolerance)
+        converged |= done
+        active &= ~done
+
+    return x.reshape(shape), iterations.reshape(shape), converged.reshape(shape)
+
+
+class NewtonSolver:
+    """
+    Vector Newton-Raphson for a system F(x) = 0 that is solved again and again, e.g.
+    once per sample for the ports of a multi-port nonlinearity.
+
+    The inverse Jacobian is kept between iterations and between solves and only
+    updated when the residual no longer contracts fast enough (a chord / Shamanskii
+    iteration); a step that increases the residual with a fresh Jacobian is halved.
+    Callers warm start each solve from the previous solution.
+
+    Parameters:
+    tolerance: convergence criterion on the largest step component (default: 1e-9)
+    max_iterations: maximum number of iterations per solve (default: 50)
+    reuse_jacobian: keep the Jacobian while the residual contracts; False updates it every iteration (default: True)
+    contraction: largest ratio of successive residual norms accepted with a kept Jacobian (default: 0.25)
+    max_backtracks: maximum number of step halvings per iteration (default: 8)
+    record: append the iterations of every solve to iteration_counts (default: False)
+
+    Attributes:
+    iterations: iterations of the last solve
+    jacobian_updates: Jacobian evaluations over all solves
+    failures: solves that did not converge within max_iterations
+    iteration_counts: iterations of every solve, if record is True
+    """
+
+    def __init__(
+        self,
+        tolerance=1e-9,
+        max_iterations=50,
+        reuse_jacobian=True,
+        contraction=0.25,
+        max_backtracks=8,
+        record=False,
+    ):
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.reuse_jacobian = reuse_jacobian
+        self.contraction = contraction
+        self.max_backtracks = max_backtracks
+        self.J_inv = None
+        self.iterations = 0
+        self.jacobian_updates = 0
+        self.failures = 0
+        self.iteration_counts = [] if record else None
+
+    def invalidate(self):
+        """Drop the kept Jacobian, e.g. after the system itself changed."""
+        self.J_inv = None
+
+    def reset_statistics(self):
+        self.iterations = 0
+        self.jacobian_updates = 0
+        self.failures = 0
+        if self.iteration_counts is not None:
+            self.iteration_counts = []
+
+    def solve(self, residual, jacobian, x0, limit=None):
+        """
+        Solve residual(x) = 0 from the initial guess x0.
+
+        Parameters:
+        residual: function, residual(x) -> array with the shape of x
+        jacobian: function, jacobian(x) -> square array of the derivatives of the residual
+        x0: initial guess, typically the previous solution
+        limit: optional function, limit(x, step) -> the step to take instead of step, e.g.
+            shortened to keep exponentials in range (default: None)
+
+        Returns:
+        x: the solution; the last iterate if the solve did not converge (counted in failures)
+        """
+        x = np.array(x0, dtype=float)
+        F = residual(x)
+        norm = np.max(np.abs(F))
+        converged = False
+        iteration = 0
+        while iteration < self.max_iterations:
+            iteration += 1
+            fresh = self.J_inv is None or not self.reuse_jacobian
+            if fresh:
+                self.J_inv = np.linalg.inv(jacobian(x))
+                self.jacobian_updates += 1
+            step = self.J_inv @ F
+            if np.max(np.abs(step)) < self.tolerance:
+                x -= step
+                converged = True
+                break
+            if limit is not None:
+                step = limit(x, step)
+
+            x_new = x - step
+            F_new = residual(x_new)
+            norm_new = np.max(np.abs(F_new))
+            if not norm_new < norm:
+                if not fresh:
+                    # the kept Jacobian is too far off: retry from x with a new one
+                    self.J_inv = None
+                    continue
+                for _ in range(self.max_backtracks):
+                    step *= 0.5
+                    x_new = x - step
+                    F_new = residual(x_new)
+                    norm_new = np.max(np.abs(F_new))
+                    if norm_new < norm:
+                        break
+            if norm_new > self.contraction * norm:
+                self.J_inv = None
+            x, F, norm = x_new, F_new, norm_new
+
+        self.iterations = iteration
+        if not converged:
+            self.failures += 1
+        if self.iteration_counts is not None:
+            self.iteration_counts.append(iteration)
+        return x
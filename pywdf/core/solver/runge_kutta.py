@@ -55,3 +55,183 @@ def rk4_solve(f, t_span, y0, h):
     return t_values, y_values
 
 
+
+def rk4_solve_ensemble(f, t_span, y0, h, save_every=1):
+    """
+    Solve the same ODE for many initial conditions at once using RK4
+
+    All ensemble members advance together as one (n_ensembles, dim) array,
+    and the four stage buffers are allocated once and reused for every step.
+
+    Parameters:
+    f: vectorized function that defines dY/dt = f(t, Y) for Y of shape (n_ensembles, dim)
+    t_span: tuple (t_start, t_end)
+    y0: initial conditions, array of shape (n_ensembles, dim)
+    h: step size
+    save_every: store only every save_every-th step (default: 1)
+
+    Returns:
+    t_values: array of stored time points
+    y_values: array of shape (len(t_values), n_ensembles, dim)
+    """
+    t_start, t_end = t_span
+    t_steps = np.arange(t_start, t_end + h, h)
+    n_steps = len(t_steps) - 1
+
+    y = np.array(y0, dtype=float)
+    if y.ndim == 1:
+        y = y[:, np.newaxis]
+
+    stored = np.arange(0, n_steps + 1, save_every)
+    t_values = t_steps[stored]
+    y_values = np.empty((len(stored),) + y.shape)
+    y_values[0] = y
+
+    # stage buffers, reused across steps
+    k1 = np.empty_like(y)
+    k2 = np.empty_like(y)
+    k3 = np.empty_like(y)
+    k4 = np.empty_like(y)
+    y_stage = np.empty_like(y)
+    half_h = h / 2
+
+    slot = 1
+    for i in range(n_steps):
+        t = t_steps[i]
+        k1[...] = f(t, y)
+        np.multiply(k1, half_h, out=y_stage)
+        y_stage += y
+        k2[...] = f(t + half_h, y_stage)
+        np.multiply(k2, half_h, out=y_stage)
+        y_stage += y
+        k3[...] = f(t + half_h, y_stage)
+        np.multiply(k3, h, out=y_stage)
+        y_stage += y
+        k4[...] = f(t + h, y_stage)
+
+        # y += h / 6 * (k1 + 2 k2 + 2 k3 + k4), accumulated in place
+        k2 += k3
+        k2 *= 2
+        k1 += k2
+        k1 += k4
+        k1 *= h / 6
+        y += k1
+
+        if slot < len(stored) and stored[slot] == i + 1:
+            y_values[slot] = y
+            slot += 1
+
+    return t_values, y_values
+
+
+# Dormand-Prince 5(4) tableau
+_DP_C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1])
+_DP_A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+]
+_DP_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84])
+# difference between the 5th and embedded 4th order weights, over all 7 stages
+_DP_E = np.array([-71/57600, 0, 71/16695, -71/1920, 17253/339200, -22/525, 1/40])
+# coefficients of the 4th order continuous extension
+_DP_P = np.array([
+    [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+])
+
+
+def rk45_solve(f, t_span, y0, rtol=1e-6, atol=1e-9, h0=None, max_step=np.inf, t_eval=None):
+    """
+    Solve ODE using the adaptive Dormand-Prince RK45 method
+
+    The step size is chosen from the embedded 4th order error estimate. Works on
+    scalars, vectors and (n_ensembles, dim) arrays; ensembles share one step size.
+
+    Parameters:
+    f: function that defines dy/dt = f(t, y)
+    t_span: tuple (t_start, t_end)
+    y0: initial condition (scalar or array)
+    rtol: relative tolerance (default: 1e-6)
+    atol: absolute tolerance (default: 1e-9)
+    h0: initial step size, estimated from f when None (default: None)
+    max_step: largest allowed step size (default: inf)
+    t_eval: times at which to return the solution, interpolated with the
+            4th order continuous extension; accepted steps are returned when None
+
+    Returns:
+    t_values: array of time points
+    y_values: array of solution values
+    """
+    t_start, t_end = t_span
+    y = np.array(y0, dtype=float)
+    shape = y.shape
+
+    K = np.empty((7,) + shape)
+    y_stage = np.empty(shape)
+    K[0] = f(t_start, y)
+
+    if h0 is None:
+        scale = atol + np.abs(y) * rtol
+        d0 = np.sqrt(np.mean((y / scale) ** 2))
+        d1 = np.sqrt(np.mean((K[0] / scale) ** 2))
+        h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+    h = min(h0, max_step, t_end - t_start)
+
+    if t_eval is not None:
+        t_eval = np.asarray(t_eval, dtype=float)
+        y_values = np.empty((len(t_eval),) + shape)
+        next_eval = 0
+        while next_eval < len(t_eval) and t_eval[next_eval] <= t_start:
+            y_values[next_eval] = y
+            next_eval += 1
+    else:
+        t_list, y_list = [t_start], [y.copy()]
+
+    t = t_start
+    while t < t_end:
+        h = min(h, max_step, t_end - t)
+
+        for s in range(1, 6):
+            y_stage[...] = y
+            for j, a_sj in enumerate(_DP_A[s]):
+                y_stage += (h * a_sj) * K[j]
+            K[s] = f(t + _DP_C[s] * h, y_stage)
+
+        y_new = y + h * np.tensordot(_DP_B, K[:6], axes=1)
+        K[6] = f(t + h, y_new)
+
+        scale = atol + np.maximum(np.abs(y), np.abs(y_new)) * rtol
+        error = h * np.tensordot(_DP_E, K, axes=1)
+        error_norm = np.sqrt(np.mean((error / scale) ** 2))
+
+        if error_norm <= 1.0:
+            if t_eval is not None:
+                Q = np.tensordot(_DP_P, K, axes=([0], [0]))  # (4,) + shape
+                while next_eval < len(t_eval) and t_eval[next_eval] <= t + h:
+                    x = (t_eval[next_eval] - t) / h
+                    p = np.cumprod(np.full(4, x))
+                    y_values[next_eval] = y + h * np.tensordot(p, Q, axes=1)
+                    next_eval += 1
+            t += h
+            y = y_new
+            K[0] = K[6]  # first same as last
+            if t_eval is None:
+                t_list.append(t)
+                y_list.append(y.copy())
+            factor = 10.0 if error_norm == 0 else min(10.0, 0.9 * error_norm ** -0.2)
+        else:
+            factor = max(0.2, 0.9 * error_norm ** -0.2)
+        h *= factor
+
+    if t_eval is not None:
+        return t_eval, y_values
+    return np.array(t_list), np.array(y_list)
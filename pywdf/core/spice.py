@@ -0,0 +1,215 @@
+import ast
+import hashlib
+import math
+import operator
+import re
+from pathlib import Path
+
+from .cache import DiskCache, LRUCache
+from .netlist import DIODE_IS, DIODE_VT, Decomposition, Netlist, NetlistCircuit, topology_key
+
+
+# SPICE scale factors, case insensitive; "meg" and "mil" before "m" (milli)
+SCALE = {"t": 1e12, "g": 1e9, "meg": 1e6, "k": 1e3, "mil": 25.4e-6, "m": 1e-3, "u": 1e-6, "n": 1e-9, "p": 1e-12, "f": 1e-15}
+
+# a number, its scale factor and any unit letters after it (ignored, as in "100nF")
+NUMBER = r"((?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)(meg|mil|[tgkmunpf])?[a-z]*"
+
+# functions and constants of parameter expressions
+FUNCTIONS = {"sqrt": math.sqrt, "exp": math.exp, "log": math.log, "log10": math.log10, "abs": abs, "min": min, "max": max}
+CONSTANTS = {"pi": math.pi}
+
+OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+# dot commands that change the topology and are not supported; other unknown ones
+# (analyses, options, ...) are ignored
+UNSUPPORTED = (".subckt", ".ends", ".include", ".inc", ".lib", ".func")
+
+# decompositions by topology_key, shared by all circuits built from SPICE netlists:
+# call decomposition_cache.set_cache_dir(path) to keep them on disk across processes
+decomposition_cache = DiskCache(maxsize=64)
+
+# parsed netlists by source text and parameters
+netlist_cache = LRUCache(maxsize=64)
+
+
+def _number(token: str) -> float:
+    match = re.fullmatch(NUMBER, token.lower())
+    if match is None:
+        raise ValueError(f"Invalid value {token}")
+    return float(match.group(1)) * SCALE.get(match.group(2), 1.0)
+
+
+def _evaluate(expression: str, params: dict) -> float:
+    """Value of an arithmetic expression of numbers (with scale factors), parameters and FUNCTIONS."""
+    expression = re.sub(r"(?<![\w.])" + NUMBER, lambda m: repr(_number(m.group(0))), expression.strip().lower())
+
+    def value(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.Name):
+            if node.id in params:
+                return params[node.id]
+            if node.id in CONSTANTS:
+                return CONSTANTS[node.id]
+            raise ValueError(f"Unknown parameter {node.id}")
+        if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            return OPERATORS[type(node.op)](value(node.left), value(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in OPERATORS:
+            return OPERATORS[type(node.op)](value(node.operand))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS:
+            return FUNCTIONS[node.func.id](*[value(arg) for arg in node.args])
+        raise ValueError(f"Unsupported expression {expression}")
+
+    try:
+        tree = ast.parse(expression.replace("^", "**"), mode="eval")
+    except SyntaxError:
+        raise ValueError(f"Invalid expression {expression}") from None
+    return float(value(tree.body))
+
+
+def _value(token: str, params: dict) -> float:
+    """Value of a number, a {expression} / 'expression' or a parameter name."""
+    if token[0] in "{'":
+        return _evaluate(token[1:-1], params)
+    if token.lower() in params:
+        return params[token.lower()]
+    return _number(token)
+
+
+def _lines(text: str) -> list:
+    """Statements of a netlist up to .end: no title, comments or blank lines, continuation lines joined."""
+    lines = []
+    for line in text.splitlines()[1:]:
+        line = re.split(r"[;$]", line, maxsplit=1)[0].strip()
+        if not line or line.startswith("*"):
+            continue
+        if line.split()[0].lower() == ".end":
+            break
+        if line.startswith("+") and lines:
+            lines[-1] += " " + line[1:].strip()
+        else:
+            lines.append(line)
+    return lines
+
+
+def _tokens(line: str) -> list:
+    # expressions in braces or quotes are single tokens, even with spaces
+    line = re.sub(r"\s*=\s*", "=", line)
+    return re.findall(r"(?:\{[^}]*\}|'[^']*'|[^\s,(){}'])+", line)
+
+
+def _assignments(tokens: list, params: dict) -> dict:
+    # in order, each may use the ones before it
+    values = {}
+    for token in tokens:
+        if "=" in token:
+            name, expression = token.split("=", 1)
+            values[name.lower()] = _value(expression, {**params, **values})
+    return values
+
+
+def parse_spice(text: str, params: dict = None) -> Netlist:
+    """Netlist of a SPICE netlist.
+
+    The subset read is: resistors, capacitors and inductors (Rname n+ n- value),
+    diodes (Dname anode cathode [model]) with .model name D(IS=... N=...), the input
+    source, a voltage or current source (Vname / Iname n+ n-, its value and waveform are
+    ignored: the signal is given to process_signal), .param name=value definitions and
+    values written as numbers with scale factors (4.7k, 100n, 1meg), parameter names or
+    {expressions} of them. As in SPICE the first line is the title, * starts a comment
+    line, ; or $ a comment, + continues the previous line, and names and nodes are case
+    insensitive (nodes are lowercased, component names kept as written).
+
+    Args:
+        text (str): the netlist
+        params (dict, optional): parameter values overriding the .param definitions,
+            e.g. a potentiometer position. Defaults to None.
+
+    Returns:
+        Netlist: the components of the netlist
+    """
+    lines = _lines(text)
+    values = {name.lower(): float(value) for name, value in (params or {}).items()}
+    overridden = set(values)
+    models = {}
+    for line in lines:
+        command = line.split()[0].lower()
+        if command in UNSUPPORTED:
+            raise ValueError(f"Unsupported command {line.split()[0]}, the netlist must be flat")
+        if command == ".param":
+            for token in _tokens(line)[1:]:
+                if "=" not in token:
+                    raise ValueError(f"Invalid parameter definition {line}")
+                name, expression = token.split("=", 1)
+                if name.lower() not in overridden:
+                    values[name.lower()] = _value(expression, values)
+        elif command == ".model":
+            tokens = _tokens(line)
+            if len(tokens) >= 3 and tokens[2].lower() == "d":
+                models[tokens[1].lower()] = _assignments(tokens[3:], values)
+
+    netlist = Netlist()
+    for line in lines:
+        if line.startswith("."):
+            continue
+        tokens = _tokens(line)
+        name, kind = tokens[0], tokens[0][0].upper()
+        if len(tokens) < 3:
+            raise ValueError(f"{name} needs two nodes")
+        nodes = [node.lower() for node in tokens[1:3]]
+        if kind in "RCL":
+            if len(tokens) < 4:
+                raise ValueError(f"{name} has no value")
+            netlist.add(name, *nodes, _value(tokens[3], values))
+        elif kind == "D":
+            model = {}
+            if len(tokens) > 3 and "=" not in tokens[3]:
+                if tokens[3].lower() not in models:
+                    raise ValueError(f"Unknown diode model {tokens[3]} of {name}")
+                model = models[tokens[3].lower()]
+            netlist.add(name, *nodes, model.get("is", DIODE_IS), Vt=model.get("n", 1.0) * DIODE_VT)
+        elif kind in "VI":
+            netlist.add(name, *nodes)
+        else:
+            raise ValueError(f"Unsupported component {name}, kinds are R, C, L, D, V and I")
+    return netlist
+
+
+def spice_circuit(text: str, fs: int, output: str, params: dict = None) -> NetlistCircuit:
+    """Circuit of a SPICE netlist (see parse_spice), ready to process signals.
+
+    Building the same netlist again only creates its elements: parsed netlists are
+    cached by text and parameters (netlist_cache) and their connection tree structures
+    by topology (decomposition_cache), so netlists differing only in component values
+    or parameters share one Decomposition, in memory and, once
+    decomposition_cache.set_cache_dir is called, on disk.
+
+    Args:
+        text (str): the netlist
+        fs (int): sample rate
+        output (str): name of the component whose voltage is the output
+        params (dict, optional): parameter values overriding the .param definitions. Defaults to None.
+
+    Returns:
+        NetlistCircuit: the circuit
+    """
+    key = hashlib.sha1(repr((text, sorted((params or {}).items()))).encode()).hexdigest()
+    netlist = netlist_cache.get_or_create(key, lambda: parse_spice(text, params))
+    decomposition = decomposition_cache.get_or_create(
+        topology_key(netlist, output), lambda: Decomposition(netlist, output)
+    )
+    return NetlistCircuit(netlist, fs, output, decomposition)
+
+
+def load_spice(path: str, fs: int, output: str, params: dict = None) -> NetlistCircuit:
+    """Circuit of the SPICE netlist file at path, see spice_circuit."""
+    return spice_circuit(Path(path).read_text(), fs, output, params)
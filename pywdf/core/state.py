@@ -0,0 +1,140 @@
+import hashlib
+import json
+import numbers
+
+import numpy as np
+
+
+# attributes that hold wave / signal state; everything else numeric is a parameter
+WAVE_STATE = frozenset(("a", "b", "c", "z", "b_temp", "b_diff", "b_diffs", "a_vals", "b_vals", "Vs"))
+
+CIRCUIT = "circuit"
+
+
+def _is_numeric(value) -> bool:
+    if isinstance(value, np.ndarray):
+        return value.dtype.kind in "biuf"
+    return isinstance(value, numbers.Real)
+
+
+def state_items(circuit) -> list:
+    """(owner, owner name, attribute) of every numeric value making up the circuit's state.
+
+    Elements are visited in connection tree pre-order and their attributes in alphabetical
+    order, followed by the numeric attributes of the circuit itself, so the layout only
+    depends on the structure of the circuit.
+    """
+    items = []
+    for element, name in circuit.get_element_names().items():
+        for attr in sorted(element.__dict__):
+            if _is_numeric(element.__dict__[attr]):
+                items.append((element, name, attr))
+    for attr in sorted(circuit.__dict__):
+        if _is_numeric(circuit.__dict__[attr]):
+            items.append((circuit, CIRCUIT, attr))
+    return items
+
+
+def parameter_key(circuit, *extra) -> str:
+    """Content hash of a circuit's parameters, independent of its wave state.
+
+    Covers the circuit class, every numeric parameter of the circuit and its elements
+    (component values, fs, alpha, ...), string settings of the elements
+    (e.g. lookup table interpolation) and any extra values given.
+    """
+    h = hashlib.sha1(circuit.__class__.__qualname__.encode())
+    for owner, name, attr in state_items(circuit):
+        if attr not in WAVE_STATE:
+            h.update(f"{name}.{attr}".encode())
+            h.update(np.ascontiguousarray(owner.__dict__[attr], dtype=float).tobytes())
+    for element, name in circuit.get_element_names().items():
+        for attr in sorted(element.__dict__):
+            if isinstance(element.__dict__[attr], str):
+                h.update(f"{name}.{attr}={element.__dict__[attr]}".encode())
+    h.update(repr(extra).encode())
+    return h.hexdigest()
+
+
+def state_schema(circuit) -> list:
+    """Layout of the state vector: one [owner name, attribute, shape] entry per value."""
+    return [
+        [name, attr, list(np.shape(owner.__dict__[attr]))]
+        for owner, name, attr in state_items(circuit)
+    ]
+
+
+def get_state(circuit) -> np.ndarray:
+    """Pack the wave state and parameters of a circuit into a flat float array."""
+    values = [
+        np.ravel(np.asarray(owner.__dict__[attr], dtype=float))
+        for owner, _, attr in state_items(circuit)
+    ]
+    return np.concatenate(values) if values else np.zeros(0)
+
+
+def set_state(circuit, state: np.ndarray) -> None:
+    """Restore a state produced by get_state on a circuit with the same schema.
+
+    Integer and boolean parameters keep their type when the stored value allows it,
+    and elements running on lookup tables rebuild them from the restored parameters.
+    """
+    state = np.asarray(state, dtype=float)
+    items = state_items(circuit)
+    sizes = [int(np.size(owner.__dict__[attr])) for owner, _, attr in items]
+    if sum(sizes) != len(state):
+        raise ValueError(
+            f"State has {len(state)} values, {circuit.__class__.__name__} expects {sum(sizes)}"
+        )
+
+    pos = 0
+    for (owner, _, attr), size in zip(items, sizes):
+        current = owner.__dict__[attr]
+        values = state[pos : pos + size]
+        pos += size
+        if isinstance(current, np.ndarray):
+            current[...] = values.reshape(current.shape)
+        elif attr in WAVE_STATE:
+            owner.__dict__[attr] = float(values[0])
+        else:
+            owner.__dict__[attr] = _restore_type(current, float(values[0]))
+
+    for element in circuit.get_elements():
+        if getattr(element, "table_mode", False):
+            element._update_table()
+
+
+def _restore_type(current, value: float):
+    if isinstance(current, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(current, numbers.Integral) and value.is_integer():
+        return int(value)
+    return value
+
+
+def save_state(circuit, path: str) -> None:
+    """Save the state of a circuit to a .npz file, together with its schema."""
+    np.savez(
+        path,
+        state=get_state(circuit),
+        schema=json.dumps(state_schema(circuit)),
+        circuit=circuit.__class__.__name__,
+    )
+
+
+def load_state(circuit, path: str) -> None:
+    """Restore a state saved with save_state, checking that the schemas match."""
+    with np.load(path) as data:
+        state = data["state"]
+        schema = json.loads(str(data["schema"]))
+    expected = state_schema(circuit)
+    if schema != expected:
+        mismatch = next(
+            (i for i, (s, e) in enumerate(zip(schema, expected)) if s != e),
+            min(len(schema), len(expected)),
+        )
+        raise ValueError(
+            f"Saved state does not match {circuit.__class__.__name__}: entry {mismatch} is "
+            f"{schema[mismatch] if mismatch < len(schema) else None}, "
+            f"expected {expected[mismatch] if mismatch < len(expected) else None}"
+        )
+    set_state(circuit, state)
@@ -0,0 +1,154 @@
+import copy
+
+import numpy as np
+
+from .control import _copy_circuit, _is_circuit_parameter, _is_coefficient
+
+
+class SteppedParameters:
+    '''
+    Precomputed coefficients for a circuit's stepped controls (rotary switches, detented knobs).
+
+    Each control gets a table of the coefficients that differ between its positions (port
+    resistances, reflection coefficients, S-matrices, the circuit's own parameters, ...),
+    built on a copy of the circuit the first time the control is moved. Controls that change
+    the same adaptors interact, so a table only holds for the positions the other controls
+    had when it was built: it is stored under those, and a control whose position is not
+    known (never selected, or forgotten) counts as its current setting.
+    Selecting a position afterwards writes one table row into the circuit: no setter runs
+    and no impedance is recomputed.
+
+    The tables are only valid for the configuration they were built in. If the circuit is
+    changed by anything other than select(), call invalidate(), or forget() if only a
+    control's own parameter changed (e.g. a continuous cutoff).
+
+    Args:
+        circuit (Circuit): circuit to control
+        controls (dict): {name: (setter, n_positions)}, where setter is the name of a method
+            of the circuit taking the position index
+    '''
+    def __init__(self, circuit, controls: dict) -> None:
+        self.circuit = circuit
+        self.names = list(controls)
+        self.setters = [controls[name][0] for name in self.names]
+        self.shape = tuple(int(controls[name][1]) for name in self.names)
+        self.positions = {name: None for name in self.names}
+        # {(control index, positions of the other controls): (targets, rows)}
+        self.tables = {}
+
+    def _key(self, i: int) -> tuple:
+        return (i,) + tuple(self.positions[name] for j, name in enumerate(self.names) if j != i)
+
+    def _build(self, i: int) -> tuple:
+        shadow = _copy_circuit(self.circuit)
+        shadow_elements = shadow.get_elements()
+        live_owners = [self.circuit] + self.circuit.get_elements()
+
+        # the current state comes first: coefficients the grid shares but that differ from
+        # an off-grid setting must be written too
+        snapshots = [_snapshot(shadow, shadow_elements)]
+        setter = getattr(shadow, self.setters[i])
+        for pos in range(self.shape[i]):
+            setter(pos)
+            snapshots.append(_snapshot(shadow, shadow_elements))
+
+        # keep only the coefficients that actually depend on the control
+        first = snapshots[0]
+        varying = [
+            key for key, value in first.items()
+            if any(not _equal(value, s[key]) for s in snapshots[1:])
+        ]
+        targets = [
+            (live_owners[owner].__dict__, attr, isinstance(first[(owner, attr)], np.ndarray))
+            for owner, attr in varying
+        ]
+        rows = [tuple(s[key] for key in varying) for s in snapshots[1:]]
+        return targets, rows
+
+    def table(self, name: str) -> tuple:
+        """Table of a control for the current positions of the others, built if needed.
+
+        Returns:
+            tuple: (targets, rows): the (owner __dict__, attribute, is_array) written, and one
+                row of values per position
+        """
+        i = self.names.index(name)
+        key = self._key(i)
+        if key not in self.tables:
+            self.tables[key] = self._build(i)
+        return self.tables[key]
+
+    def __deepcopy__(self, memo: dict) -> "SteppedParameters":
+        # the tables address the elements of this circuit; a copied circuit builds its own
+        clone = SteppedParameters.__new__(SteppedParameters)
+        clone.circuit = copy.deepcopy(self.circuit, memo)
+        clone.names = list(self.names)
+        clone.setters = list(self.setters)
+        clone.shape = self.shape
+        clone.positions = dict(self.positions)
+        clone.tables = {}
+        return clone
+
+    def select(self, **positions) -> None:
+        """Move controls to new positions by writing the precomputed coefficients.
+
+        Controls not given keep their position. Controls are moved one after the other, each
+        table being built the first time it is needed.
+        """
+        for name, pos in positions.items():
+            n = self.shape[self.names.index(name)]
+            if not 0 <= pos < n:
+                raise ValueError(f"Position {pos} of '{name}' out of range [0, {n})")
+
+        for name, pos in positions.items():
+            if self.positions[name] == pos:
+                continue
+            targets, rows = self.table(name)
+            for (owner, attr, is_array), value in zip(targets, rows[pos]):
+                if is_array:
+                    np.copyto(owner[attr], value)
+                else:
+                    owner[attr] = value
+            self.positions[name] = pos
+
+    def set_position(self, name: str, pos: int) -> None:
+        """Record the position of a control that was set through its setter."""
+        self.positions[name] = pos
+
+    def forget(self, name: str) -> None:
+        """Mark a control as off the grid (e.g. after a continuous change of the same parameter).
+
+        Its own tables and those built while it was off the grid before are discarded.
+        """
+        self.positions[name] = None
+        i = self.names.index(name)
+        self.tables = {
+            key: table for key, table in self.tables.items()
+            if key[0] != i and key[1 + i - (i > key[0])] is not None
+        }
+
+    def invalidate(self) -> None:
+        """Discard the tables after a change they do not cover."""
+        self.tables = {}
+
+
+def _snapshot(circuit, elements: list) -> dict:
+    values = {}
+    for owner, obj in enumerate([circuit] + elements):
+        is_parameter = _is_circuit_parameter if owner == 0 else _is_coefficient
+        for attr, value in obj.__dict__.items():
+            if is_parameter(attr, value) and _is_numeric(value):
+                values[(owner, attr)] = value.copy() if isinstance(value, np.ndarray) else value
+    return values
+
+
+def _is_numeric(value) -> bool:
+    if isinstance(value, np.ndarray):
+        return value.dtype.kind in "biuf"
+    return isinstance(value, (bool, int, float, np.number))
+
+
+def _equal(a, b) -> bool:
+    if isinstance(a, np.ndarray):
+        return np.array_equal(a, b)
+    return a == b
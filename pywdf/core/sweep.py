@@ -0,0 +1,134 @@
+import numpy as np
+import scipy.fft
+
+from .cache import LRUCache
+from .transient import render_lanes
+
+
+# sweeps and inverse filters by (fs, duration, f1, f2[, n_fft]): a harmonic characterization
+# of many circuits, or of one circuit at many settings, builds them once
+sweep_cache = LRUCache(maxsize=16)
+
+
+def exponential_sweep(fs: float, duration: float, f1: float, f2: float) -> tuple:
+    """Synchronized exponential sine sweep x(t) = sin(2 pi f1 L exp(t / L)) from f1 to f2.
+
+    The rate L is rounded so that f1 L is a whole number, which makes the k-th harmonic of
+    the sweep a copy of it advanced by exactly L ln(k) (Novak et al., "Synchronized
+    swept-sine", 2015): the harmonic impulse responses are then separated in time and keep
+    their phase. The duration is adjusted accordingly, and the last millisecond faded out.
+
+    Args:
+        fs (float): sample rate
+        duration (float): approximate duration in seconds
+        f1 (float): start frequency in Hz
+        f2 (float): end frequency in Hz
+
+    Returns:
+        tuple: (sweep, L)
+    """
+    def build():
+        L = max(round(f1 * duration / np.log(f2 / f1)), 1) / f1
+        t = np.arange(int(round(L * np.log(f2 / f1) * fs))) / fs
+        sweep = np.sin(2 * np.pi * f1 * L * np.exp(t / L))
+        fade = min(int(fs / 1000), len(sweep))
+        sweep[len(sweep) - fade :] *= np.hanning(2 * fade)[fade:]
+        return sweep, L
+
+    return sweep_cache.get_or_create(("sweep", fs, duration, f1, f2), build)
+
+
+def inverse_filter(fs: float, duration: float, f1: float, f2: float, n_fft: int) -> np.ndarray:
+    """Spectrum (rfft bins of n_fft) of the inverse filter of exponential_sweep.
+
+    The analytic inverse of the sweep's spectrum, 2 sqrt(f / L) exp(-j 2 pi f L (1 - ln(f / f1)) + j pi / 4),
+    restricted to [f1, f2] and divided by fs, so that irfft(rfft(y, n_fft) * inverse) is the
+    impulse response of the system that turned the sweep into y.
+    """
+    def build():
+        _, L = exponential_sweep(fs, duration, f1, f2)
+        f = scipy.fft.rfftfreq(n_fft, 1.0 / fs)
+        inside = (f >= f1) & (f <= f2)
+        inverse = np.zeros(len(f), dtype=complex)
+        fi = f[inside]
+        inverse[inside] = 2 * np.sqrt(fi / L) * np.exp(-2j * np.pi * fi * L * (1 - np.log(fi / f1)) + 0.25j * np.pi)
+        return inverse / fs
+
+    return sweep_cache.get_or_create(("inverse", fs, duration, f1, f2, n_fft), build)
+
+
+class SweepResult:
+    '''
+    Linear and harmonic impulse responses of a circuit measured with an exponential sweep,
+    see sweep_analysis.
+
+    Attributes:
+        fs (float): sample rate
+        f1, f2 (float): frequency range of the sweep; the k-th response is valid from f1 to f2 / k
+        impulse_responses (np.ndarray): shape (n_harmonics, ir_length); row 0 is the linear
+            impulse response, row k - 1 that of the k-th harmonic
+    '''
+    def __init__(self, fs, f1, f2, impulse_responses) -> None:
+        self.fs = fs
+        self.f1 = f1
+        self.f2 = f2
+        self.impulse_responses = impulse_responses
+
+    def frequency_responses(self, n_fft: int = None) -> tuple:
+        """Frequency responses of the impulse responses.
+
+        Returns:
+            tuple: (frequencies in Hz, complex responses of shape (n_harmonics, n_fft // 2 + 1))
+        """
+        n_fft = n_fft or self.impulse_responses.shape[1]
+        return scipy.fft.rfftfreq(n_fft, 1.0 / self.fs), scipy.fft.rfft(self.impulse_responses, n_fft, axis=1)
+
+
+def sweep_analysis(
+    circuit,
+    duration: float = 1.0,
+    f1: float = 20.0,
+    f2: float = None,
+    amplitude: float = 1.0,
+    n_harmonics: int = 5,
+    ir_length: int = None,
+    tail: float = 0.1,
+) -> SweepResult:
+    """Linear and harmonic impulse responses of a circuit from a single sweep rendering.
+
+    The circuit (a copy, see render_lanes) is driven with amplitude * exponential_sweep
+    followed by tail seconds of silence, and the output deconvolved with inverse_filter.
+    The linear impulse response then starts at time 0 and the one of the k-th harmonic
+    L ln(k) earlier, where the FFT puts it at the end of the buffer: each is cut out with
+    ir_length samples. Sweep and inverse filter are cached in sweep_cache. The harmonic
+    responses depend on the amplitude, as the circuit's distortion does.
+
+    Args:
+        circuit (Circuit): circuit to measure, left unchanged
+        duration (float, optional): sweep duration in seconds. Defaults to 1.
+        f1 (float, optional): start frequency in Hz. Defaults to 20.
+        f2 (float, optional): end frequency in Hz. Defaults to 20 kHz, at most 0.45 fs.
+        amplitude (float, optional): sweep amplitude. Defaults to 1.
+        n_harmonics (int, optional): number of responses, the linear one included. Defaults to 5.
+        ir_length (int, optional): samples per response. Defaults to the gap between the
+            last two harmonics, L ln(n / (n - 1)), and at most tail seconds.
+        tail (float, optional): silence rendered after the sweep, in seconds. Defaults to 0.1.
+
+    Returns:
+        SweepResult: the impulse responses
+    """
+    fs = circuit.fs
+    f2 = f2 or min(20000.0, 0.45 * fs)
+    sweep, L = exponential_sweep(fs, duration, f1, f2)
+    n_tail = int(round(tail * fs))
+    gap = L * np.log(n_harmonics / (n_harmonics - 1)) if n_harmonics > 1 else np.inf
+    ir_length = ir_length or int(min(gap * fs, n_tail))
+
+    x = np.concatenate([amplitude * sweep, np.zeros(n_tail)])
+    y = render_lanes(circuit, x)[:, 0] / amplitude
+    n_fft = scipy.fft.next_fast_len(len(x) + ir_length)
+    h = scipy.fft.irfft(scipy.fft.rfft(y, n_fft) * inverse_filter(fs, duration, f1, f2, n_fft), n_fft)
+
+    starts = [int(round(-L * np.log(k) * fs)) % n_fft for k in range(1, n_harmonics + 1)]
+    irs = np.stack([np.take(h, np.arange(start, start + ir_length), mode="wrap") for start in starts])
+    return SweepResult(fs, f1, f2, irs)
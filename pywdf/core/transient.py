@@ -0,0 +1,155 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from .control import _copy_circuit
+
+
+class TransientResult:
+    '''
+    Responses of a circuit to a grid of sine inputs, see transient_analysis.
+
+    Signals are arrays indexed [sample, frequency, amplitude] and start at the end of the
+    settling period.
+
+    Attributes:
+        fs (float): sample rate
+        freqs (np.ndarray): frequencies of the sines in Hz
+        amplitudes (np.ndarray): amplitudes of the sines
+        t (np.ndarray): time of each sample in seconds, from the start of the sines
+        x (np.ndarray): input signals
+        y (np.ndarray): output voltages
+        i_source (np.ndarray): currents through the source, None unless currents were asked for
+        i_output (np.ndarray): currents through the output element, None unless currents were asked for
+    '''
+    def __init__(self, fs, freqs, amplitudes, t, x, y, i_source=None, i_output=None) -> None:
+        self.fs = fs
+        self.freqs = freqs
+        self.amplitudes = amplitudes
+        self.t = t
+        self.x = x
+        self.y = y
+        self.i_source = i_source
+        self.i_output = i_output
+
+    def spectrum(self, signal: str = "y") -> tuple:
+        """Amplitude spectra of a signal, Hann windowed and scaled so a sine of amplitude A
+        peaks at A. The resolution is fs / n_samples: render longer signals for finer bins.
+
+        Args:
+            signal (str, optional): "x", "y", "i_source" or "i_output". Defaults to "y".
+
+        Returns:
+            tuple: (frequencies in Hz, magnitudes of shape (n_bins, n_freqs, n_amplitudes))
+        """
+        values = getattr(self, signal)
+        window = np.hanning(len(values)).reshape(-1, 1, 1)
+        magnitude = 2.0 / window.sum() * np.abs(np.fft.rfft(values * window, axis=0))
+        return np.fft.rfftfreq(len(values), 1.0 / self.fs), magnitude
+
+
+def transient_analysis(
+    circuit,
+    freqs=1000.0,
+    amplitudes=1.0,
+    t_ms: float = 5.0,
+    settle_ms: float = 0.0,
+    currents: bool = False,
+    batch: bool = True,
+) -> TransientResult:
+    """Responses of a circuit to sines of every frequency and amplitude given.
+
+    Exactly settle_ms + t_ms of signal are rendered, from a reset circuit; the settling part
+    lets transients die out and is not returned. With batch, the whole grid runs in one pass
+    over the samples: a copy of the circuit is driven with one lane per sine, its waves
+    being arrays as for Monte Carlo ensembles (and, as there, its diodes run without lookup
+    tables). Circuits that only process scalar samples, e.g. with a MultiPortRoot, need
+    batch=False, which renders the sines one after the other. The circuit itself is left
+    unchanged.
+
+    Args:
+        circuit (Circuit): circuit to analyse
+        freqs (float or array, optional): frequencies of the sines in Hz. Defaults to 1000.
+        amplitudes (float or array, optional): amplitudes of the sines. Defaults to 1.
+        t_ms (float, optional): returned duration in ms. Defaults to 5.
+        settle_ms (float, optional): duration rendered before it, in ms. Defaults to 0.
+        currents (bool, optional): also record the source and output currents. Defaults to False.
+        batch (bool, optional): render every sine at once. Defaults to True.
+
+    Returns:
+        TransientResult: signals indexed [sample, frequency, amplitude]
+    """
+    freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+    amplitudes = np.atleast_1d(np.asarray(amplitudes, dtype=float))
+    n_settle = int(round(settle_ms * circuit.fs / 1000))
+    n_samples = n_settle + int(round(t_ms * circuit.fs / 1000))
+    t = np.arange(n_samples) / circuit.fs
+    # one lane per (frequency, amplitude), frequencies first
+    x = (np.sin(2 * np.pi * np.outer(t, freqs))[:, :, None] * amplitudes).reshape(n_samples, -1)
+
+    out = render_lanes(circuit, x, currents, batch).reshape(-1, n_samples, x.shape[1])
+
+    shape = (n_samples - n_settle, len(freqs), len(amplitudes))
+    x, *signals = [signal[n_settle:].reshape(shape) for signal in (x, *out)]
+    if not currents:
+        signals += [None, None]
+    return TransientResult(circuit.fs, freqs, amplitudes, t[n_settle:], x, *signals)
+
+
+def render_lanes(circuit, x: np.ndarray, currents: bool = False, batch: bool = True, n_workers: int = 1) -> np.ndarray:
+    """Responses of a copy of the circuit, from reset, to every column of x.
+
+    With batch the columns are the lanes of a single pass, see transient_analysis. Without,
+    they are rendered one after the other, or split over a pool of n_workers processes
+    (for circuits that only process scalar samples, the circuit must then be picklable).
+
+    Args:
+        circuit (Circuit): circuit to render, left unchanged
+        x (np.ndarray): input signals, shape (n_samples, n_lanes)
+        currents (bool, optional): also record the source and output currents. Defaults to False.
+        batch (bool, optional): render every column at once. Defaults to True.
+        n_workers (int, optional): worker processes without batch, None for one per core. Defaults to 1.
+
+    Returns:
+        np.ndarray: outputs of shape (n_samples, n_lanes), with currents (3, n_samples, n_lanes):
+            output voltages, source currents and output currents
+    """
+    x = np.asarray(x, dtype=float).reshape(len(x), -1)
+    out = np.empty((3 if currents else 1,) + x.shape)
+    shadow = _copy_circuit(circuit)
+    if batch:
+        for element in shadow.get_elements():
+            if getattr(element, "table_mode", False):
+                element.set_table_mode(False)
+        _render(shadow, x, out, currents)
+    elif n_workers == 1 or x.shape[1] == 1:
+        for lane in range(x.shape[1]):
+            _render(shadow, x[:, lane : lane + 1], out[:, :, lane : lane + 1], currents)
+    else:
+        with ProcessPoolExecutor(n_workers or os.cpu_count()) as pool:
+            for lane, part in enumerate(pool.map(_render_lane, repeat(shadow), x.T, repeat(currents))):
+                out[:, :, lane] = part
+    return out if currents else out[0]
+
+
+def _render_lane(circuit, x: np.ndarray, currents: bool) -> np.ndarray:
+    out = np.empty((3 if currents else 1, len(x), 1))
+    _render(circuit, x[:, None], out, currents)
+    return out[:, :, 0]
+
+
+def _render(circuit, x: np.ndarray, out: np.ndarray, currents: bool) -> None:
+    # x of shape (n_samples, n_lanes), one lane given to the circuit as a scalar; rows are
+    # copied, as circuits may scale their input sample in place
+    circuit.reset()
+    inputs = x[:, 0] if x.shape[1] == 1 else x.copy()
+    if currents:
+        process = circuit.process_sample_i_v
+        for k, sample in enumerate(inputs):
+            out[0, k], out[1, k], out[2, k] = process(sample)
+    else:
+        process = circuit.process_sample
+        for k, sample in enumerate(inputs):
+            out[0, k] = process(sample)
@@ -0,0 +1,266 @@
+import re
+
+
+# Straight-line code for the elements of a flattened tree, by exact class name.
+# {e} is the element, {p1}, {p2}, ... its children and {w} the incident wave.
+
+# reflected wave, computed once the children's reflected waves are known
+UP = {
+    "Resistor": ["{e}.b = 0"],
+    "FoldedResistor": ["{e}.b = 0"],
+    "Capacitor": ["{e}.b = {e}.z"],
+    "Inductor": ["{e}.b = {e}.b_coef * -{e}.z - {e}.a_coef * {e}.z"],
+    "ResistiveVoltageSource": ["{e}.b = {e}.Vs"],
+    "ResistiveCurrentSource": ["{e}.b = {e}.Rp * {e}.Is"],
+    "ShortCircuit": ["{e}.b = -{e}.a"],
+    "OpenCircuit": ["{e}.b = {e}.a"],
+    "SeriesAdaptor": ["{e}.b = -({p1}.b + {p2}.b)"],
+    "ParallelAdaptor": [
+        "{e}.b_diff = {p2}.b - {p1}.b",
+        "{e}.b_temp = -{e}.p1_reflect * {e}.b_diff",
+        "{e}.b = {p2}.b + {e}.b_temp",
+    ],
+    "PolarityInverter": ["{e}.b = 0 - {p1}.b"],
+    "SeriesVoltage": ["{e}.b = 0 - {p1}.b + -{e}.Vs"],
+}
+
+# incident wave of a leaf
+ACCEPT = {
+    "Resistor": ["{e}.a = {w}"],
+    "FoldedResistor": ["{e}.a = {w}"],
+    "Capacitor": ["{e}.a = {e}.z = {w}"],
+    "Inductor": ["{e}.a = {e}.z = {w}"],
+    "ResistiveVoltageSource": ["{e}.a = {w}"],
+    "ResistiveCurrentSource": ["{e}.a = {w}"],
+    "ShortCircuit": ["{e}.a = {w}"],
+    "OpenCircuit": ["{e}.a = {w}"],
+}
+
+# adaptors: (statements run on the incident wave {e}.a, wave expression of each child)
+DOWN = {
+    "SeriesAdaptor": (
+        ["a = {e}.a", "b1 = {p1}.b - {e}.p1_reflect * (a + {p1}.b + {p2}.b)"],
+        ["b1", "0 - (a + b1)"],
+    ),
+    "ParallelAdaptor": (["b2 = {e}.a + {e}.b_temp"], ["{e}.b_diff + b2", "b2"]),
+    "PolarityInverter": ([], ["-{e}.a"]),
+    "SeriesVoltage": ([], ["-{e}.a + -{e}.Vs"]),
+}
+
+# adaptors with any number of ports, whose code is generated per port
+N_PORT = ("SeriesAdaptorN", "ParallelAdaptorN")
+
+# elements whose wave methods were replaced on the instance (e.g. by the profiler)
+INSTANCE_METHODS = ("propagate_reflected_wave", "accept_incident_wave")
+
+
+def _kind(element) -> str:
+    """Name of the inlined code of the element, or None to call its methods."""
+    cls = type(element)
+    # compared through getattr: reading element.__dict__ would slow down its attribute access
+    for method in INSTANCE_METHODS:
+        if getattr(getattr(element, method), "__func__", None) is not getattr(cls, method):
+            return None
+    if cls.__name__ == "RTypeAdaptor" or cls.__name__ in N_PORT or cls.__name__ in UP:
+        return cls.__name__
+    return None
+
+
+def _is_adaptor(kind: str) -> bool:
+    return kind == "RTypeAdaptor" or kind in N_PORT or kind in DOWN
+
+
+# elements per generated function: very large functions run slower per statement
+CHUNK_SIZE = 256
+
+_ELEMENT_REF = re.compile(r"\be\d+\b")
+
+
+def _chunks(blocks: list) -> list:
+    """Group consecutive element blocks into chunks referencing about CHUNK_SIZE elements."""
+    chunks, lines, refs = [], [], set()
+    for block in blocks:
+        lines += block
+        refs.update(_ELEMENT_REF.findall(" ".join(block)))
+        if len(refs) >= CHUNK_SIZE:
+            chunks.append(lines)
+            lines, refs = [], set()
+    if lines or not chunks:
+        chunks.append(lines)
+    return chunks
+
+
+def _function(name: str, args: list, lines: list, names: bool = True) -> str:
+    """Source of a nested function; the elements it uses are bound as fast local defaults."""
+    if names:
+        refs = sorted(set(_ELEMENT_REF.findall(" ".join(lines))), key=lambda r: int(r[1:]))
+        args = args + [f"{r}={r}" for r in refs if f"{r}={r}" not in args]
+    body = "\n        ".join(lines or ["pass"])
+    return f"    def {name}({', '.join(args)}):\n        {body}\n"
+
+
+class FlatTraversal:
+    '''
+    Non recursive wave passes over the subtree below a root element.
+
+    The subtree is flattened once into a post-order list (reflected waves, leaves first) and
+    a pre-order list (incident waves, from the top), and both passes are compiled into
+    straight-line Python functions of CHUNK_SIZE elements: element after element, with no
+    call from an adaptor into its children. A sample therefore costs the same per element at any depth, ladders
+    of thousands of sections do not hit the recursion limit, and the per-level call overhead
+    of the recursive methods is gone.
+
+    Elements with code in UP / ACCEPT / DOWN, RTypeAdaptor and the N_PORT adaptors are inlined; any other
+    element, or one whose wave methods were replaced on the instance, is called through its
+    own methods, subtree included. The results are identical to the recursive evaluation.
+
+    The code follows the structure of the tree: it is rebuilt automatically when an element
+    in its tree is connected to a new parent (see baseWDF.topology), and should be rebuilt with
+    build() after enabling profiling.
+
+    Args:
+        root (rootWDF): root element; its subtree is root.next
+    '''
+    def __init__(self, root) -> None:
+        self.root = root
+        self.build()
+
+    def build(self) -> None:
+        top = self.root.next
+        elements = {}
+
+        def ref(element):
+            return "e%d" % elements.setdefault(element, len(elements))
+
+        def accept(element, wave):
+            kind = _kind(element)
+            if kind is None:
+                return [f"{ref(element)}.accept_incident_wave({wave})"]
+            if _is_adaptor(kind):
+                # its own statements follow later in the pre-order
+                return [f"{ref(element)}.a = {wave}"]
+            return [line.format(e=ref(element), w=wave) for line in ACCEPT[kind]]
+
+        # one block of statements per element, in post-order (up) and pre-order (down)
+        up, down = [], [accept(top, "w")]
+        stack = [(top, False)]
+        while stack:
+            element, children_done = stack.pop()
+            kind = _kind(element)
+            e = ref(element)
+            if kind is None:
+                up.append([f"{e}.propagate_reflected_wave()"])
+                continue
+            children = element.get_children()
+            ports = {f"p{i + 1}": ref(child) for i, child in enumerate(children)}
+            if not _is_adaptor(kind):
+                up.append([line.format(e=e) for line in UP[kind]])
+            elif children_done:
+                up.append(self._up_lines(kind, element, e, ports))
+            else:
+                down.append(self._down_lines(kind, element, e, ports, children, accept))
+                stack.append((element, True))
+                stack.extend((child, False) for child in reversed(children))
+
+        self.elements = list(elements)
+        self.n_elements = len(self.elements)
+        self.source = self._source(_chunks(up), _chunks(down), ref(top))
+        namespace = {}
+        exec(compile(self.source, "<FlatTraversal>", "exec"), namespace)
+        self._up, self._down, self._process = namespace["bind"](self.root, self.elements)
+        self.topology = self.root.topology()
+        self.version = self.topology.version
+
+    @staticmethod
+    def _up_lines(kind, element, e, ports) -> list:
+        if kind == "RTypeAdaptor":
+            lines = [
+                f"{e}.a_vals[{element.get_port_idx(i)}] = {p}.b"
+                for i, p in enumerate(ports.values())
+            ]
+            return lines + [f"{e}.b = {e}.up_wave()"]
+        p = list(ports.values())
+        if kind == "SeriesAdaptorN":
+            return [f"{e}.b = -({' + '.join(f'{q}.b' for q in p)})"]
+        if kind == "ParallelAdaptorN":
+            diffs = [f"d{i + 1}" for i in range(len(p) - 1)]
+            b_temp = " - ".join(f"{e}.port_reflect[{i}] * {d}" for i, d in enumerate(diffs))
+            return [f"{d} = {p[-1]}.b - {q}.b" for d, q in zip(diffs, p)] + [
+                f"{e}.b_diffs = [{', '.join(diffs)}]",
+                f"{e}.b_temp = -{b_temp}",
+                f"{e}.b = {p[-1]}.b + {e}.b_temp",
+            ]
+        return [line.format(e=e, **ports) for line in UP[kind]]
+
+    @staticmethod
+    def _down_lines(kind, element, e, ports, children, accept) -> list:
+        if kind == "RTypeAdaptor":
+            lines = [f"{e}.a_vals[{element.up_port_idx}] = {e}.a", f"{e}.r_type_scatter()"]
+            waves = [f"{e}.b_vals[{element.get_port_idx(i)}]" for i in range(len(children))]
+        elif kind == "SeriesAdaptorN":
+            p = list(ports.values())
+            lines = ["total = " + " + ".join([f"{e}.a"] + [f"{q}.b" for q in p])]
+            lines += [f"b{i + 1} = {q}.b - {e}.port_reflect[{i}] * total" for i, q in enumerate(p[:-1])]
+            waves = [f"b{i + 1}" for i in range(len(p) - 1)]
+            waves.append("0 - (" + " + ".join([f"{e}.a"] + waves) + ")")
+        elif kind == "ParallelAdaptorN":
+            lines = [f"b_last = {e}.a + {e}.b_temp"]
+            waves = [f"{e}.b_diffs[{i}] + b_last" for i in range(len(children) - 1)] + ["b_last"]
+        else:
+            statements, waves = DOWN[kind]
+            lines = [line.format(e=e, **ports) for line in statements]
+            waves = [wave.format(e=e, **ports) for wave in waves]
+        for child, wave in zip(children, waves):
+            lines += accept(child, wave)
+        return lines
+
+    def _source(self, up: list, down: list, top: str) -> str:
+        unpack = "".join(f"    e{i} = elements[{i}]\n" for i in range(self.n_elements))
+        functions = [
+            _function(f"up_{i}", [], lines) for i, lines in enumerate(up)
+        ] + [
+            _function(f"down_{i}", ["w"], lines) for i, lines in enumerate(down)
+        ]
+        sample = [f"root.accept_incident_wave({top}.b)", "w = root.propagate_reflected_wave()"]
+        if len(up) == 1 and len(down) == 1:
+            # small tree: a sample is a single function
+            process = _function("process", ["root=root"], up[0] + sample + down[0])
+        else:
+            process = _function(
+                "process",
+                ["root=root", f"{top}={top}"] + [f"up_{i}=up_{i}" for i in range(len(up))]
+                + [f"down_{i}=down_{i}" for i in range(len(down))],
+                [f"up_{i}()" for i in range(len(up))] + sample
+                + [f"down_{i}(w)" for i in range(len(down))],
+            )
+        up_calls = [f"up_{i}()" for i in range(len(up))] + [f"return {top}.b"]
+        down_calls = [f"down_{i}(w)" for i in range(len(down))]
+        return (
+            "def bind(root, elements):\n"
+            + unpack
+            + "".join(functions)
+            + process
+            + _function("up", [f"{top}={top}"], up_calls, names=False)
+            + _function("down", ["w"], down_calls, names=False)
+            + "    return up, down, process\n"
+        )
+
+    def __getstate__(self) -> dict:
+        # the compiled functions are bound to the elements they were built for: a copy rebuilds its own
+        return {"root": self.root, "topology": self.topology, "version": None}
+
+    def propagate_reflected_wave(self) -> float:
+        """Reflected wave of root.next, computed bottom up."""
+        if self.version != self.topology.version:
+            self.build()
+        return self._up()
+
+    def accept_incident_wave(self, a: float) -> None:
+        """Scatter the incident wave a of root.next down to the leaves."""
+        self._down(a)
+
+    def process(self) -> None:
+        """One sample of the connection tree: root.next up, the root, then root.next down."""
+        if self.version != self.topology.version:
+            self.build()
+        self._process()
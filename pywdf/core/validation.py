@@ -0,0 +1,210 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+import scipy.signal
+
+from .solver.runge_kutta import rk45_solve
+
+
+class ReferenceCache:
+    '''
+    On-disk store of reference trajectories, one .npz file per parameter set.
+    '''
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(**params) -> str:
+        """Stable hash of a set of (JSON serializable) parameters."""
+        text = json.dumps(params, sort_keys=True, default=_to_jsonable)
+        return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+    def path(self, name: str, key: str) -> Path:
+        return self.cache_dir / f"{name}_{key}.npz"
+
+    def load(self, name: str, key: str):
+        path = self.path(name, key)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            return data["t"], data["y"]
+
+    def save(self, name: str, key: str, t: np.ndarray, y: np.ndarray, params: dict) -> None:
+        np.savez(
+            self.path(name, key),
+            t=t,
+            y=y,
+            params=json.dumps(params, sort_keys=True, default=_to_jsonable),
+        )
+
+
+def reference_trajectory(
+    rhs: Callable,
+    y0: np.ndarray,
+    fs: float,
+    n_samples: int,
+    params: dict,
+    cache: ReferenceCache = None,
+    name: str = "reference",
+    rtol: float = 1e-10,
+    atol: float = 1e-12,
+) -> tuple:
+    """Integrate an ODE at the sample instants of a WDF simulation with a high accuracy integrator.
+
+    Args:
+        rhs (Callable): right hand side, dy/dt = rhs(t, y)
+        y0 (np.ndarray): initial state
+        fs (float): sample rate the trajectory is evaluated at
+        n_samples (int): number of samples
+        params (dict): parameters of the ODE, used as part of the cache key
+        cache (ReferenceCache, optional): cache to load from / store to. Defaults to None.
+        name (str, optional): name of the reference, used in the cache file name. Defaults to 'reference'.
+        rtol (float, optional): relative tolerance of the integrator. Defaults to 1e-10.
+        atol (float, optional): absolute tolerance of the integrator. Defaults to 1e-12.
+
+    Returns:
+        tuple: (trajectory of shape (n_samples, dim), True if it was loaded from the cache)
+    """
+    y0 = np.asarray(y0, dtype=float)
+    t = np.arange(n_samples) / fs
+
+    if cache is not None:
+        key_params = dict(params, fs=fs, n_samples=n_samples, y0=y0.tolist(), rtol=rtol, atol=atol)
+        key = cache.make_key(**key_params)
+        cached = cache.load(name, key)
+        if cached is not None:
+            return cached[1], True
+
+    _, y = rk45_solve(rhs, (0.0, t[-1]), y0, rtol=rtol, atol=atol, t_eval=t)
+
+    if cache is not None:
+        cache.save(name, key, t, y, key_params)
+    return y, False
+
+
+def error_metrics(reference: np.ndarray, test: np.ndarray, fs: float, labels: list = None) -> dict:
+    """Compare two trajectories channel by channel.
+
+    Args:
+        reference (np.ndarray): reference signal(s), shape (n_samples,) or (n_samples, n_channels)
+        test (np.ndarray): signal(s) under test, same shape as reference
+        fs (float): sample rate
+        labels (list, optional): channel names. Defaults to 'ch0', 'ch1', ...
+
+    Returns:
+        dict: per channel rms error, relative rms error, max error and log-spectral distance in dB
+    """
+    reference = np.asarray(reference, dtype=float)
+    test = np.asarray(test, dtype=float)
+    if reference.shape != test.shape:
+        raise ValueError(f"Shape mismatch: reference {reference.shape}, test {test.shape}")
+    if reference.ndim == 1:
+        reference, test = reference[:, np.newaxis], test[:, np.newaxis]
+    if labels is None:
+        labels = [f"ch{i}" for i in range(reference.shape[1])]
+
+    window = scipy.signal.windows.hann(reference.shape[0])
+    eps = np.finfo(float).eps
+    metrics = {}
+    for i, label in enumerate(labels):
+        ref, x = reference[:, i], test[:, i]
+        err = x - ref
+        rms = float(np.sqrt(np.mean(err**2)))
+        ref_rms = float(np.sqrt(np.mean(ref**2)))
+        ref_spec = 20 * np.log10(np.abs(np.fft.rfft(window * ref)) + eps)
+        x_spec = 20 * np.log10(np.abs(np.fft.rfft(window * x)) + eps)
+        metrics[label] = {
+            "rms_error": rms,
+            "relative_rms_error": rms / ref_rms if ref_rms > 0 else float("inf"),
+            "max_error": float(np.max(np.abs(err))),
+            "spectral_distance_db": float(np.sqrt(np.mean((ref_spec - x_spec) ** 2))),
+        }
+    return metrics
+
+
+def validate_against_reference(
+    states: np.ndarray,
+    rhs: Callable,
+    fs: float,
+    params: dict,
+    n_skip: int = 1,
+    cache: ReferenceCache = None,
+    name: str = "reference",
+    labels: list = None,
+    rtol: float = 1e-10,
+    atol: float = 1e-12,
+) -> dict:
+    """Validate a WDF state trajectory against the ODE model of the same circuit.
+
+    The reference is started from the WDF state at sample n_skip (i.e. after the excitation),
+    so both trajectories describe the free evolution of the circuit from the same state.
+
+    Args:
+        states (np.ndarray): WDF trajectory, shape (n_samples, dim), in the orientation of the ODE state
+        rhs (Callable): ODE right hand side, dy/dt = rhs(t, y)
+        fs (float): sample rate of the WDF simulation
+        params (dict): ODE parameters, reported in the results and used for caching
+        n_skip (int, optional): number of leading samples (excitation) to skip. Defaults to 1.
+        cache (ReferenceCache, optional): reference cache. Defaults to None.
+        name (str, optional): name of the reference. Defaults to 'reference'.
+        labels (list, optional): names of the state variables. Defaults to None.
+
+    Returns:
+        dict: machine readable results, see error_metrics
+    """
+    states = np.asarray(states, dtype=float)[n_skip:]
+    reference, cache_hit = reference_trajectory(
+        rhs, states[0], fs, len(states), params, cache, name, rtol, atol
+    )
+    return {
+        "name": name,
+        "fs": fs,
+        "n_samples": len(states),
+        "params": params,
+        "reference_cached": cache_hit,
+        "metrics": error_metrics(reference, states, fs, labels),
+    }
+
+
+def run_validation_suite(
+    make_case: Callable,
+    parameter_sets: Iterable,
+    cache_dir: str = None,
+    results_path: str = None,
+) -> list:
+    """Validate a model over many parameter sets.
+
+    Args:
+        make_case (Callable): maps one parameter set to the keyword arguments of
+            validate_against_reference (states, rhs, fs, params, ...)
+        parameter_sets (Iterable): parameter sets to validate
+        cache_dir (str, optional): directory of the reference cache. Defaults to None (no caching).
+        results_path (str, optional): JSON file to write the results to. Defaults to None.
+
+    Returns:
+        list: one results dict per parameter set
+    """
+    cache = ReferenceCache(cache_dir) if cache_dir is not None else None
+    results = [
+        validate_against_reference(cache=cache, **make_case(p)) for p in parameter_sets
+    ]
+    if results_path is not None:
+        save_results(results, results_path)
+    return results
+
+
+def save_results(results, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, default=_to_jsonable)
+
+
+def _to_jsonable(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return repr(value)
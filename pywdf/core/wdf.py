@@ -1,7 +1,10 @@
 from __future__ import annotations
 import numpy as np
 from enum import Enum
+from functools import partial
 import math 
+import weakref
+from .lookup import get_lookup_table
 
 class Transform(Enum):
     BILINEAR = 1
@@ -11,10 +14,26 @@ class Transform(Enum):
     MOBIUS = 5
 
 
+class _Topology:
+    # count of the connection changes below an element, kept out of the element's __dict__
+    # so that it is neither wave state nor a coefficient
+    __slots__ = ("version",)
+
+    def __init__(self) -> None:
+        self.version = 0
+
+
+# {element: _Topology}, only for the elements something watches (flattened roots, folds)
+_topologies = weakref.WeakKeyDictionary()
+
+
 class baseWDF:
     '''
     The base one port object from which all wave digital elements will inherit.
     '''
+    # False for nonlinear elements; a tree of linear elements is an LTI system
+    is_linear = True
+
     def __init__(self) -> None:
         self.a = 0.0
         self.b = 0.0
@@ -25,14 +44,35 @@ class baseWDF:
 
     def connect_to_parent(self, parent: baseWDF) -> None:
         self.parent = parent
+        # every tree above the new parent changed, other connection trees did not
+        element = parent
+        while element is not None:
+            topology = _topologies.get(element)
+            if topology is not None:
+                topology.version += 1
+            element = getattr(element, "parent", None)
+
+    def topology(self) -> _Topology:
+        '''
+        Counter of the elements connected to a new parent in the tree below this one,
+        so that flattened trees know to rebuild. Counting starts with the first call.
+        '''
+        return _topologies.setdefault(self, _Topology())
 
+    @property
+    def topology_version(self) -> int:
+        return self.topology().version
+
+    # copied into traversal.ACCEPT for the leaves inheriting it: keep both in sync
     def accept_incident_wave(self, a: float) -> None:
         self.a = a
 
     def impedance_change(self) -> None:
-        self.calc_impedance()
-        if self.parent != None:
-            self.parent.impedance_change()
+        # walks up the parents in a loop, deep ladders would exceed the recursion limit
+        element = self
+        while element is not None:
+            element.calc_impedance()
+            element = element.parent
 
     def wave_to_voltage(self) -> float:
         return (self.a + self.b) * 0.5
@@ -50,6 +90,31 @@ class baseWDF:
     def propagate_reflected_wave(self) -> float:
         pass
 
+    def get_children(self) -> list:
+        '''Elements connected below this one in the connection tree.'''
+        return []
+
+    def replace_child(self, old: baseWDF, new: baseWDF, update: bool = True) -> None:
+        '''
+        Connect new in place of the child old, e.g. to splice stages into a cascade.
+        With update=False the impedances are not recomputed, so several edits
+        can share a single impedance_change pass.
+        '''
+        for key, value in self.__dict__.items():
+            if key == "parent":
+                continue
+            if value is old:
+                self.__dict__[key] = new
+                break
+            if isinstance(value, list) and any(v is old for v in value):
+                value[[v is old for v in value].index(True)] = new
+                break
+        else:
+            raise ValueError(f"{old.__class__.__name__} is not a child of {self.__class__.__name__}")
+        new.connect_to_parent(self)
+        if update:
+            self.impedance_change()
+
     def __str__(self) -> str:
         return f"{self.__class__.__name__}, ({self.__dict__})"
 
@@ -68,6 +133,9 @@ class rootWDF(baseWDF):
     def connect_to_parent(self, p: baseWDF) -> None:
         raise Exception("Root elements cannot be connected to a parent!")
 
+    def get_children(self) -> list:
+        return [self.next]
+
 
 ####################################################################################
 
@@ -84,9 +152,11 @@ class ShortCircuit(baseWDF):
         self.Rp = 1e-16  # short circuit has zero resistance, here we set it to a very small value
         self.G = 1.0 / self.Rp  # set the conductance to a very large value
 
+    # copied into traversal.ACCEPT: keep both in sync
     def accept_incident_wave(self, a: float) -> None:
         self.a = a
 
+    # copied into traversal.UP: keep both in sync
     def propagate_reflected_wave(self) -> float:
         self.b = -self.a
         return self.b
@@ -106,9 +176,11 @@ class OpenCircuit(baseWDF):
         self.Rp = 1e16  # open circuit has infinite resistance, here we set it to a very large value
         self.G = 1.0 / self.Rp  # set the conductance to a very small value
 
+    # copied into traversal.ACCEPT: keep both in sync
     def accept_incident_wave(self, a: float) -> None:
         self.a = a
 
+    # copied into traversal.UP: keep both in sync
     def propagate_reflected_wave(self) -> float:
         self.b = self.a
         return self.b
@@ -131,6 +203,7 @@ class Resistor(baseWDF):
     def calc_impedance(self) -> None:
         self.G = 1.0 / self.Rp
 
+    # copied into traversal.UP: keep both in sync
     def propagate_reflected_wave(self) -> float:
         self.b = 0
         return self.b
@@ -196,10 +269,12 @@ class Capacitor(baseWDF):
         self.Rp = 1.0 / ( ( 1.0 + self.alpha ) * self.C * self.fs)
         self.G = 1.0 / self.Rp
 
+    # copied into traversal.ACCEPT: keep both in sync
     def accept_incident_wave(self, a: float) -> None:
         self.a = a
         self.z = self.a
 
+    # copied into traversal.UP: keep both in sync
     def propagate_reflected_wave(self) -> float:
         self.b = self.z
         return self.b
@@ -221,6 +296,7 @@ class Inductor(baseWDF):
         alpha: float = 1.0
     ) -> None:
 
+        baseWDF.__init__(self)
         self.fs = fs
         self.L = L
         self.z = 0.0
@@ -253,10 +329,12 @@ class Inductor(baseWDF):
 
         self.G = 1.0 / self.Rp
     
+    # copied into traversal.ACCEPT: keep both in sync
     def accept_incident_wave(self, a: float) -> None:
         self.a = a
         self.z = self.a
 
+    # copied into traversal.UP: keep both in sync
     def propagate_reflected_wave(self) -> float:
         self.b = -self.z
         self.b = self.b_coef * self.b - self.a_coef * self.z
@@ -291,12 +369,14 @@ class ParallelAdaptor(baseWDF):
         self.Rp = 1.0 / self.G
         self.p1_reflect = self.p1.G / self.G
 
+    # copied into traversal.DOWN: keep both in sync
     def accept_incident_wave(self, a: float) -> None:
         b2 = a + self.b_temp
         self.p1.accept_incident_wave(self.b_diff + b2)
         self.p2.accept_incident_wave(b2)
         self.a = a
 
+    # copied into traversal.UP: keep both in sync
     def propagate_reflected_wave(self) -> float:
         self.b_diff = (
             self.p2.propagate_reflected_wave() - self.p1.propagate_reflected_wave()
@@ -305,6 +385,9 @@ class ParallelAdaptor(baseWDF):
         self.b = self.p2.b + self.b_temp
         return self.b
 
+    def get_children(self) -> list:
+        return [self.p1, self.p2]
+
 
 ####################################################################################
 
@@ -324,18 +407,140 @@ class SeriesAdaptor(baseWDF):
         self.G = 1.0 / self.Rp
         self.p1_reflect = self.p1.Rp / self.Rp
 
+    # copied into traversal.DOWN: keep both in sync
     def accept_incident_wave(self, a: float) -> None:
         b1 = self.p1.b - self.p1_reflect * (a + self.p1.b + self.p2.b)
         self.p1.accept_incident_wave(b1)
         self.p2.accept_incident_wave(0 - (a + b1))
         self.a = a
 
+    # copied into traversal.UP: keep both in sync
     def propagate_reflected_wave(self) -> float:
         self.b = -(
             self.p1.propagate_reflected_wave() + self.p2.propagate_reflected_wave()
         )
         return self.b
 
+    def get_children(self) -> list:
+        return [self.p1, self.p2]
+
+
+####################################################################################
+
+
+class ParallelAdaptorN(baseWDF):
+    '''
+    Parallel connection of any number of ports, adapted at the parent port.
+
+    Replaces a chain of two port ParallelAdaptors with a single node: the port
+    reflection coefficients G_i / G are held per port in port_reflect, and the
+    waves of all the ports are scattered in one pass. With two ports the results
+    are identical to ParallelAdaptor.
+    '''
+    def __init__(self, ports: list) -> None:
+        baseWDF.__init__(self)
+        if len(ports) < 2:
+            raise ValueError("ParallelAdaptorN needs at least two ports")
+        self.ports = list(ports)
+        self.b_temp = 0
+        self.b_diffs = [0] * (len(ports) - 1)
+        self.port_reflect = []
+        for port in self.ports:
+            port.connect_to_parent(self)
+        self.calc_impedance()
+
+    def calc_impedance(self) -> None:
+        self.G = self.ports[0].G
+        for port in self.ports[1:]:
+            self.G = self.G + port.G
+        self.Rp = 1.0 / self.G
+        self.port_reflect = [port.G / self.G for port in self.ports]
+
+    # generated inline by traversal.FlatTraversal._down_lines: keep both in sync
+    def accept_incident_wave(self, a: float) -> None:
+        # waves relative to the last port, as in ParallelAdaptor
+        b_last = a + self.b_temp
+        for port, b_diff in zip(self.ports, self.b_diffs):
+            port.accept_incident_wave(b_diff + b_last)
+        self.ports[-1].accept_incident_wave(b_last)
+        self.a = a
+
+    # generated inline by traversal.FlatTraversal._up_lines: keep both in sync
+    def propagate_reflected_wave(self) -> float:
+        waves = [port.propagate_reflected_wave() for port in self.ports]
+        last = waves.pop()
+        self.b_diffs = [last - b for b in waves]
+        b_temp = -self.port_reflect[0] * self.b_diffs[0]
+        for reflect, b_diff in zip(self.port_reflect[1:], self.b_diffs[1:]):
+            b_temp = b_temp - reflect * b_diff
+        self.b_temp = b_temp
+        self.b = last + b_temp
+        return self.b
+
+    def reset(self) -> None:
+        baseWDF.reset(self)
+        self.b_temp = 0
+        self.b_diffs = [0] * (len(self.ports) - 1)
+
+    def get_children(self) -> list:
+        return list(self.ports)
+
+
+####################################################################################
+
+
+class SeriesAdaptorN(baseWDF):
+    '''
+    Series connection of any number of ports, adapted at the parent port.
+
+    Replaces a chain of two port SeriesAdaptors with a single node: the port
+    reflection coefficients R_i / R are held per port in port_reflect, and the
+    waves of all the ports are scattered in one pass. With two ports the results
+    are identical to SeriesAdaptor. Nesting SeriesAdaptors reverses the polarity
+    of the inner ports at every level, here all ports keep the same polarity.
+    '''
+    def __init__(self, ports: list) -> None:
+        baseWDF.__init__(self)
+        if len(ports) < 2:
+            raise ValueError("SeriesAdaptorN needs at least two ports")
+        self.ports = list(ports)
+        self.port_reflect = []
+        for port in self.ports:
+            port.connect_to_parent(self)
+        self.calc_impedance()
+
+    def calc_impedance(self) -> None:
+        self.Rp = self.ports[0].Rp
+        for port in self.ports[1:]:
+            self.Rp = self.Rp + port.Rp
+        self.G = 1.0 / self.Rp
+        self.port_reflect = [port.Rp / self.Rp for port in self.ports]
+
+    # generated inline by traversal.FlatTraversal._down_lines: keep both in sync
+    def accept_incident_wave(self, a: float) -> None:
+        total = a
+        for port in self.ports:
+            total = total + port.b
+        # the last port takes what keeps the loop voltage at zero
+        b_sum = a
+        for port, reflect in zip(self.ports[:-1], self.port_reflect):
+            b = port.b - reflect * total
+            port.accept_incident_wave(b)
+            b_sum = b_sum + b
+        self.ports[-1].accept_incident_wave(0 - b_sum)
+        self.a = a
+
+    # generated inline by traversal.FlatTraversal._up_lines: keep both in sync
+    def propagate_reflected_wave(self) -> float:
+        b = self.ports[0].propagate_reflected_wave()
+        for port in self.ports[1:]:
+            b = b + port.propagate_reflected_wave()
+        self.b = -b
+        return self.b
+
+    def get_children(self) -> list:
+        return list(self.ports)
+
 
 ####################################################################################
 
@@ -359,6 +564,9 @@ class Switch(baseWDF):
     def set_closed(self, closed: bool) -> None:
         self.closed = closed
 
+    def get_children(self) -> list:
+        return [self.next]
+
 
 ####################################################################################
 
@@ -374,14 +582,19 @@ class PolarityInverter(baseWDF):
         self.Rp = self.p1.Rp
         self.G = 1.0 / self.Rp
 
+    # copied into traversal.DOWN: keep both in sync
     def accept_incident_wave(self, a: float) -> None:
         self.a = a
         self.p1.accept_incident_wave(-a)
 
+    # copied into traversal.UP: keep both in sync
     def propagate_reflected_wave(self) -> float:
         self.b = 0 - self.p1.propagate_reflected_wave()
         return self.b
 
+    def get_children(self) -> list:
+        return [self.p1]
+
 
 ####################################################################################
 
@@ -392,6 +605,7 @@ class SeriesVoltage(baseWDF):
         baseWDF.__init__(self)
         p1.connect_to_parent(self)
         self.p1 = p1
+        self.Vs = 0.0
         self.calc_impedance()
 
     def calc_impedance(self) -> None:
@@ -401,14 +615,19 @@ class SeriesVoltage(baseWDF):
     def set_voltage(self, new_V: float) -> None:
         self.Vs = new_V
 
+    # copied into traversal.DOWN: keep both in sync
     def accept_incident_wave(self, a: float) -> None:
         self.a = a
         self.p1.accept_incident_wave( -a + -self.Vs )  # Incident wave is the negative of the voltage source
 
+    # copied into traversal.UP: keep both in sync
     def propagate_reflected_wave(self) -> float:
         self.b = 0 - self.p1.propagate_reflected_wave() + -self.Vs
         return self.b
 
+    def get_children(self) -> list:
+        return [self.p1]
+
 
 
 ####################################################################################
@@ -458,7 +677,8 @@ class IdealCurrentSource(rootWDF):
         self.a = a
 
     def propagate_reflected_wave(self) -> float:
-        self.b = 2.0 * self.Is + self.a
+        # the current Is flows into the positive terminal of next: a wave of 2 * Rp * Is
+        self.b = 2.0 * self.next.Rp * self.Is + self.a
         return self.b
 
 
@@ -485,6 +705,7 @@ class ResistiveVoltageSource(baseWDF):
     def set_voltage(self, new_V: float) -> None:
         self.Vs = new_V
 
+    # copied into traversal.UP: keep both in sync
     def propagate_reflected_wave(self) -> None:
         self.b = self.Vs
         return self.b
@@ -493,6 +714,38 @@ class ResistiveVoltageSource(baseWDF):
 ####################################################################################
 
 
+class ResistiveCurrentSource(baseWDF):
+    def __init__(self, next: baseWDF = None, Rval: float = None) -> None:
+        '''
+        Current source Is with a resistor Rval in parallel (Norton equivalent), adapted to Rval.
+        Like IdealCurrentSource it drives Is out of its positive terminal, but it can be a leaf.
+        '''
+        baseWDF.__init__(self)
+        self.Rval = Rval if Rval else 1e9
+        self.Is = 0
+        self.calc_impedance()
+
+    def set_resistance(self, new_R: float) -> None:
+        if self.Rval != new_R:
+            self.Rval = new_R
+            self.impedance_change()
+
+    def calc_impedance(self) -> None:
+        self.Rp = self.Rval
+        self.G = 1.0 / self.Rp
+
+    def set_current(self, new_I: float) -> None:
+        self.Is = new_I
+
+    # copied into traversal.UP: keep both in sync
+    def propagate_reflected_wave(self) -> float:
+        self.b = self.Rp * self.Is
+        return self.b
+
+
+####################################################################################
+
+
 
 class ChuaDiode(rootWDF):
     """
@@ -500,7 +753,8 @@ class ChuaDiode(rootWDF):
     This class implements a Chua diode model for Wave Digital Filter (WDF) circuits.
     The Chua diode is characterized by a piecewise linear current-voltage relationship.
     """
-    
+    is_linear = False
+
     def __init__(
             self, 
             next: baseWDF, 
@@ -521,6 +775,8 @@ class ChuaDiode(rootWDF):
         """
         rootWDF.__init__(self, next)
         next.connect_to_parent(self)
+        self.table = None
+        self.table_mode = False
         self.set_Chua_parameters(g1, g2, r1, v0)
         
     
@@ -542,6 +798,63 @@ class ChuaDiode(rootWDF):
         self.G1 = (1.0 - g1 * r1) / (1.0 + g1 * r1)
         self.G2 = (1.0 - g2 * r1) / (1.0 + g2 * r1)
         self.a_0 = v0 * (1.0 + g2 * r1)
+        self._update_table()
+
+
+    def set_table_mode(
+            self,
+            enabled: bool = True,
+            a_range: tuple = (-10.0, 10.0),
+            n_points: int = 4097,
+            interpolation: str = "linear",
+        ) -> None:
+        """
+        Evaluate the reflected wave from a precomputed table instead of the closed form.
+        See LookupTable1D for the accuracy of each interpolation mode.
+
+        Args:
+            enabled: use the table when True, the closed form when False
+            a_range: range of incident waves covered by the table
+            n_points: number of table points
+            interpolation: 'linear' or 'cubic'
+        """
+        self.table_mode = enabled
+        self.table_range = a_range
+        self.table_points = n_points
+        self.table_interpolation = interpolation
+        self._update_table()
+
+
+    def _update_table(self) -> None:
+        if not self.table_mode:
+            self.table = None
+            return
+        self.table = get_lookup_table(
+            ("ChuaDiode", self.G1, self.G2, self.a_0),
+            self._exact_reflection(),
+            self.table_range,
+            self.table_points,
+            self.table_interpolation,
+        )
+
+
+    def _exact_reflection(self):
+        return partial(_chua_reflection, G1=self.G1, G2=self.G2, a_0=self.a_0)
+
+
+    def reflect_block(self, a: np.ndarray) -> np.ndarray:
+        """
+        Reflected waves for a block of incident waves, without touching the element state.
+
+        Args:
+            a: array of incident wave values
+
+        Returns:
+            Array of reflected wave values
+        """
+        if self.table is not None:
+            return self.table.evaluate(a)
+        return self._exact_reflection()(np.asarray(a, dtype=float))
 
 
     def calc_impedance(self):
@@ -572,7 +885,10 @@ class ChuaDiode(rootWDF):
         """
         # TODO: g1 and g2 do not need to be calculated for every reflected calculation, just a_0
 
-        
+        if self.table is not None:
+            self.b = self.table(self.a)
+            return self.b
+
         self.b = ( self.G1 * self.a + 0.5 * (self.G2 - self.G1) * (abs( self.a + self.a_0 ) - abs( self.a - self.a_0 )))
         
         return self.b
@@ -583,6 +899,8 @@ class ChuaDiode(rootWDF):
 
 
 class Diode(rootWDF):
+    is_linear = False
+
     def __init__(
         self, 
         next: baseWDF, 
@@ -593,6 +911,8 @@ class Diode(rootWDF):
         
         rootWDF.__init__(self, next)
         next.connect_to_parent(self)
+        self.table = None
+        self.table_mode = False
         self.set_diode_params(Is, Vt, n_diodes)
 
 
@@ -614,8 +934,72 @@ class Diode(rootWDF):
         self.two_R_Is = 2.0 * self.next.Rp * self.Is
         self.R_Is_over_Vt = self.next.Rp * self.Is * self.one_over_Vt
         self.logR_Is_over_Vt = np.log(self.R_Is_over_Vt)
+        self._update_table()
+
+    def set_table_mode(
+        self,
+        enabled: bool = True,
+        a_range: tuple = (-10.0, 10.0),
+        n_points: int = 4097,
+        interpolation: str = "linear",
+    ) -> None:
+        """
+        Evaluate the reflected wave from a precomputed table of b(a) instead of the Wright Omega
+        approximation. Tables are rebuilt (or fetched from the shared LRU cache) whenever the
+        diode parameters or the port impedance change. See LookupTable1D for accuracy figures.
+
+        Args:
+            enabled (bool, optional): use the table when True, the closed form when False. Defaults to True.
+            a_range (tuple, optional): range of incident waves covered by the table. Defaults to (-10, 10).
+            n_points (int, optional): number of table points. Defaults to 4097.
+            interpolation (str, optional): 'linear' or 'cubic'. Defaults to 'linear'.
+        """
+        self.table_mode = enabled
+        self.table_range = a_range
+        self.table_points = n_points
+        self.table_interpolation = interpolation
+        self._update_table()
+
+    def _update_table(self) -> None:
+        if not self.table_mode:
+            self.table = None
+            return
+        self.table = get_lookup_table(
+            (self.__class__.__name__, self.Is, self.Vt / self.n_diodes, self.n_diodes, self.next.Rp),
+            self._exact_reflection(),
+            self.table_range,
+            self.table_points,
+            self.table_interpolation,
+        )
+
+    def _exact_reflection(self):
+        return partial(
+            _diode_reflection,
+            two_R_Is=self.two_R_Is,
+            Vt=self.Vt,
+            one_over_Vt=self.one_over_Vt,
+            logR_Is_over_Vt=self.logR_Is_over_Vt,
+            R_Is_over_Vt=self.R_Is_over_Vt,
+        )
+
+    def reflect_block(self, a: np.ndarray) -> np.ndarray:
+        """
+        Reflected waves for a block of incident waves, without touching the element state.
+
+        Args:
+            a (np.ndarray): incident wave values
+
+        Returns:
+            np.ndarray: reflected wave values
+        """
+        if self.table is not None:
+            return self.table.evaluate(a)
+        return self._exact_reflection()(np.asarray(a, dtype=float))
 
     def propagate_reflected_wave(self) -> float:
+        if self.table is not None:
+            self.b = self.table(self.a)
+            return self.b
         self.b = (
             self.a
             + self.two_R_Is
@@ -631,6 +1015,9 @@ class Diode(rootWDF):
         4th order approximation of Wright Omega function
         y = 3rd order approx, is used in calculation of 4th
         """
+        if isinstance(x, np.ndarray):
+            # one value per Monte Carlo instance
+            return omega4_block(x)
         x1 = -3.341459552768620
         x2 = 8.0
         a = -1.314293149877800e-3
@@ -656,7 +1043,18 @@ class DiodePair(Diode):
     ) -> None:
         Diode.__init__(self, next, Is, Vt, n_diodes)
 
+    def _exact_reflection(self):
+        return partial(
+            _diode_pair_reflection,
+            Vt=self.Vt,
+            one_over_Vt=self.one_over_Vt,
+            logR_Is_over_Vt=self.logR_Is_over_Vt,
+        )
+
     def propagate_reflected_wave(self) -> float:
+        if self.table is not None:
+            self.b = self.table(self.a)
+            return self.b
         lam = np.sign(self.a)
         lam_a_over_Vt = lam * self.a * self.one_over_Vt
         self.b = self.a - (2 * self.Vt) * lam * (
@@ -664,3 +1062,44 @@ class DiodePair(Diode):
             - self.omega4(self.logR_Is_over_Vt - lam_a_over_Vt)
         )
         return self.b
+
+
+####################################################################################
+
+
+def omega4_block(x: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of Diode.omega4, the 4th order Wright Omega approximation.
+    """
+    x = np.asarray(x, dtype=float)
+    x1 = -3.341459552768620
+    x2 = 8.0
+    a = -1.314293149877800e-3
+    b = 4.775931364975583e-2
+    c = 3.631952663804445e-1
+    d = 6.313183464296682e-1
+    y = np.where(
+        x < x1,
+        0.0,
+        np.where(x < x2, d + x * (c + x * (b + x * a)), x - np.log(np.maximum(x, x2))),
+    )
+    return y - (y - np.exp(x - y)) / (y + 1)
+
+
+def _chua_reflection(a, G1, G2, a_0):
+    return G1 * a + 0.5 * (G2 - G1) * (np.abs(a + a_0) - np.abs(a - a_0))
+
+
+def _diode_reflection(a, two_R_Is, Vt, one_over_Vt, logR_Is_over_Vt, R_Is_over_Vt):
+    return a + two_R_Is - (2.0 * Vt) * omega4_block(
+        logR_Is_over_Vt + a * one_over_Vt + R_Is_over_Vt
+    )
+
+
+def _diode_pair_reflection(a, Vt, one_over_Vt, logR_Is_over_Vt):
+    lam = np.sign(a)
+    lam_a_over_Vt = lam * a * one_over_Vt
+    return a - (2 * Vt) * lam * (
+        omega4_block(logR_Is_over_Vt + lam_a_over_Vt)
+        - omega4_block(logR_Is_over_Vt - lam_a_over_Vt)
+    )
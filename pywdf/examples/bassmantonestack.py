@@ -30,8 +30,7 @@ class BassmanToneStack(Circuit):
         self.C1 = Capacitor(0.25e-9, fs)
         self.R1_plus = Resistor(self.R1max * 0.5)
         self.R1_minus = Resistor(self.R1max * 0.5)
-        self.SR1 = SeriesAdaptor(self.R1_plus, self.R1_minus)
-        self.Sb = SeriesAdaptor(self.SR1, self.C1)
+        self.Sb = SeriesAdaptorN([self.R1_plus, self.R1_minus, self.C1])
 
         # Port C
         self.R4 = Resistor(56.0e3)
@@ -97,7 +96,8 @@ class BassmanToneStack(Circuit):
             self.treble = new_treble
 
     def process_sample(self, sample: float):
-        return super().process_sample(sample) + \
+        # R1_minus is a port of Sb itself, not of a nested series adaptor, so its polarity is reversed
+        return super().process_sample(sample) - \
                 self.R1_minus.wave_to_voltage() + \
                 self.R3_plus.wave_to_voltage() + \
                 self.R2.wave_to_voltage()
@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.integrate import solve_ivp
 import matplotlib.pyplot as plt
 
 from pathlib import Path
@@ -10,6 +9,8 @@ src_dir = script_path.parent.parent
 
 sys.path.append(str(src_dir))
 
+from core.solver.runge_kutta import rk45_solve
+
 plt_dir = src_dir.parent / "tests" / "plots"
 plt_dir.mkdir(exist_ok=True, parents=True)
 
@@ -25,24 +26,23 @@ m1 = -0.714
 def f(x):
     return m1 * x + 0.5 * (m0 - m1) * (np.abs(x + 1) - np.abs(x - 1))
 
-# Chua's system (ODE)
+# Chua's system (ODE), vectorized over the last axis so ensembles of states can be integrated at once
 def chua(t, state):
-    x, y, z = state
+    x, y, z = state[..., 0], state[..., 1], state[..., 2]
     dx = alpha * (y - x - f(x))     # x – Voltage across C1
     dy = x - y + z                  # y – Voltage across C2   
     dz = -beta * y                  # z – Current through L
-    return [dx, dy, dz]
+    return np.stack([dx, dy, dz], axis=-1)
 
 # Simulation
 t_span = (0, 150)
 t_eval = np.linspace(*t_span, 10000)
 initial_state = [0.1, 0.0, 0.0]
 
-# method='RK45' (default) explicit Runge-Kutta method of order 5(4)
-sol = solve_ivp(chua, t_span, initial_state, t_eval=t_eval)
+# explicit Runge-Kutta method of order 5(4) (Dormand-Prince)
+t, sol = rk45_solve(chua, t_span, initial_state, rtol=1e-3, atol=1e-6, t_eval=t_eval)
 
-t = sol.t
-x, y, z = sol.y
+x, y, z = sol.T
 
 # Plot time series of x, y, z
 plt.figure(figsize=(6, 6))
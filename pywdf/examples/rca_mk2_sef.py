@@ -10,6 +10,7 @@ sys.path.append(parent)
 from core.wdf import *
 from core.rtype import *
 from core.circuit import Circuit
+from core.stepped import SteppedParameters
 
 class HighPassStage:
 
@@ -147,6 +148,10 @@ class RCA_MK2_SEF(Circuit):
             999999 : {'C' : 1e-15, 'L' : 1e-15}
         }
 
+        # (cutoff, {'C', 'L'}) per knob position
+        self.HP_positions = list(self.HP_vals.items())
+        self.LP_positions = list(self.LP_vals.items())
+
         self.fs = sample_rate
 
         self.Z_input = 560
@@ -170,26 +175,19 @@ class RCA_MK2_SEF(Circuit):
 
     def build_circuit(self): 
 
+        self.knobs = None
+
         # LOW PASS STAGES
-        first_stage = LowPassStage(self.Rt, self.fs, self.C_LP, self.L_LP, self.k)
-        self.LP_stages = [first_stage]
+        self.LP_stages = [self.make_LP_stage(self.Rt)]
 
         for i in range(1, self.num_LP_stages):
-            connection = self.LP_stages[i - 1].S5
-            stage = LowPassStage(connection, self.fs, self.C_LP, self.L_LP, self.k)
-            self.LP_stages.append(stage)
-        
-        self.S8 = SeriesAdaptor(self.LP_stages[-1].L_LPm2, self.Rt) 
+            self.LP_stages.append(self.make_LP_stage(self.LP_stages[i - 1].S5))
 
         # HIGH PASS STAGES
-        connection = self.LP_stages[-1].S5
-        first_stage = HighPassStage(connection, fs = self.fs, C_HP = self.C_HP, L_HP = self.L_HP, k = self.k)
-        self.HP_stages = [first_stage]
+        self.HP_stages = [self.make_HP_stage(self.LP_stages[-1].S5)]
 
         for i in range(1, self.num_HP_stages):
-            connection = self.HP_stages[i - 1].S0
-            stage = HighPassStage(connection, fs = self.fs, C_HP = self.C_HP, L_HP = self.L_HP, k = self.k)
-            self.HP_stages.append(stage)
+            self.HP_stages.append(self.make_HP_stage(self.HP_stages[i - 1].S0))
 
         # INPUT STAGE
         self.S1 = SeriesAdaptor(self.HP_stages[-1].C_HPm1, self.HP_stages[-1].P1)
@@ -203,17 +201,77 @@ class RCA_MK2_SEF(Circuit):
 
         super().__init__(self.Vin, self.Vin, self.Rt)
 
+        self.build_knob_table()
+
+    def make_LP_stage(self, connection):
+        return LowPassStage(connection, self.fs, self.C_LP, self.L_LP, self.k)
+
+    def make_HP_stage(self, connection):
+        return HighPassStage(connection, fs = self.fs, C_HP = self.C_HP, L_HP = self.L_HP, k = self.k)
+
+    def build_knob_table(self):
+        '''
+        Set up the stored adaptor coefficients of the knob positions, so that turning a knob
+        swaps them in instead of recomputing impedances. Each knob's table is built when it
+        is first turned.
+        '''
+        self.knobs = SteppedParameters(self, {
+            'lowpass' : ('_apply_lowpass_knob_position', len(self.LP_positions)),
+            'highpass' : ('_apply_highpass_knob_position', len(self.HP_positions)),
+        })
 
 
     def set_num_LP_stages(self, nstages):
+        '''
+        Grow or shrink the low pass cascade in place: existing stages are kept, new stages
+        get the current components, and a single impedance pass updates the tree.
+        '''
         assert nstages > 0
+        if nstages == self.num_LP_stages:
+            return
+
+        old_last = self.LP_stages[-1]
+
+        while len(self.LP_stages) < nstages:
+            stage = self.make_LP_stage(self.LP_stages[-1].S5)
+            stage.set_components(self.C_LP, self.L_LP, self.lowpass_mod, self.k)
+            self.LP_stages.append(stage)
+        del self.LP_stages[nstages:]
         self.num_LP_stages = nstages
-        self.build_circuit()
+
+        # new stages are up to date on their own, so one pass from the splice point suffices
+        self.HP_stages[0].S4.replace_child(old_last.S5, self.LP_stages[-1].S5)
+        self.knobs.invalidate()
 
     def set_num_HP_stages(self, nstages):
+        '''
+        Grow or shrink the high pass cascade in place, see set_num_LP_stages.
+        '''
         assert nstages > 0
+        if nstages == self.num_HP_stages:
+            return
+
+        grown = nstages > self.num_HP_stages
+        old_last = self.HP_stages[-1]
+        # the last stage's S0 is bypassed by the input adaptor S1, give it its children back
+        old_last.P1.connect_to_parent(old_last.S0)
+        old_last.C_HPm1.connect_to_parent(old_last.S0)
+
+        while len(self.HP_stages) < nstages:
+            stage = self.make_HP_stage(self.HP_stages[-1].S0)
+            stage.set_components(self.C_HP, self.L_HP, self.highpass_mod, self.k)
+            self.HP_stages.append(stage)
+        del self.HP_stages[nstages:]
         self.num_HP_stages = nstages
-        self.build_circuit()
+
+        new_last = self.HP_stages[-1]
+        self.S1.replace_child(old_last.C_HPm1, new_last.C_HPm1, update=False)
+        self.S1.replace_child(old_last.P1, new_last.P1, update=False)
+
+        # a grown cascade is updated from the old last stage's S0, which was bypassed until now
+        deepest = old_last.S0 if grown else self.S1
+        deepest.impedance_change()
+        self.knobs.invalidate()
 
 
     def set_HP_components(self):
@@ -236,17 +294,23 @@ class RCA_MK2_SEF(Circuit):
     def set_lowpass_knob_position(self, pos):
         assert pos >= 0 and pos < len(self.LP_vals)
 
-        self.lowpass_cutoff, vals = list(self.LP_vals.items())[pos]
+        self.knobs.select(lowpass=pos)
+
+    def set_highpass_knob_position(self,pos):
+        assert pos >= 0 and pos < len(self.HP_vals)
+
+        self.knobs.select(highpass=pos)
+
+    def _apply_lowpass_knob_position(self, pos):
+        self.lowpass_cutoff, vals = self.LP_positions[pos]
         self.C_LP = vals['C']
         self.L_LP = vals['L']
 
         for stage in self.LP_stages:
             stage.set_components(self.C_LP, self.L_LP, self.lowpass_mod, self.k)
 
-    def set_highpass_knob_position(self,pos):
-        assert pos >= 0 and pos < len(self.HP_vals)
-
-        self.highpass_cutoff, vals = list(self.HP_vals.items())[pos]        
+    def _apply_highpass_knob_position(self, pos):
+        self.highpass_cutoff, vals = self.HP_positions[pos]
         self.C_HP = vals['C']
         self.L_HP = vals['L']
 
@@ -261,30 +325,36 @@ class RCA_MK2_SEF(Circuit):
     def set_highpass_cutoff(self, new_cutoff):
         self.highpass_cutoff = new_cutoff
         self.set_HP_components()
+        self.knobs.forget('highpass')
 
     def set_lowpass_cutoff(self, new_cutoff):
         self.lowpass_cutoff = new_cutoff
         self.set_LP_components()
+        self.knobs.forget('lowpass')
 
     def set_highpass_mod(self, mod):
         if self.highpass_mod != mod:
             self.highpass_mod = mod
             self.set_HP_components()
+            self.knobs.invalidate()
 
     def set_lowpass_mod(self, mod):
         if self.set_lowpass_mod != mod:
             self.lowpass_mod = mod
             self.set_LP_components()
+            self.knobs.invalidate()
 
     def set_Z_input(self, new_Z):
         if self.Z_input != new_Z:
             self.Z_input = new_Z
             self.Rin.set_resistance(new_Z)
+            self.knobs.invalidate()
 
     def set_Z_output(self, new_Z):
         if self.Z_output != new_Z:
             self.Z_output = new_Z
             self.Rt.set_resistance(new_Z)
+            self.knobs.invalidate()
 
 
 
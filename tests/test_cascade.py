@@ -0,0 +1,46 @@
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_cascade.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import RCA_MK2_SEF
+
+
+def rebuilt(num_LP_stages, num_HP_stages):
+    mk2 = RCA_MK2_SEF(44100, 300, 3000)
+    mk2.num_LP_stages = num_LP_stages
+    mk2.num_HP_stages = num_HP_stages
+    mk2.build_circuit()
+    return mk2
+
+
+def test_incremental_stages_match_rebuild():
+    x = np.random.default_rng(3).standard_normal(1024)
+    mk2 = RCA_MK2_SEF(44100, 300, 3000)
+    first_LP, first_HP = mk2.LP_stages[0], mk2.HP_stages[0]
+
+    for n_LP, n_HP in [(3, 1), (3, 4), (2, 4), (2, 2), (1, 1)]:
+        mk2.set_num_LP_stages(n_LP)
+        mk2.set_num_HP_stages(n_HP)
+        assert len(mk2.LP_stages) == n_LP and len(mk2.HP_stages) == n_HP
+        assert mk2.LP_stages[0] is first_LP and mk2.HP_stages[0] is first_HP
+        assert np.allclose(mk2.process_signal(x), rebuilt(n_LP, n_HP).process_signal(x))
+
+
+def test_knobs_after_changing_stages():
+    x = np.random.default_rng(4).standard_normal(1024)
+    mk2 = RCA_MK2_SEF(44100, 300, 3000)
+    mk2.set_lowpass_knob_position(4)
+    mk2.set_num_LP_stages(3)
+    kept = mk2.LP_stages[:2]
+    mk2.set_num_LP_stages(2)
+    assert mk2.LP_stages == kept
+
+    reference = rebuilt(2, 1)
+    reference.set_lowpass_knob_position(6)
+    mk2.set_lowpass_knob_position(6)
+    assert np.allclose(mk2.process_signal(x), reference.process_signal(x))
@@ -0,0 +1,67 @@
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_control.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import BaxandallEQ, DiodeClipper, RCA_MK2_SEF
+from pywdf.core.control import ParameterController
+from pywdf.core.realtime import RealtimeEngine, NullAudioDevice
+
+
+def test_swap_matches_direct_setter():
+    x = np.random.default_rng(1).standard_normal(512)
+    live = BaxandallEQ(44100, 0.5, 0.5)
+    controller = ParameterController(live)
+    controller.update("set_bass", 0.2)
+    controller.update("set_treble", 0.8)
+
+    # nothing changes on the live circuit until the swap
+    assert live.bass == 0.5
+    assert controller.swap()
+    assert not controller.swap()
+    assert live.bass == 0.2 and live.treble == 0.8
+
+    reference = BaxandallEQ(44100, 0.2, 0.8)
+    assert np.allclose(live.process_signal(x), reference.process_signal(x))
+
+
+def test_swap_keeps_wave_state():
+    live = RCA_MK2_SEF(44100, 1000, 5000)
+    reference = RCA_MK2_SEF(44100, 1000, 5000)
+    x = np.random.default_rng(2).standard_normal(600)
+    controller = ParameterController(live)
+    controller.update("set_lowpass_knob_position", 3)
+    reference.reset()
+    live.reset()
+
+    y_ref = [reference.process_sample(s) for s in x[:300]]
+    y = [live.process_sample(s) for s in x[:300]]
+    reference.set_lowpass_knob_position(3)
+    controller.swap()
+    y_ref += [reference.process_sample(s) for s in x[300:]]
+    y += [live.process_sample(s) for s in x[300:]]
+    assert np.allclose(y, y_ref)
+
+
+def test_control_thread_with_realtime_engine():
+    fs = 44100
+    x = 0.5 * np.sin(2 * np.pi * 220 * np.arange(1024) / fs)
+    live = DiodeClipper(fs)
+    controller = ParameterController(live)
+    controller.start()
+    controller.submit("set_cutoff", 2000.0)
+    controller.submit("set_input_gain", 6.0)
+    controller.stop()
+
+    engine = RealtimeEngine(live, block_size=64, controller=controller)
+    y = engine.run(NullAudioDevice(fs, 128, x))
+    assert live.cutoff == 2000.0 and live.input_gain_db == 6.0
+    assert live.R1 is not controller.shadow.R1
+    assert np.isclose(live.R1.Rp, controller.shadow.R1.Rp)
+
+    reference = DiodeClipper(fs, cutoff=2000.0, input_gain_db=6.0).process_signal(x)
+    assert np.allclose(y[64:], reference[:-64])
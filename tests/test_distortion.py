@@ -0,0 +1,39 @@
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_distortion.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import DiodeClipper, RCLowPass
+from pywdf.core.distortion import coherent_frequency
+from pywdf.core.montecarlo import thd
+
+
+def test_clipper_distortion_grid():
+    fs = 44100
+    clipper = DiodeClipper(fs)
+    levels = [0.1, 0.5, 2.0, 8.0]
+    result = clipper.distortion_analysis([200, 1000], levels, imd_freqs=(60, 7000))
+    assert result.thd.shape == result.thd_n.shape == (2, 4) and result.imd.shape == (4,)
+    assert np.all(np.diff(result.thd, axis=1) > 0) and np.all(np.diff(result.imd) > 0)
+    assert np.all(result.thd_n >= result.thd * (1 - 1e-9))
+    assert len(result.rows()) == 8 and len(result.table().splitlines()) == 9
+
+    # a long windowed measurement agrees with the short coherent one
+    f = result.freqs[1]
+    assert f == coherent_frequency(1000, fs, 4096) and round(f * 4096 / fs) % 2 == 1
+    y = DiodeClipper(fs).process_signal(2.0 * np.sin(2 * np.pi * f * np.arange(fs) / fs))
+    assert np.isclose(result.thd[1, 2], thd(y[fs // 10 :], fs, f), rtol=1e-3)
+
+    single = clipper.distortion_analysis([200, 1000], levels, imd_freqs=(60, 7000), batch=False)
+    assert np.allclose(single.thd, result.thd) and np.allclose(single.imd, result.imd)
+    pooled = clipper.distortion_analysis([200, 1000], levels, imd_freqs=(60, 7000), batch=False, n_workers=2)
+    assert np.allclose(pooled.thd, result.thd) and np.allclose(pooled.imd, result.imd)
+
+
+def test_linear_circuit_does_not_distort():
+    result = RCLowPass(48000, cutoff=1000).distortion_analysis([100, 1000], [0.5, 4.0], imd_freqs=(60, 7000))
+    assert np.all(result.thd < 1e-9) and np.all(result.thd_n < 1e-9) and np.all(result.imd < 1e-9)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_linear.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import BaxandallEQ, DiodeClipper, RCLowPass
+from pywdf.core import linear
+from pywdf.core.linear import convolve_parallel, truncate_impulse_response
+
+
+def test_truncation_keeps_requested_energy():
+    h = 0.5 ** np.arange(200)
+    t = truncate_impulse_response(h, energy=1 - 1e-12)
+    assert len(t) < 30
+    assert np.sum(t**2) >= (1 - 1e-12) * np.sum(h**2)
+    assert len(truncate_impulse_response(np.zeros(10), min_length=4)) == 4
+
+
+def test_parallel_convolution_matches_direct():
+    rng = np.random.default_rng(5)
+    x, h = rng.standard_normal(10000), rng.standard_normal(300)
+    expected = np.convolve(x, h)[: len(x)]
+    assert np.allclose(convolve_parallel(x, h, n_workers=1), expected)
+    assert np.allclose(convolve_parallel(x, h, n_workers=2, segment_length=1500), expected)
+
+
+def test_short_inputs_stay_in_process(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("process pool started")
+
+    monkeypatch.setattr(linear, "ProcessPoolExecutor", no_pool)
+    monkeypatch.setattr(linear.os, "cpu_count", lambda: 8)
+    rng = np.random.default_rng(6)
+    x, h = rng.standard_normal(50000), rng.standard_normal(300)
+    assert np.allclose(convolve_parallel(x, h), np.convolve(x, h)[: len(x)])
+    monkeypatch.setattr(linear, "PARALLEL_MIN_SAMPLES", len(x))
+    with pytest.raises(AssertionError, match="pool"):
+        convolve_parallel(x, h)
+
+
+def test_linear_render_matches_sample_by_sample():
+    x = np.random.default_rng(6).standard_normal(4000)
+    eq = BaxandallEQ(44100, 0.3, 0.6)
+    y = eq.process_signal_linear(x, n_workers=2, max_ir_duration=0.5)
+    y_ref = eq.process_signal(x)
+    assert np.allclose(y, y_ref, atol=1e-5)
+    # a stricter energy criterion keeps a longer response and lowers the error
+    y = eq.process_signal_linear(x, n_workers=2, max_ir_duration=0.5, energy=1 - 1e-14)
+    assert np.allclose(y, y_ref, atol=1e-7)
+
+    lp = RCLowPass(44100, 1000)
+    h = lp.__dict__.get("_linear_ir")
+    assert h is None
+    lp.process_signal_linear(x, n_workers=1)
+    cached = lp._linear_ir
+    lp.process_signal_linear(x, n_workers=1)
+    assert lp._linear_ir is cached
+    lp.set_cutoff(2000)
+    y = lp.process_signal_linear(x, n_workers=1)
+    assert lp._linear_ir is not cached
+    assert np.allclose(y, lp.process_signal(x), atol=1e-4)
+
+
+def test_nonlinear_circuits_are_rejected():
+    with pytest.raises(ValueError):
+        DiodeClipper(44100).process_signal_linear(np.zeros(10))
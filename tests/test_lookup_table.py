@@ -0,0 +1,75 @@
+import pickle
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_lookup_table.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf.core.wdf import Resistor, Capacitor, ParallelAdaptor, DiodePair, ChuaDiode
+from pywdf.core.lookup import LookupTableND, table_cache
+
+
+def make_diode_pair():
+    R1 = Resistor(3386.0)
+    C1 = Capacitor(47e-9, 44100)
+    P1 = ParallelAdaptor(R1, C1)
+    return R1, DiodePair(P1, 2.52e-9)
+
+
+def test_diode_pair_table_matches_closed_form():
+    _, dp = make_diode_pair()
+    a = np.linspace(-12, 12, 2001)  # also covers the out-of-range fallback
+    exact = dp.reflect_block(a)
+
+    dp.set_table_mode(interpolation="linear")
+    assert np.max(np.abs(dp.reflect_block(a) - exact)) < 1e-4
+    dp.set_table_mode(interpolation="cubic")
+    assert np.max(np.abs(dp.reflect_block(a) - exact)) < 1e-6
+
+    for value, expected in zip(a[::50], exact[::50]):
+        dp.accept_incident_wave(value)
+        assert abs(dp.propagate_reflected_wave() - expected) < 1e-6
+
+
+def test_tables_are_shared_and_rebuilt_on_impedance_change():
+    table_cache.clear()
+    R1, dp1 = make_diode_pair()
+    _, dp2 = make_diode_pair()
+    dp1.set_table_mode()
+    dp2.set_table_mode()
+    assert dp1.table is dp2.table
+    assert len(table_cache) == 1
+
+    R1.set_resistance(1000.0)
+    assert dp1.table is not dp2.table
+    assert len(table_cache) == 2
+
+
+def test_chua_table_is_exact_away_from_breakpoints():
+    chua = ChuaDiode(Resistor(569.2), g1=-500.0e-6, g2=-800.0e-6, v0=1.0, r1=569.2)
+    a = np.linspace(-5, 5, 1001)
+    exact = chua.reflect_block(a)
+    chua.set_table_mode(n_points=1001)
+    away = np.abs(np.abs(a) - chua.a_0) > 0.01
+    assert np.allclose(chua.reflect_block(a)[away], exact[away], atol=1e-12)
+
+
+def test_nd_table_is_exact_for_multilinear_functions():
+    def func(x):
+        return np.stack([x[:, 0] * x[:, 1] + 2 * x[:, 0], np.sin(x[:, 0]) + x[:, 1]], -1)
+
+    # a nonuniform first axis
+    table = LookupTableND(func, [np.array([-2.0, -0.5, 0.0, 0.1, 1.0, 3.0]), np.linspace(-1, 1, 5)])
+    x = np.random.default_rng(3).uniform(-3.5, 3.5, (200, 2))
+    inside = (x[:, 0] >= -2) & (x[:, 0] <= 3) & (np.abs(x[:, 1]) <= 1)
+    y = table.evaluate(x)
+    assert np.allclose(y[:, 0], func(x)[:, 0], atol=1e-12)
+    assert np.allclose(y[~inside], func(x[~inside]), atol=1e-12)
+    assert np.allclose([table(point) for point in x], y, atol=1e-12)
+
+    copy = pickle.loads(pickle.dumps(table))
+    assert copy.func is None and np.array_equal(copy.evaluate(x[inside]), y[inside])
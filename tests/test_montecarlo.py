@@ -0,0 +1,51 @@
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_montecarlo.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import BassmanToneStack, DiodeClipper
+from pywdf.core.montecarlo import thd
+
+
+def test_instances_match_scalar_circuits():
+    x = np.random.default_rng(6).standard_normal(500)
+    nominal = BassmanToneStack(44100, 0.3, 0.5, 0.7)
+    mc = nominal.monte_carlo(16, seed=1)
+    y = mc.process_signal(x)
+    assert y.shape == (500, 16)
+    for k in (0, 9):
+        assert np.allclose(y[:, k], mc.instance(k).process_signal(x))
+
+    # the nominal circuit is untouched and the draws are reproducible
+    assert np.isscalar(nominal.C1.C)
+    again = nominal.monte_carlo(16, seed=1)
+    assert np.array_equal(again.values["C1"][1], mc.values["C1"][1])
+    assert np.allclose(again.process_signal(x), y)
+
+
+def test_tolerance_overrides():
+    mc = BassmanToneStack(44100, 0.5, 0.5, 0.5).monte_carlo(
+        200, tolerances={"Resistor": 0.0, "C2": 0.2}, seed=2
+    )
+    assert np.all(mc.values["R4"][1] == 56.0e3)
+    spread = np.std(mc.values["C2"][1]) / 20.0e-9
+    assert 0.07 < spread < 0.13
+    freqs, p = mc.magnitude_percentiles((5, 50, 95), fft_size=2**12)
+    assert p.shape == (3, len(freqs))
+    assert np.all(p[0] <= p[1]) and np.all(p[1] <= p[2])
+
+
+def test_thd_distribution():
+    fs = 44100
+    mc = DiodeClipper(fs, cutoff=5000, input_gain_db=10).monte_carlo(8, tolerances={"Diode": 0.6}, seed=3)
+    distortion = mc.thd(f0=500, duration=0.1, settle=0.05)
+    assert distortion.shape == (8,)
+    assert np.all(distortion > 0.1) and np.ptp(distortion) > 0
+
+    t = np.arange(int(0.15 * fs)) / fs
+    y = mc.instance(5).process_signal(np.sin(2 * np.pi * 500 * t))
+    assert np.isclose(distortion[5], thd(y[int(0.05 * fs) :], fs, 500))
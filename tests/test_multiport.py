@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+from scipy.optimize import brentq, fsolve
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_multiport.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf.core.circuit import Circuit
+from pywdf.core.lookup import table_nd_cache
+from pywdf.core.multiport import BJTPort, MultiPortRoot, NonlinearRTypeAdaptor
+from pywdf.core.netlist import Netlist, NetlistCircuit, RTypeImpedance
+from pywdf.core.wdf import ResistiveVoltageSource
+
+FS = 44100
+R, C = 4.7e3, 47e-9
+D1 = (2.52e-9, 25.85e-3)
+D2 = (1e-8, 40e-3)
+
+
+def asymmetric_clipper(**options):
+    netlist = Netlist()
+    netlist.add("Vin", "in", "0")
+    netlist.add("R1", "in", "out", R)
+    netlist.add("C1", "out", "0", C)
+    netlist.add("D1", "out", "0", D1[0], Vt=D1[1])
+    netlist.add("D2", "0", "out", D2[0], Vt=D2[1])
+    circuit = NetlistCircuit(netlist, FS, "C1")
+    for name, value in options.items():
+        setattr(circuit.root.solver, name, value)
+    return circuit
+
+
+def clipper_reference(x):
+    """Nodal analysis of the clipper, capacitor discretised with the trapezoidal rule like Capacitor."""
+    g_c, history, y = 2 * C * FS, 0.0, []
+    for sample in x:
+        def kcl(v):
+            diodes = D1[0] * np.expm1(v / D1[1]) - D2[0] * np.expm1(-v / D2[1])
+            return (sample - v) / R - (g_c * v - history) - diodes
+
+        v = brentq(kcl, -5, 5, xtol=1e-14)
+        history = g_c * v + (g_c * v - history)
+        y.append(v)
+    return np.array(y)
+
+
+def test_asymmetric_diodes_match_nodal_analysis():
+    circuit = asymmetric_clipper()
+    assert isinstance(circuit.root, MultiPortRoot) and circuit.D1 is circuit.root is circuit.D2
+    x = 3 * np.sin(2 * np.pi * 200 * np.arange(1000) / FS)
+    y = circuit.process_signal(x)
+    assert np.allclose(y, clipper_reference(x), atol=1e-9)
+    assert y.max() < -y.min()
+
+    with pytest.raises(ValueError, match="D1"):
+        NetlistCircuit(circuit.netlist, FS, "D1")
+
+
+def test_jacobian_reuse_and_iteration_counts():
+    x = 3 * np.sin(2 * np.pi * 200 * np.arange(1000) / FS)
+    full = asymmetric_clipper(reuse_jacobian=False, iteration_counts=[])
+    reused = asymmetric_clipper(iteration_counts=[])
+    assert np.allclose(reused.process_signal(x), full.process_signal(x), atol=1e-9)
+
+    full, reused = full.root.solver, reused.root.solver
+    assert len(reused.iteration_counts) == len(x) and reused.failures == full.failures == 0
+    assert full.jacobian_updates == sum(full.iteration_counts)
+    assert reused.jacobian_updates < full.jacobian_updates / 2
+
+
+def test_bjt_operating_point():
+    bjt = BJTPort()
+    v = np.array([0.65, -4.0])
+    step = 1e-7
+    numeric = np.array([(bjt.current(v + step * e) - bjt.current(v - step * e)) / (2 * step) for e in np.eye(2)]).T
+    assert np.allclose(bjt.conductance(v), numeric, rtol=1e-6)
+
+    # common emitter: base fed from the input through Rb, collector from a 9 V supply through Rc
+    Rb, Rc, Vin, Vcc = 100e3, 4.7e3, 1.0, 9.0
+    source, supply = ResistiveVoltageSource(Rval=Rb), ResistiveVoltageSource(Rval=Rc)
+    supply.set_voltage(Vcc)
+    impedance = RTypeImpedance([("b", "0"), ("b", "c")], [("b", "0"), ("c", "0")])
+    root = MultiPortRoot(NonlinearRTypeAdaptor([source, supply], impedance, 2), [bjt])
+    circuit = Circuit(source, root, supply)
+    for _ in range(3):
+        vc = circuit.process_sample(Vin)
+
+    def kcl(nodes):
+        vb, vc = nodes
+        i_be, i_bc = bjt.current(np.array([vb, vb - vc]))
+        return [(Vin - vb) / Rb - (i_be + i_bc), (Vcc - vc) / Rc + i_bc]
+
+    vb_ref, vc_ref = fsolve(kcl, [0.6, 5.0], xtol=1e-13)
+    assert np.isclose(vc, vc_ref, atol=1e-6) and np.isclose(root.a[0] + root.b[0], 2 * vb_ref, atol=1e-6)
+
+
+def test_table_mode(tmp_path):
+    # two diode stages: a 2-D table of the incident waves
+    netlist = Netlist()
+    netlist.add("Vin", "in", "0")
+    netlist.add("R1", "in", "a", 1e3)
+    netlist.add("C1", "a", "0", 22e-9)
+    netlist.add("D1", "a", "0", D1[0], Vt=D1[1])
+    netlist.add("R2", "a", "b", 10e3)
+    netlist.add("C2", "b", "0", 10e-9)
+    netlist.add("D2", "b", "0", D2[0], Vt=D2[1])
+    circuit = NetlistCircuit(netlist, FS, "C2")
+    x = 2 * np.sin(2 * np.pi * 300 * np.arange(1000) / FS)
+    y = circuit.process_signal(x)
+
+    table_nd_cache.clear()
+    table_nd_cache.set_cache_dir(tmp_path)
+    try:
+        circuit.root.set_table_mode(c_range=(-4, 4), n_points=49)
+        assert circuit.root.table.shape == (49, 49)
+        assert np.allclose(circuit.process_signal(x), y, atol=0.05)
+        c = np.array([[0.5, -0.2], [1.0, 0.3]]) @ circuit.root.basis.T
+        assert np.allclose(circuit.root.reflect_block(c), [circuit.root.table(row @ circuit.root.basis) for row in c])
+
+        # shared by equal circuits, and loaded back from disk
+        table_nd_cache.clear()
+        other = NetlistCircuit(netlist, FS, "C2")
+        other.root.set_table_mode(c_range=(-4, 4), n_points=49)
+        assert table_nd_cache.disk_hits == 1
+        other.enable_flat_traversal()
+        assert np.array_equal(other.process_signal(x), circuit.process_signal(x))
+    finally:
+        table_nd_cache.set_cache_dir(None)
+        table_nd_cache.clear()
+
+    # the antiparallel diodes of the clipper only see one dimension of incident waves
+    clipper = asymmetric_clipper()
+    x = 3 * np.sin(2 * np.pi * 200 * np.arange(1000) / FS)
+    y = clipper.process_signal(x)
+    clipper.root.set_table_mode(c_range=(-8, 8), n_points=1025)
+    assert clipper.root.basis.shape == (2, 1)
+    assert np.allclose(clipper.process_signal(x), y, atol=5e-3)
@@ -0,0 +1,185 @@
+import numpy as np
+import pytest
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_netlist.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import BassmanToneStack, BaxandallEQ, DiodeClipper
+from pywdf.core.netlist import Netlist, NetlistCircuit
+from pywdf.core.rtype import RTypeAdaptor
+from pywdf.core.wdf import DiodePair, ParallelAdaptor, ResistiveVoltageSource
+
+
+def bridge():
+    netlist = Netlist()
+    netlist.add("Vin", "in", "0")
+    netlist.add("Rs", "in", "a", 1e3)
+    netlist.add("R1", "a", "b", 2.2e3)
+    netlist.add("R2", "a", "c", 4.7e3)
+    netlist.add("R3", "b", "0", 10e3)
+    netlist.add("R4", "c", "0", 1e3)
+    netlist.add("C5", "b", "c", 100e-9)
+    return netlist
+
+
+def bassman(bts):
+    """Netlist of a BassmanToneStack, with its component values, each oriented as its port."""
+    netlist = Netlist()
+    netlist.add("Vin", "in", "0")
+    netlist.add("C1", "in", "c", bts.C1.C)
+    netlist.add("R1_plus", "c", "w", bts.R1_plus.Rp)
+    netlist.add("R1_minus", "w", "t", bts.R1_minus.Rp)
+    netlist.add("R4", "s", "in", bts.R4.Rp)
+    netlist.add("C2", "t", "s", bts.C2.C)
+    netlist.add("C3", "m", "s", bts.C3.C)
+    netlist.add("R2", "t", "f", bts.R2.Rp)
+    netlist.add("R3_plus", "f", "m", bts.R3_plus.Rp)
+    netlist.add("R3_minus", "0", "m", bts.R3_minus.Rp)
+    return netlist
+
+
+def baxandall(eq):
+    """Netlist of a BaxandallEQ, with its component values; the output is across Rl."""
+    netlist = Netlist()
+    netlist.add("Vin", "in", "0")
+    netlist.add("Ca", "in", "a", eq.Ca.C)
+    netlist.add("Cd", "0", "d", eq.Cd.C)
+    netlist.add("RPt_plus", "d", "b", eq.Pt_plus.Rp)
+    netlist.add("Resd", "d", "b", eq.Resd.Rp)
+    netlist.add("Rl", "a", "b", eq.Rl.Rp)
+    netlist.add("Ce", "a", "e", eq.Ce.C)
+    netlist.add("RPt_minus", "e", "b", eq.Pt_minus.Rp)
+    netlist.add("Rese", "e", "b", eq.Rese.Rp)
+    netlist.add("Resc", "b", "c", eq.Resc.Rp)
+    netlist.add("Resb", "a", "f", eq.Resb.Rp)
+    netlist.add("RPb_minus", "f", "c", eq.Pb_minus.Rp)
+    netlist.add("Cc", "f", "c", eq.Cc.C)
+    netlist.add("Resa", "0", "g", eq.Resa.Rp)
+    netlist.add("RPb_plus", "g", "c", eq.Pb_plus.Rp)
+    netlist.add("Cb", "g", "c", eq.Cb.C)
+    return netlist
+
+
+def trapezoidal_reference(netlist, fs, x, output):
+    """Nodal analysis of a linear RC netlist with the trapezoidal rule, the discretisation of Capacitor."""
+    nodes = sorted({n for c in netlist.components for n in c.nodes} - {"0"})
+    index = {n: i for i, n in enumerate(nodes)}
+    size = len(nodes) + 1
+    G = np.zeros((size, size))
+
+    def stamp(c, g):
+        for n, s in zip(c.nodes, (1, -1)):
+            for m, t in zip(c.nodes, (1, -1)):
+                if n in index and m in index:
+                    G[index[n], index[m]] += s * t * g
+
+    for c in netlist.components:
+        if c.kind == "R":
+            stamp(c, 1 / c.value)
+        elif c.kind == "C":
+            stamp(c, 2 * c.value * fs)
+        elif c.kind == "V":
+            G[-1, index[c.nodes[0]]] = G[index[c.nodes[0]], -1] = 1
+    caps = [c for c in netlist.components if c.kind == "C"]
+    history = {c.name: 0.0 for c in caps}
+    y = []
+    for sample in x:
+        rhs = np.zeros(size)
+        rhs[-1] = sample
+        for c in caps:
+            for n, s in zip(c.nodes, (1, -1)):
+                if n in index:
+                    rhs[index[n]] += s * history[c.name]
+        v = np.linalg.solve(G, rhs)
+        for c in caps:
+            volt = sum(s * v[index[n]] for n, s in zip(c.nodes, (1, -1)) if n in index)
+            current = 2 * c.value * fs * volt - history[c.name]
+            history[c.name] = 2 * c.value * fs * volt + current
+        out = netlist[output]
+        y.append(sum(s * v[index[n]] for n, s in zip(out.nodes, (1, -1)) if n in index))
+    return np.array(y)
+
+
+def test_matches_hand_built_diode_clipper():
+    fs = 44100
+    clipper = DiodeClipper(fs, cutoff=1000)
+    netlist = Netlist()
+    netlist.add("Vin", "in", "0")
+    netlist.add("R1", "in", "out", clipper.R)
+    netlist.add("C1", "out", "0", 47e-9)
+    netlist.add("D1", "out", "0", 2.52e-9, n_diodes=2)
+    netlist.add("D2", "0", "out", 2.52e-9, n_diodes=2)
+    circuit = NetlistCircuit(netlist, fs, "C1")
+
+    # the diode pair is the root, the input source absorbs R1
+    assert isinstance(circuit.root, DiodePair) and circuit.D2 is circuit.root
+    assert isinstance(circuit.root.next, ParallelAdaptor)
+    assert isinstance(circuit.source, ResistiveVoltageSource) and circuit.source.Rp == clipper.R
+
+    x = 3 * np.sin(2 * np.pi * 200 * np.arange(2000) / fs)
+    assert np.allclose(circuit.process_signal(x), clipper.process_signal(x), atol=1e-9)
+
+
+def test_bridge_becomes_one_r_type_adaptor():
+    fs = 48000
+    netlist = bridge()
+    circuit = NetlistCircuit(netlist, fs, "C5")
+    r_types = [e for e in circuit.get_elements() if isinstance(e, RTypeAdaptor)]
+    assert len(r_types) == 1 and r_types[0].n_ports == 6
+    assert abs(r_types[0].S_matrix[0, 0]) < 1e-12
+
+    x = np.random.default_rng(14).standard_normal(300)
+    assert np.allclose(circuit.process_signal(x), trapezoidal_reference(netlist, fs, x, "C5"), atol=1e-12)
+    # the output follows the netlist polarity of C5, whichever way the tree connects it
+    assert np.allclose(
+        NetlistCircuit(netlist, fs, "R4").process_signal(x), trapezoidal_reference(netlist, fs, x, "R4"), atol=1e-12
+    )
+
+    mc = circuit.monte_carlo(4, seed=5)
+    assert np.allclose(mc.process_signal(x)[:, 2], mc.instance(2).process_signal(x))
+
+
+def test_r_type_examples_match_nodal_analysis():
+    # the up port wave of an R-type adaptor is that of the current sample's scattering
+    fs = 48000
+    x = np.random.default_rng(9).standard_normal(300)
+
+    bts = BassmanToneStack(fs, 0.3, 0.6, 0.7)
+    netlist = bassman(bts)
+    names = [c.name for c in netlist.components if c.kind != "V"]
+    for flat in (False, True):
+        if flat:
+            bts.enable_flat_traversal()
+        bts.reset()
+        voltages = np.empty((len(x), len(names)))
+        for n, sample in enumerate(x):
+            bts.process_sample(sample)
+            voltages[n] = [getattr(bts, name).wave_to_voltage() for name in names]
+        for i, name in enumerate(names):
+            assert np.allclose(voltages[:, i], trapezoidal_reference(netlist, fs, x, name), atol=1e-12), name
+
+    eq = BaxandallEQ(fs, 0.3, 0.7)
+    expected = trapezoidal_reference(baxandall(eq), fs, x, "Rl")
+    assert np.allclose(eq.process_signal(x), expected, atol=1e-12)
+    eq.enable_flat_traversal()
+    assert np.allclose(eq.process_signal(x), expected, atol=1e-12)
+
+
+def test_invalid_netlists():
+    netlist = bridge()
+    netlist.add("R9", "b", "open", 1e3)
+    with pytest.raises(ValueError, match="R9"):
+        NetlistCircuit(netlist, 44100, "C5")
+
+    # a diode across the ideal source
+    netlist = Netlist()
+    netlist.add("Vin", "a", "0")
+    netlist.add("R1", "a", "b", 1e3)
+    netlist.add("C1", "b", "0", 1e-7)
+    netlist.add("D1", "a", "0")
+    with pytest.raises(ValueError, match="series"):
+        NetlistCircuit(netlist, 44100, "C1")
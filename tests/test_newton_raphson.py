@@ -8,7 +8,7 @@ from pathlib import Path
 if __package__ is None or __package__ == "":
     sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from pywdf.core.solver.newton_raphson import newton_raphson
+from pywdf.core.solver.newton_raphson import newton_raphson, newton_raphson_batch
 # Example 1: Find the square root of 2 (root of x^2 - 2 = 0)
 def f1(x):
     return x**2 - 2
@@ -104,4 +104,34 @@ try:
     print("Plotted Newton-Raphson steps for x² - 2 = 0...")
     
 except ImportError:
-    print("Matplotlib not available for plotting visualization")
\ No newline at end of file
+    print("Matplotlib not available for plotting visualization")
+
+
+# Batched examples: every lane is an independent root-finding problem
+def test_batch_square_roots():
+    targets = np.array([2.0, 3.0, 10.0, 0.25])
+    roots, iterations, converged = newton_raphson_batch(
+        lambda x: x**2 - targets, lambda x: 2 * x, np.ones(4)
+    )
+    assert converged.all()
+    assert np.allclose(roots, np.sqrt(targets))
+    assert (iterations > 0).all()
+
+
+def test_batch_bad_lane_does_not_abort():
+    # the second lane starts on a vanishing derivative and can never move
+    roots, iterations, converged = newton_raphson_batch(f1, df1, np.array([1.0, 0.0, -1.0]))
+    assert list(converged) == [True, False, True]
+    assert np.isclose(roots[0], np.sqrt(2)) and np.isclose(roots[2], -np.sqrt(2))
+    assert iterations[1] == 0
+
+
+def test_batch_damped_and_line_search():
+    x0 = np.full(3, 1.5)
+    plain, it_plain, ok_plain = newton_raphson_batch(f2, df2, x0)
+    damped, it_damped, ok_damped = newton_raphson_batch(f2, df2, x0, damping=0.5, max_iterations=200)
+    searched, _, ok_searched = newton_raphson_batch(f2, df2, x0, line_search=True)
+    assert ok_plain.all() and ok_damped.all() and ok_searched.all()
+    assert np.allclose(damped, plain, atol=1e-8) and np.allclose(searched, plain)
+    assert (it_damped > it_plain).all()
+
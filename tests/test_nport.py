@@ -0,0 +1,71 @@
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_nport.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import BassmanToneStack
+from pywdf.core.circuit import Circuit
+from pywdf.core.wdf import (
+    Capacitor,
+    IdealVoltageSource,
+    ParallelAdaptor,
+    ParallelAdaptorN,
+    Resistor,
+    SeriesAdaptor,
+    SeriesAdaptorN,
+)
+
+
+def network(n_port, fs=44100):
+    """RC network built with N-port adaptors or with the equivalent chains of two port adaptors."""
+    R = [Resistor(100.0 * (i + 1)) for i in range(3)]
+    C = [Capacitor(1e-7 * (i + 1), fs) for i in range(3)]
+    if n_port:
+        P = ParallelAdaptorN([C[0], R[1], C[1]])
+        S = SeriesAdaptorN([P, R[0], C[2], R[2]])
+    else:
+        P = ParallelAdaptor(ParallelAdaptor(C[0], R[1]), C[1])
+        # nesting series adaptors reverses the polarity of the inner ports
+        S = SeriesAdaptor(SeriesAdaptor(SeriesAdaptor(P, R[0]), C[2]), R[2])
+    source = IdealVoltageSource(S)
+    return Circuit(source, source, C[1])
+
+
+def test_matches_two_port_chains():
+    x = np.random.default_rng(9).standard_normal(500)
+    chain, n_port = network(False), network(True)
+    assert np.isclose(chain.root.next.Rp, n_port.root.next.Rp)
+    assert np.allclose(n_port.process_signal(x), chain.process_signal(x), atol=1e-12)
+
+    # parameter changes propagate through the N-port impedances
+    chain.output.set_capacitance(4e-7)
+    n_port.output.set_capacitance(4e-7)
+    assert np.allclose(n_port.process_signal(x), chain.process_signal(x), atol=1e-12)
+
+    n_port.reset()
+    expected = n_port.process_signal(x)
+    n_port.reset()
+    n_port.enable_flat_traversal()
+    assert np.array_equal(n_port.process_signal(x), expected)
+
+
+def test_two_ports_identical_to_binary_adaptors():
+    x = np.random.default_rng(10).standard_normal(300)
+    for binary, n_port in ((SeriesAdaptor, SeriesAdaptorN), (ParallelAdaptor, ParallelAdaptorN)):
+        outputs = []
+        for make in (lambda p1, p2: binary(p1, p2), lambda p1, p2: n_port([p1, p2])):
+            C = Capacitor(1e-6, 44100)
+            source = IdealVoltageSource(make(Resistor(1e3), C))
+            outputs.append(Circuit(source, source, C).process_signal(x))
+        assert np.array_equal(outputs[0], outputs[1])
+
+
+def test_monte_carlo_lanes():
+    x = np.random.default_rng(11).standard_normal(300)
+    mc = BassmanToneStack(44100, 0.3, 0.5, 0.7).monte_carlo(8, seed=4)
+    y = mc.process_signal(x)
+    assert np.allclose(y[:, 3], mc.instance(3).process_signal(x))
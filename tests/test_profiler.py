@@ -0,0 +1,43 @@
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_profiler.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import BaxandallEQ, RCA_MK2_SEF
+
+
+def test_profiling_counts_and_restores_elements():
+    eq = BaxandallEQ(44100, 0.5, 0.5)
+    x = np.random.default_rng(0).standard_normal(256)
+    y_ref = eq.process_signal(x)
+
+    profiler = eq.enable_profiling()
+    eq.set_bass(0.25)
+    eq.set_bass(0.5)
+    y = eq.process_signal(x)
+
+    assert np.allclose(y, y_ref)
+    assert profiler.count("propagate_reflected_wave", "R_adaptor") == len(x)
+    assert profiler.count("accept_incident_wave", "Rl") == len(x)
+    assert profiler.count("set_S_matrix") >= 2
+    assert profiler.count("impedance_change", "Pb_minus") == 2
+
+    classes = {row["class"]: row for row in profiler.by_class()}
+    assert classes["Resistor"]["elements"] == 10
+    assert "RTypeAdaptor" in profiler.report("class")
+
+    stacks = profiler.folded_stacks().splitlines()
+    assert any(line.startswith("S1.accept_incident_wave;R_adaptor.accept_incident_wave") for line in stacks)
+
+    eq.disable_profiling()
+    assert all("propagate_reflected_wave" not in e.__dict__ for e in eq.get_elements())
+    assert np.allclose(eq.process_signal(x), y_ref)
+
+
+def test_element_names_cover_stage_objects():
+    names = set(RCA_MK2_SEF(44100, 1000, 5000).get_element_names().values())
+    assert {"Vin", "Rt", "HP_stages[0].P1", "LP_stages[0].S5"} <= names
@@ -0,0 +1,73 @@
+import numpy as np
+from scipy.io import wavfile
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_realtime.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import DiodeClipper, BassmanToneStack
+from pywdf.core.realtime import RingBuffer, RealtimeEngine, NullAudioDevice, FileAudioDevice
+
+
+def test_ring_buffer_wraps_around():
+    ring = RingBuffer(5)
+    out = np.zeros(3)
+    assert ring.write(np.arange(4.0)) == 4
+    assert ring.read_into(out) == 3 and list(out) == [0, 1, 2]
+    assert ring.write(np.arange(4.0, 9.0)) == 4  # one sample does not fit
+    assert ring.read_into(out) == 3 and list(out) == [3, 4, 5]
+    assert ring.read_into(out) == 2 and list(out) == [6, 7, 0]
+
+
+def test_engine_output_is_delayed_by_one_block():
+    fs, block = 44100, 32
+    x = 0.5 * np.sin(2 * np.pi * 440 * np.arange(2000) / fs)
+    reference = DiodeClipper(fs).process_signal(x)
+
+    engine = RealtimeEngine(DiodeClipper(fs), block_size=block)
+    # host buffers that are not a multiple of the block size
+    y = engine.run(NullAudioDevice(fs, frames_per_buffer=100, signal=x))
+
+    assert np.allclose(y[block:], reference[:-block])
+    assert np.all(y[:block] == 0)
+    stats = engine.report()
+    assert stats["callbacks"] == 20 and stats["underruns"] == 0
+    assert stats["deadline_ms"] > 0
+
+
+def test_parameter_changes_apply_at_block_boundaries():
+    fs, block = 44100, 64
+    circuit = BassmanToneStack(fs, 0.5, 0.5, 0.5)
+    engine = RealtimeEngine(circuit, block_size=block)
+    calls = []
+    original = circuit.set_treble
+
+    def set_treble(value):
+        calls.append(engine.input_ring.read_pos)
+        original(value)
+
+    out = np.zeros(100)
+    engine.process(np.zeros(100), out)
+    engine.set_parameter(set_treble, 0.9)
+    engine.set_parameter("set_bass", 0.1)
+    assert len(engine.parameters) == 2
+    engine.process(np.zeros(100), out)
+    assert calls == [block] and len(engine.parameters) == 0
+    assert circuit.treble == 0.9 and circuit.bass == 0.1
+
+
+def test_file_device_round_trip(tmp_path):
+    fs = 44100
+    x = (0.25 * np.sin(2 * np.pi * 1000 * np.arange(4096) / fs) * 32767).astype(np.int16)
+    wavfile.write(tmp_path / "in.wav", fs, x)
+
+    engine = RealtimeEngine(DiodeClipper(fs), block_size=64)
+    y = engine.run(FileAudioDevice(tmp_path / "in.wav", tmp_path / "out.wav", 512))
+
+    fs_out, y_file = wavfile.read(tmp_path / "out.wav")
+    assert fs_out == fs and y_file.dtype == np.float32
+    assert np.allclose(y_file, y, atol=1e-6)
+    assert np.max(np.abs(y)) > 0
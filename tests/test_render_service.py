@@ -0,0 +1,56 @@
+import asyncio
+import numpy as np
+from scipy.io import wavfile
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_render_service.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import DiodeClipper
+from pywdf.core.render_service import RenderJob, RenderService, jobs_from_lines, render
+
+
+def write_input(path, fs=44100, n=2048):
+    x = 0.5 * np.sin(2 * np.pi * 220 * np.arange(n) / fs)
+    wavfile.write(path, fs, x.astype(np.float32))
+    return x.astype(np.float32).astype(float)
+
+
+def test_render_applies_automation_at_sample_positions():
+    fs = 44100
+    x = np.random.default_rng(3).standard_normal(1000)
+    y = render(DiodeClipper(fs), x, [[500 / fs, "set_cutoff", 3000.0]])
+
+    reference = DiodeClipper(fs)
+    reference.reset()
+    y_ref = [reference.process_sample(s) for s in x[:500]]
+    reference.set_cutoff(3000.0)
+    y_ref += [reference.process_sample(s) for s in x[500:]]
+    assert np.allclose(y, y_ref)
+
+
+def test_service_renders_jobs_and_reports_failures(tmp_path):
+    x = write_input(tmp_path / "in.wav")
+    lines = [
+        '{"circuit": "DiodeClipper", "kwargs": {"sample_rate": 44100, "cutoff": 2000},'
+        f' "input_path": "{tmp_path / "in.wav"}", "output_path": "{tmp_path / "out" / "a.wav"}",'
+        ' "automation": [[0.01, "set_input_gain", 6.0]], "job_id": "a"}',
+        "",
+    ]
+    jobs = jobs_from_lines(lines)
+    jobs.append(RenderJob(DiodeClipper, {"sample_rate": 44100}, tmp_path / "missing.wav", tmp_path / "b.wav", job_id="b"))
+
+    events = []
+    results = asyncio.run(RenderService(max_workers=2, max_io=1).run(jobs, events.append))
+
+    status = {r["job_id"]: r["status"] for r in results}
+    assert status == {"a": "written", "b": "failed"}
+    assert [e["status"] for e in events if e["job_id"] == "a"] == ["started", "rendered", "written"]
+    assert events[-1]["done"] == events[-1]["total"] == 2
+
+    fs, y = wavfile.read(tmp_path / "out" / "a.wav")
+    expected = render(DiodeClipper(44100, cutoff=2000), x, [[0.01, "set_input_gain", 6.0]])
+    assert fs == 44100 and np.allclose(y, expected, atol=1e-6)
@@ -0,0 +1,65 @@
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_response_cache.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import RCA_MK2_SEF, RCLowPass
+from pywdf.core.cache import ResponseCache
+
+
+def test_responses_are_reused_per_parameter_set():
+    cache = ResponseCache(maxsize=8)
+    mk2 = RCA_MK2_SEF(44100, 1000, 5000)
+    mk2.response_cache = cache
+
+    h3 = mk2.get_impulse_response(0.05)
+    mk2.set_lowpass_knob_position(5)
+    h5 = mk2.get_impulse_response(0.05)
+    assert cache.misses == 2 and cache.hits == 0
+    assert not np.allclose(h3, h5)
+
+    mk2.set_lowpass_knob_position(3)
+    mk2.set_lowpass_knob_position(5)
+    assert np.array_equal(mk2.get_impulse_response(0.05), h5)
+    assert cache.hits == 1
+
+    # same values on another instance hit the cache, returned arrays are copies
+    other = RCA_MK2_SEF(44100, 1000, 5000)
+    other.response_cache = cache
+    other.set_lowpass_knob_position(5)
+    h = other.get_impulse_response(0.05)
+    assert cache.hits == 2
+    h[:] = 0
+    assert np.array_equal(other.get_impulse_response(0.05), h5)
+
+
+def test_cache_key_covers_alpha_and_sample_rate():
+    cache = ResponseCache()
+    lp = RCLowPass(44100, 1000)
+    lp.response_cache = cache
+    h = lp.get_impulse_response(0.01)
+    lp.C1.setAlpha(0.5)
+    assert not np.allclose(lp.get_impulse_response(0.01), h)
+    lp.C1.setAlpha(1.0)
+    lp.set_sample_rate(48000)
+    assert len(lp.get_impulse_response(0.01)) == 480
+    assert cache.hits == 0 and len(cache) == 3
+
+    lp.response_cache = None
+    assert len(lp.get_impulse_response(0.01)) == 480
+    assert len(cache) == 3
+
+
+def test_disk_cache(tmp_path):
+    lp = RCLowPass(44100, 1000)
+    lp.response_cache = ResponseCache(cache_dir=tmp_path)
+    H = lp.compute_spectrum(1024)
+    assert len(list(tmp_path.glob("*.npy"))) == 2  # spectrum and impulse response
+
+    lp.response_cache = ResponseCache(cache_dir=tmp_path)
+    assert np.array_equal(lp.compute_spectrum(1024), H)
+    assert lp.response_cache.disk_hits == 1
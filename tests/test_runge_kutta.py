@@ -9,7 +9,7 @@ from pathlib import Path
 if __package__ is None or __package__ == "":
     sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from pywdf.core.solver.runge_kutta import rk4_solve
+from pywdf.core.solver.runge_kutta import rk4_solve, rk4_solve_ensemble, rk45_solve
 
 # Example 1: Simple exponential decay dy/dt = -2y, y(0) = 1
 def example1():
@@ -151,6 +151,40 @@ def example2():
     print("Results saved to 'rk4_example2_results.csv'")
 
 
+def harmonic_oscillator(t, state):
+    return np.stack([state[..., 1], -state[..., 0]], axis=-1)
+
+
+def test_rk4_ensemble_matches_single_runs():
+    y0 = np.array([[1.0, 0.0], [0.0, 1.0], [0.5, -0.5]])
+    t_ens, y_ens = rk4_solve_ensemble(harmonic_oscillator, (0, 2), y0, 0.01)
+    assert y_ens.shape == (len(t_ens), 3, 2)
+    for i in range(len(y0)):
+        _, y_single = rk4_solve(harmonic_oscillator, (0, 2), y0[i], 0.01)
+        assert np.allclose(y_ens[:, i], y_single, atol=1e-13)
+
+    t_sub, y_sub = rk4_solve_ensemble(harmonic_oscillator, (0, 2), y0, 0.01, save_every=10)
+    assert np.allclose(t_sub, t_ens[::10])
+    assert np.allclose(y_sub, y_ens[::10])
+
+
+def test_rk45_adaptive_accuracy():
+    t, y = rk45_solve(lambda t, y: -2 * y, (0, 2), 1.0, rtol=1e-8, atol=1e-10)
+    assert np.isclose(t[-1], 2.0)
+    assert np.max(np.abs(y - np.exp(-2 * t))) < 1e-7
+    # far fewer steps than the fixed step solver needs for the same accuracy
+    assert len(t) < 200
+
+
+def test_rk45_dense_output_and_ensembles():
+    t_eval = np.linspace(0, 4 * np.pi, 501)
+    y0 = np.array([[1.0, 0.0], [2.0, 0.0]])
+    t, y = rk45_solve(harmonic_oscillator, (0, 4 * np.pi), y0, rtol=1e-10, atol=1e-12, t_eval=t_eval)
+    assert y.shape == (501, 2, 2)
+    assert np.allclose(y[:, 0, 0], np.cos(t_eval), atol=1e-8)
+    assert np.allclose(y[:, 1, 0], 2 * np.cos(t_eval), atol=1e-8)
+
+
 if __name__ == "__main__":
     print("RK4 Method Examples")
     print("=" * 50)
@@ -0,0 +1,53 @@
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_simplify.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import BassmanToneStack, BaxandallEQ
+
+
+def test_folds_match_full_tree():
+    x = np.random.default_rng(12).standard_normal(1000)
+    eq, reference = BaxandallEQ(44100, 0.3, 0.6), BaxandallEQ(44100, 0.3, 0.6)
+    folds = eq.simplify()
+    assert [fold.subtree for fold in folds] == [eq.P4, eq.P5]
+    assert folds[0].Rp == eq.P4.Rp
+    assert np.array_equal(eq.process_signal(x), reference.process_signal(x))
+
+    # setters reach the resistors inside the folds
+    eq.set_treble(0.1)
+    reference.set_treble(0.1)
+    assert folds[0].Rp == eq.P4.Rp
+    assert np.array_equal(eq.process_signal(x), reference.process_signal(x))
+
+    traversal = reference.enable_flat_traversal()
+    n_elements = traversal.n_elements
+    assert eq.enable_flat_traversal().n_elements == n_elements - 4
+    assert np.array_equal(eq.process_signal(x), reference.process_signal(x))
+
+    eq.expand()
+    assert eq.S4.p2 is eq.P4 and eq.P4.parent is eq.S4
+    assert np.array_equal(eq.process_signal(x), reference.process_signal(x))
+    assert eq.traversal.n_elements == n_elements
+
+
+def test_probed_and_reactive_subtrees_expand():
+    x = np.random.default_rng(13).standard_normal(500)
+    # BassmanToneStack reads the voltages of R2 and R3_plus, below Sf
+    stack = BassmanToneStack(44100, 0.3, 0.5, 0.7)
+    (fold,) = stack.simplify()
+    assert fold.subtree is stack.Sf
+    assert np.array_equal(stack.process_signal(x), BassmanToneStack(44100, 0.3, 0.5, 0.7).process_signal(x))
+    assert stack.R_adaptor.down_ports[4] is stack.Sf
+
+    eq = BaxandallEQ(44100, 0.5, 0.5)
+    eq.simplify()
+    # the examples import the element classes as core.wdf
+    Capacitor = type(eq.Ce)
+    eq.P5.replace_child(eq.Rese, Capacitor(1e-9, 44100))
+    assert eq.S5.p2 is eq.P5 and eq.P5.parent is eq.S5
+    assert eq.S5.Rp == eq.Ce.Rp + eq.P5.Rp
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_spice.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import DiodeClipper
+from pywdf.core import spice
+from pywdf.core.netlist import NetlistCircuit
+from pywdf.core.spice import decomposition_cache, load_spice, parse_spice, spice_circuit
+from pywdf.core.wdf import IdealCurrentSource, ResistiveCurrentSource
+
+CLIPPER = """diode clipper
+* input filter
+.param rin=4.7k cin={ 1 / (2 * pi * 1k * rin) }
+Vin in 0 DC 0 AC 1
+R1 in out {rin}   ; series resistor
+C1 out 0 {cin}
+.model 1N4148 D(IS=2.52n N=2)
+D1 out 0 1N4148
+D2 0
++ out 1n4148
+.tran 1u 10m
+.end
+"""
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    decomposition_cache.clear()
+    decomposition_cache.set_cache_dir(tmp_path)
+    yield tmp_path
+    decomposition_cache.set_cache_dir(None)
+    decomposition_cache.clear()
+
+
+def test_values_and_parameters():
+    netlist = parse_spice(CLIPPER)
+    assert [c.name for c in netlist.components] == ["Vin", "R1", "C1", "D1", "D2"]
+    assert netlist["D2"].nodes == ("0", "out")
+    assert netlist["R1"].value == 4.7e3
+    assert np.isclose(netlist["C1"].value, 1 / (2 * np.pi * 1e3 * 4.7e3))
+    assert netlist["D1"].value == 2.52e-9 and np.isclose(netlist["D1"].params["Vt"], 2 * 25.85e-3)
+
+    # overrides apply to the expressions using them
+    netlist = parse_spice(CLIPPER, {"RIN": 1e3})
+    assert netlist["R1"].value == 1e3 and np.isclose(netlist["C1"].value, 1 / (2 * np.pi * 1e6))
+
+    values = parse_spice("values\nV1 a 0\nR1 a b 2.2meg\nR2 b c 10mOhm\nC1 c 0 4.7uF\nL1 c 0 '2 ^ 3 * 1m'\n")
+    assert [c.value for c in values.components[1:]] == [2.2e6, 10e-3, 4.7e-6, 8e-3]
+
+    with pytest.raises(ValueError, match="Q1"):
+        parse_spice("transistor\nQ1 c b e 2N3904\n")
+    with pytest.raises(ValueError, match="subckt"):
+        parse_spice("subcircuit\n.subckt stage in out\n")
+    with pytest.raises(ValueError, match="gain"):
+        parse_spice("unknown\nR1 a 0 {gain * 1k}\n")
+
+
+def test_matches_hand_built_diode_clipper():
+    fs = 44100
+    clipper = DiodeClipper(fs, cutoff=1000)
+    circuit = spice_circuit(CLIPPER, fs, "C1", {"rin": clipper.R})
+    x = 3 * np.sin(2 * np.pi * 200 * np.arange(2000) / fs)
+    assert np.allclose(circuit.process_signal(x), clipper.process_signal(x), atol=1e-9)
+
+
+def test_decompositions_cached_by_topology(cache_dir, monkeypatch):
+    fs = 44100
+    x = np.random.default_rng(15).standard_normal(500)
+    first = spice_circuit(CLIPPER, fs, "C1")
+    expected = first.process_signal(x)
+    # other values, same topology: the structure is reused
+    second = spice_circuit(CLIPPER, fs, "C1", {"rin": 10e3})
+    assert second.decomposition is first.decomposition
+    assert second.C1 is not first.C1 and second.source.Rp == 10e3
+    assert len(list(cache_dir.glob("*.pkl"))) == 1
+
+    # another process: netlists are parsed again, decompositions come from disk
+    decomposition_cache.clear()
+    spice.netlist_cache.clear()
+    monkeypatch.setattr(spice, "Decomposition", None)
+    path = cache_dir / "clipper.cir"
+    path.write_text(CLIPPER)
+    third = load_spice(path, fs, "C1")
+    assert decomposition_cache.disk_hits == 1
+    assert np.array_equal(third.process_signal(x), expected)
+
+
+def test_current_source_input():
+    fs = 48000
+    x = 1e-3 * np.random.default_rng(16).standard_normal(500)
+    # SPICE current flows through the source from n+ to n-: I1 0 a drives node a
+    for diodes in ("", "D1 a 0\nD2 0 a\n"):
+        norton = spice_circuit(f"norton\nI1 0 a\nR1 a 0 1k\nC1 a 0 100n\n{diodes}", fs, "C1")
+        thevenin = spice_circuit(f"thevenin\nV1 in 0\nR1 in a 1k\nC1 a 0 100n\n{diodes}", fs, "C1")
+        assert isinstance(norton.source, IdealCurrentSource if not diodes else ResistiveCurrentSource)
+        assert np.allclose(norton.process_signal(x), thevenin.process_signal(1e3 * x), atol=1e-12)
+
+    with pytest.raises(ValueError, match="parallel"):
+        NetlistCircuit(parse_spice("no resistor\nI1 0 a\nR1 a b 1k\nC1 b 0 1n\nD1 b 0\n"), fs, "C1")
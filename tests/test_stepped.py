@@ -0,0 +1,86 @@
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_stepped.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import RCA_MK2_SEF
+
+
+def slow_path(lp, hp):
+    mk2 = RCA_MK2_SEF(44100, 1000, 5000)
+    if lp is not None:
+        mk2._apply_lowpass_knob_position(lp)
+    if hp is not None:
+        mk2._apply_highpass_knob_position(hp)
+    return mk2
+
+
+def test_knob_table_matches_setters():
+    x = np.random.default_rng(7).standard_normal(300)
+    mk2 = RCA_MK2_SEF(44100, 1000, 5000)
+    assert mk2.knobs.shape == (11, 11)
+    assert not mk2.knobs.tables  # built lazily
+
+    mk2.set_lowpass_knob_position(2)  # highpass knob still at the constructor's cutoff
+    assert mk2.lowpass_cutoff == slow_path(2, None).lowpass_cutoff
+    assert np.allclose(mk2.process_signal(x), slow_path(2, None).process_signal(x))
+
+    mk2.set_highpass_knob_position(4)
+    for lp, hp in [(7, 4), (7, 9), (0, 1), (10, 10), (3, 0)]:
+        mk2.set_lowpass_knob_position(lp)
+        mk2.set_highpass_knob_position(hp)
+        assert mk2.knobs.positions == {"lowpass": lp, "highpass": hp}
+        reference = slow_path(lp, hp)
+        assert mk2.lowpass_cutoff == reference.lowpass_cutoff
+        assert mk2.S0.Rp == reference.S0.Rp
+        assert np.allclose(mk2.process_signal(x), reference.process_signal(x))
+
+
+def test_table_only_writes_coefficients_that_depend_on_the_knob():
+    mk2 = RCA_MK2_SEF(44100, 1000, 5000)
+    targets, rows = mk2.knobs.table("lowpass")
+    attrs = {attr for _, attr, _ in targets}
+    assert {"Rp", "G", "C", "L", "lowpass_cutoff"} <= attrs
+    assert not attrs & {"a", "b", "z", "fs", "k", "highpass_cutoff"}
+    assert len(rows) == 11 and len(mk2.knobs.tables) == 1
+
+
+def test_lowpass_knob_uses_table():
+    x = np.random.default_rng(5).standard_normal(300)
+    mk2 = RCA_MK2_SEF(44100, 1000, 5000)
+    mk2.set_lowpass_knob_position(0)
+
+    def fail(pos):
+        raise AssertionError("setter called")
+
+    mk2._apply_lowpass_knob_position = fail
+    for pos in range(11):
+        mk2.set_lowpass_knob_position(pos)
+    assert len(mk2.knobs.tables) == 1
+    assert np.allclose(mk2.process_signal(x), slow_path(10, None).process_signal(x))
+
+
+def test_off_grid_changes_fall_back_to_setters():
+    x = np.random.default_rng(3).standard_normal(300)
+    mk2 = RCA_MK2_SEF(44100, 1000, 5000)
+    mk2.set_lowpass_knob_position(1)
+    mk2.set_highpass_knob_position(1)
+    mk2.set_lowpass_cutoff(1234.0)
+    assert mk2.knobs.positions["lowpass"] is None
+    assert list(mk2.knobs.tables) == [(1, 1)]  # the highpass table built at lowpass position 1
+
+    mk2.set_highpass_knob_position(2)
+    assert (1, None) in mk2.knobs.tables
+    reference = slow_path(None, 2)
+    reference.set_lowpass_cutoff(1234.0)
+    assert np.allclose(mk2.process_signal(x), reference.process_signal(x))
+
+    mk2.set_Z_output(600)
+    assert not mk2.knobs.tables
+    mk2.set_lowpass_knob_position(5)
+    assert mk2.knobs.positions["lowpass"] == 5
+    assert mk2.Rt.Rp == 600
@@ -0,0 +1,35 @@
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_sweep.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import DiodeClipper, RCLowPass
+from pywdf.core.sweep import sweep_analysis, sweep_cache
+
+
+def test_linear_response_matches_impulse_response():
+    fs = 48000
+    lpf = RCLowPass(fs, cutoff=1000)
+    sweep_cache.clear()
+    result = sweep_analysis(lpf)
+    assert sweep_cache.misses == 2
+    sweep_analysis(RCLowPass(fs, cutoff=2000))
+    assert sweep_cache.misses == 2 and len(sweep_cache) == 2
+
+    f, H = result.frequency_responses(8192)
+    reference = np.fft.rfft(lpf.get_impulse_response(8192 / fs), 8192)
+    band = (f > 100) & (f < 10000)
+    assert np.allclose(np.abs(H[0, band]), np.abs(reference[band]), rtol=0.02)
+    # a linear circuit has (next to) no harmonic responses
+    energy = np.sum(result.impulse_responses**2, axis=1)
+    assert np.all(energy[1:] < 1e-3 * energy[0])
+
+
+def test_symmetric_clipper_has_odd_harmonics():
+    result = DiodeClipper(48000).sweep_analysis(amplitude=2.0)
+    energy = np.sum(result.impulse_responses**2, axis=1)
+    assert energy[2] > 100 * energy[1] and energy[4] > 100 * energy[3]
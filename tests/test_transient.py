@@ -0,0 +1,62 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_transient.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import DiodeClipper, RCLowPass
+
+
+def test_batched_grid_matches_single_renders():
+    fs = 44100
+    clipper = DiodeClipper(fs)
+    freqs, amplitudes = [200.0, 1000.0], [0.5, 2.0, 5.0]
+    result = clipper.transient_analysis(freqs, amplitudes, t_ms=10, settle_ms=5, currents=True)
+    n_settle, n_samples = 220, 441
+    assert result.y.shape == result.i_output.shape == (n_samples, 2, 3)
+    assert np.isclose(result.t[0], n_settle / fs)
+
+    t = np.arange(n_settle + n_samples) / fs
+    for i, f in enumerate(freqs):
+        for j, amplitude in enumerate(amplitudes):
+            x = amplitude * np.sin(2 * np.pi * f * t)
+            v, i_source, i_output = np.array(DiodeClipper(fs).process_i_v_signals(x)).T
+            assert np.allclose(result.x[:, i, j], x[n_settle:])
+            assert np.allclose(result.y[:, i, j], v[n_settle:], atol=1e-12)
+            assert np.allclose(result.i_output[:, i, j], i_output[n_settle:], atol=1e-15)
+
+    # process_sample applies the clipper's gains and phase inversion, process_sample_i_v does not
+    clipper.set_input_gain(6.0)
+    batched = clipper.transient_analysis(freqs, amplitudes, t_ms=10, settle_ms=5)
+    single = clipper.transient_analysis(freqs, amplitudes, t_ms=10, settle_ms=5, batch=False)
+    assert batched.i_source is None and np.allclose(batched.x, result.x)
+    assert np.allclose(single.y, batched.y, atol=1e-12)
+    x = amplitudes[2] * np.sin(2 * np.pi * freqs[1] * t)
+    assert np.allclose(batched.y[:, 1, 2], clipper.process_signal(x)[n_settle:], atol=1e-12)
+
+
+def test_spectrum_of_coherent_sine():
+    fs = 48000
+    lpf = RCLowPass(fs, cutoff=1000)
+    # 20 ms: 1 kHz falls on bin 20, after 10 ms of settling
+    result = lpf.transient_analysis([1000.0], [1.0, 2.0], t_ms=20, settle_ms=10)
+    f, magnitude = result.spectrum()
+    assert np.argmax(magnitude[:, 0, 0]) == 20 and f[20] == 1000.0
+    assert np.allclose(magnitude[20, 0, 1], 2 * magnitude[20, 0, 0])
+    # a first order lowpass at its cutoff: -3 dB
+    assert np.isclose(magnitude[20, 0, 0], 1 / np.sqrt(2), rtol=0.02)
+
+
+def test_ac_transient_spectrum_resolution():
+    fs = 48000
+    RCLowPass(fs, cutoff=1000).AC_transient_analysis(1000, t_ms=5, spectrum_ms=1000)
+    waveform, spectrum = plt.gcf().axes
+    assert len(waveform.lines[1].get_ydata()) == 240
+    f, magnitude = spectrum.lines[0].get_data()
+    # 1 Hz bins: the peak is the sine's, not smeared over 200 Hz
+    assert f[1] - f[0] == 1.0 and f[np.argmax(magnitude)] == 1000.0
+    plt.close("all")
@@ -0,0 +1,170 @@
+import copy
+
+import numpy as np
+import pytest
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_traversal.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import BassmanToneStack, DiodeClipper, RCA_MK2_SEF
+from pywdf.core.circuit import Circuit
+from pywdf.core.netlist import Netlist, NetlistCircuit
+from pywdf.core.traversal import DOWN, N_PORT, UP, _kind
+from pywdf.core.wdf import (
+    Capacitor, IdealVoltageSource, Inductor, OpenCircuit, ParallelAdaptor, ParallelAdaptorN, PolarityInverter,
+    ResistiveCurrentSource, ResistiveVoltageSource, Resistor, SeriesAdaptor, SeriesAdaptorN, SeriesVoltage,
+    ShortCircuit,
+)
+
+
+def rc_ladder(n_sections, fs=44100):
+    node = Resistor(1e3)
+    for _ in range(n_sections):
+        node = SeriesAdaptor(Resistor(10.0), ParallelAdaptor(Capacitor(1e-8, fs), node))
+    source = IdealVoltageSource(node)
+    return Circuit(source, source, node)
+
+
+def driven(top):
+    source = IdealVoltageSource(top)
+    return Circuit(source, source, top)
+
+
+def with_source(source, value, setter, wrap):
+    getattr(source, setter)(value)
+    return driven(wrap(source))
+
+
+def folded():
+    circuit = driven(SeriesAdaptor(SeriesAdaptor(Resistor(1e3), Resistor(2.2e3)), Capacitor(1e-7, 44100)))
+    circuit.simplify()
+    return circuit
+
+
+def r_type():
+    netlist = Netlist()
+    netlist.add("Vin", "in", "0")
+    netlist.add("R1", "in", "a", 1e3)
+    netlist.add("R2", "in", "b", 4.7e3)
+    netlist.add("R3", "a", "0", 10e3)
+    netlist.add("R4", "b", "0", 1e3)
+    netlist.add("C5", "a", "b", 1e-7)
+    return NetlistCircuit(netlist, 44100, "C5")
+
+
+# one small tree per element with inlined code, see traversal.UP / ACCEPT / DOWN / N_PORT
+TEMPLATE_TREES = {
+    "Resistor": lambda: driven(SeriesAdaptor(Resistor(1e3), Capacitor(1e-7, 44100))),
+    "FoldedResistor": folded,
+    "Capacitor": lambda: driven(ParallelAdaptor(Capacitor(1e-7, 44100), Resistor(1e3))),
+    "Inductor": lambda: driven(SeriesAdaptor(Resistor(100.0), ParallelAdaptor(Inductor(1e-2, 44100), Capacitor(1e-7, 44100)))),
+    "ResistiveVoltageSource": lambda: with_source(
+        ResistiveVoltageSource(Rval=50.0), 0.3, "set_voltage", lambda s: SeriesAdaptor(s, Capacitor(1e-7, 44100))
+    ),
+    "ResistiveCurrentSource": lambda: with_source(
+        ResistiveCurrentSource(Rval=1e4), 1e-3, "set_current",
+        lambda s: SeriesAdaptor(Resistor(100.0), ParallelAdaptor(s, Capacitor(1e-7, 44100))),
+    ),
+    "ShortCircuit": lambda: driven(SeriesAdaptor(ShortCircuit(), SeriesAdaptor(Resistor(1e3), Capacitor(1e-7, 44100)))),
+    "OpenCircuit": lambda: driven(ParallelAdaptor(OpenCircuit(), SeriesAdaptor(Resistor(1e3), Capacitor(1e-7, 44100)))),
+    "SeriesAdaptor": lambda: driven(SeriesAdaptor(Resistor(1e3), Capacitor(1e-7, 44100))),
+    "ParallelAdaptor": lambda: driven(SeriesAdaptor(Resistor(1e3), ParallelAdaptor(Capacitor(1e-7, 44100), Resistor(2e3)))),
+    "PolarityInverter": lambda: driven(SeriesAdaptor(Resistor(1e3), PolarityInverter(Capacitor(1e-7, 44100)))),
+    "SeriesVoltage": lambda: with_source(
+        SeriesVoltage(Capacitor(1e-7, 44100)), 0.2, "set_voltage", lambda s: SeriesAdaptor(Resistor(1e3), s)
+    ),
+    "SeriesAdaptorN": lambda: driven(SeriesAdaptorN([Resistor(1e3), Capacitor(1e-7, 44100), Inductor(1e-2, 44100)])),
+    "ParallelAdaptorN": lambda: driven(
+        SeriesAdaptor(Resistor(1e3), ParallelAdaptorN([Resistor(2e3), Capacitor(1e-7, 44100), Inductor(1e-2, 44100)]))
+    ),
+    "RTypeAdaptor": r_type,
+}
+
+
+def test_every_template_has_a_tree():
+    assert set(UP) | set(DOWN) | set(N_PORT) | {"RTypeAdaptor"} == set(TEMPLATE_TREES)
+
+
+@pytest.mark.parametrize("kind", sorted(TEMPLATE_TREES))
+def test_template_matches_recursive(kind):
+    # the inlined code of each element is a copy of its wave methods in wdf.py
+    x = np.random.default_rng(3).standard_normal(200)
+    circuit = TEMPLATE_TREES[kind]()
+    elements = circuit.enable_flat_traversal().elements
+    assert kind in {_kind(e) for e in elements}
+
+    waves = []
+    for flat in (False, True):
+        if flat:
+            circuit.enable_flat_traversal()
+        else:
+            circuit.disable_flat_traversal()
+        circuit.reset()
+        rows = []
+        for sample in x:
+            rows.append(circuit.process_sample(sample))
+            rows += [e.a for e in elements] + [e.b for e in elements]
+        waves.append(np.array(rows, dtype=float))
+    assert np.any(waves[0] != 0) and np.array_equal(waves[0], waves[1])
+
+
+def test_flat_matches_recursive():
+    x = np.random.default_rng(7).standard_normal(400)
+    for circuit in (BassmanToneStack(44100, 0.3, 0.5, 0.7), DiodeClipper(44100, input_gain_db=10), RCA_MK2_SEF(44100, 300, 3000)):
+        expected = circuit.process_signal(x)
+        circuit.enable_flat_traversal()
+        assert np.array_equal(circuit.process_signal(x), expected)
+        # copies (e.g. Monte Carlo instances) process their own elements
+        circuit.reset()
+        assert np.array_equal(copy.deepcopy(circuit).process_signal(x), expected)
+        circuit.disable_flat_traversal()
+        assert circuit.traversal is None
+
+
+def test_rebuilt_after_topology_change():
+    x = np.random.default_rng(8).standard_normal(400)
+    mk2 = RCA_MK2_SEF(44100, 300, 3000)
+    traversal = mk2.enable_flat_traversal()
+    n_elements = traversal.n_elements
+    mk2.set_num_LP_stages(3)
+    reference = RCA_MK2_SEF(44100, 300, 3000)
+    reference.set_num_LP_stages(3)
+    assert np.array_equal(mk2.process_signal(x), reference.process_signal(x))
+    assert traversal.n_elements > n_elements
+
+
+def test_not_rebuilt_by_other_circuits(monkeypatch):
+    x = np.random.default_rng(2).standard_normal(100)
+    ladder = rc_ladder(50)
+    traversal = ladder.enable_flat_traversal()
+    ladder.process_signal(x)
+
+    def fail():
+        raise AssertionError("rebuilt")
+
+    monkeypatch.setattr(traversal, "build", fail)
+    other = rc_ladder(10)
+    other.enable_flat_traversal()
+    RCA_MK2_SEF(44100, 300, 3000).set_num_LP_stages(2)
+    ladder.process_signal(x)
+
+
+def test_deep_ladder_beyond_recursion_limit():
+    n_sections = 3000
+    ladder = rc_ladder(n_sections)
+    assert 4 * n_sections > sys.getrecursionlimit()
+    traversal = ladder.enable_flat_traversal()
+    assert traversal.n_elements == 4 * n_sections + 1
+
+    # impedance changes deep in the tree reach the top without recursing
+    deepest = ladder.output
+    while deepest.get_children():
+        deepest = deepest.get_children()[-1]
+    deepest.set_resistance(2e3)
+
+    y = ladder.process_signal(np.ones(50))
+    assert np.all(np.isfinite(y)) and y[-1] > 0
@@ -0,0 +1,55 @@
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Allow direct execution: python tests/test_validation.py
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pywdf import Chua
+from pywdf.core.validation import ReferenceCache, error_metrics, reference_trajectory, run_validation_suite
+
+
+def decay(t, y):
+    return -1000.0 * y
+
+
+def test_error_metrics():
+    t = np.arange(1000) / 1000
+    x = np.sin(2 * np.pi * 5 * t)
+    same = error_metrics(x, x, 1000)["ch0"]
+    assert same["rms_error"] == 0 and same["max_error"] == 0 and same["spectral_distance_db"] == 0
+    off = error_metrics(x, x + 0.1, 1000, labels=["x"])["x"]
+    assert np.isclose(off["max_error"], 0.1) and np.isclose(off["rms_error"], 0.1)
+
+
+def test_reference_cache(tmp_path):
+    cache = ReferenceCache(tmp_path)
+    y, hit = reference_trajectory(decay, [1.0], 44100, 100, {"k": 1000.0}, cache, name="decay")
+    assert not hit
+    assert np.allclose(y[:, 0], np.exp(-1000.0 * np.arange(100) / 44100), atol=1e-9)
+    y_cached, hit = reference_trajectory(decay, [1.0], 44100, 100, {"k": 1000.0}, cache, name="decay")
+    assert hit and np.array_equal(y, y_cached)
+    _, hit = reference_trajectory(decay, [1.0], 48000, 100, {"k": 1000.0}, cache, name="decay")
+    assert not hit
+
+
+def test_chua_wdf_tracks_ode(tmp_path):
+    def make_case(fs):
+        chua = Chua(fs)
+        return dict(states=chua.render_states(52), rhs=chua.ode, fs=fs,
+                    params=chua.ode_parameters(), n_skip=2, name="Chua",
+                    labels=["v_C1", "v_C4", "i_L3"])
+
+    coarse, fine = run_validation_suite(make_case, [1e5, 4e5], cache_dir=tmp_path,
+                                        results_path=tmp_path / "results.json")
+    assert coarse["metrics"]["v_C1"]["relative_rms_error"] < 0.05
+    # second order convergence of the bilinear transform
+    assert fine["metrics"]["v_C1"]["relative_rms_error"] < coarse["metrics"]["v_C1"]["relative_rms_error"] / 4
+    assert (tmp_path / "results.json").exists()
+
+
+def test_chua_validate():
+    metrics = Chua(1e5).validate()["metrics"]
+    assert all(m["relative_rms_error"] < 0.05 for m in metrics.values())